@@ -0,0 +1,28 @@
+"""add index on user_symbols.symbol
+
+Revision ID: 4b8e2f1c9a70
+Revises: daa77c3f9ed2
+Create Date: 2026-10-18 10:12:41.302118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e2f1c9a70'
+down_revision: Union[str, Sequence[str], None] = 'daa77c3f9ed2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_user_symbols_symbol'), 'user_symbols', ['symbol'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_symbols_symbol'), table_name='user_symbols')
@@ -0,0 +1,29 @@
+"""add interval to user_symbols
+
+Revision ID: 9d41c7e05b3a
+Revises: 4b8e2f1c9a70
+Create Date: 2026-10-18 11:03:27.584410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41c7e05b3a'
+down_revision: Union[str, Sequence[str], None] = '4b8e2f1c9a70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing subscriptions were all on 1h candles
+    op.add_column('user_symbols', sa.Column('interval', sa.String(), server_default='1h', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_symbols', 'interval')
@@ -0,0 +1,37 @@
+"""add per-subscription rsi thresholds to user_symbols
+
+Revision ID: c3f86a1d2e54
+Revises: 9d41c7e05b3a
+Create Date: 2026-10-18 12:41:09.317245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f86a1d2e54'
+down_revision: Union[str, Sequence[str], None] = '9d41c7e05b3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_symbols', sa.Column('rsi_oversold_threshold', sa.Integer(), server_default='30', nullable=False))
+    op.add_column('user_symbols', sa.Column('rsi_overbought_threshold', sa.Integer(), server_default='70', nullable=False))
+    # Existing subscriptions keep the thresholds that applied to everyone so far
+    op.execute(
+        "UPDATE user_symbols SET "
+        "rsi_oversold_threshold = (SELECT rsi_oversold_threshold FROM settings ORDER BY id LIMIT 1), "
+        "rsi_overbought_threshold = (SELECT rsi_overbought_threshold FROM settings ORDER BY id LIMIT 1) "
+        "WHERE EXISTS (SELECT 1 FROM settings)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_symbols', 'rsi_overbought_threshold')
+    op.drop_column('user_symbols', 'rsi_oversold_threshold')
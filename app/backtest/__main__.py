@@ -0,0 +1,96 @@
+"""
+Backtest RSI alert thresholds on historical klines
+
+Usage:
+    python -m app.backtest [--symbols BTCUSDT ETHUSDT] [--interval 1h] [--days 365]
+    python -m app.backtest --file BTCUSDT-1h-2024-01.csv --file BTCUSDT-1h-2024-02.csv
+
+Without --file, klines are read from the local kline store (KLINE_STORE_DIR),
+after downloading only the bars it is missing from Binance. Files are
+KLINE_DTYPE .npy arrays or Binance kline CSVs; the symbol is taken from the
+file name and files of the same symbol are merged.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.backtest.engine import (
+    DEFAULT_HORIZONS, OVERBOUGHT_GRID, OVERSOLD_GRID, BacktestResult,
+    load_klines_file, merge_klines, run_backtest, symbol_from_path,
+)
+from app.binance.client import BinanceClient
+from app.binance.kline_store import kline_store
+from app.utils.constants import DEFAULT_INTERVAL, SUPPORTED_INTERVALS, SUPPORTED_SYMBOLS
+
+
+def load_files(paths: List[str]) -> Dict[str, np.ndarray]:
+    parts: Dict[str, List[np.ndarray]] = {}
+    for path in paths:
+        parts.setdefault(symbol_from_path(path), []).append(load_klines_file(path))
+    return {symbol: merge_klines(arrays) for symbol, arrays in parts.items()}
+
+
+def load_store(symbols: List[str], interval: str, days: float) -> Dict[str, np.ndarray]:
+    client = BinanceClient()
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - int(days * 86400 * 1000)
+    klines = {}
+    try:
+        for symbol in symbols:
+            added = kline_store.sync(client, symbol, interval, start_ms, now_ms)
+            columns = kline_store.columns(symbol, interval)
+            first = int(np.searchsorted(columns['open_time'], start_ms))
+            klines[symbol] = {field: column[first:] for field, column in columns.items()}
+            # Progress goes to stderr so --json output stays parseable
+            print(f"{symbol}: {len(klines[symbol]['close'])} {interval} klines ({added} downloaded)", file=sys.stderr)
+    finally:
+        client.close()
+    return klines
+
+
+def print_report(result: BacktestResult):
+    horizons = "".join(f"{f'fwd {h} bars':>13}" for h in result.horizons)
+    print(f"\n{'symbol':12}{'type':12}{'threshold':>10}{'alerts':>8}{horizons}")
+    for row in result.rows():
+        returns = "".join(
+            f"{'-':>13}" if value is None else f"{value:>13.2%}"
+            for value in row['forward_returns'].values()
+        )
+        print(f"{row['symbol']:12}{row['alert_type']:12}{row['threshold']:>10}{row['alerts']:>8}{returns}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", nargs="+", default=SUPPORTED_SYMBOLS)
+    parser.add_argument("--interval", choices=SUPPORTED_INTERVALS, default=DEFAULT_INTERVAL)
+    parser.add_argument("--days", type=float, default=365)
+    parser.add_argument("--file", action="append", help="Local kline file, repeatable")
+    parser.add_argument("--oversold", type=int, nargs="+", default=list(OVERSOLD_GRID))
+    parser.add_argument("--overbought", type=int, nargs="+", default=list(OVERBOUGHT_GRID))
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS))
+    parser.add_argument("--period", type=int, default=14)
+    parser.add_argument("--cooldown", type=float, help="Alert cooldown in seconds (default: one interval)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    klines = load_files(args.file) if args.file else load_store(args.symbols, args.interval, args.days)
+
+    started = time.perf_counter()
+    result = run_backtest(klines, args.interval, args.oversold, args.overbought,
+                          args.period, args.horizons, args.cooldown)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(result.rows(), indent=2))
+    else:
+        print_report(result)
+        print(f"\n{len(result.symbols)} symbols, {int(result.bars.sum())} candles, "
+              f"{len(args.oversold)}x{len(args.overbought)} thresholds in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
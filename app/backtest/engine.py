@@ -0,0 +1,217 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from app.binance.client import KLINE_DTYPE
+from app.indicators.rsi import calculate_rsi_series
+from app.utils.constants import INTERVAL_SECONDS
+
+# The choices offered by the /settings threshold menus
+OVERSOLD_GRID = (20, 25, 30, 35, 40)
+OVERBOUGHT_GRID = (60, 65, 70, 75, 80)
+# Forward return horizons, in bars
+DEFAULT_HORIZONS = (1, 4, 24)
+
+
+def load_klines_file(path: str) -> np.ndarray:
+    """
+    Load klines saved as a KLINE_DTYPE .npy or a Binance kline CSV
+
+    CSVs are the layout of the data.binance.vision dumps (the /klines row
+    format, with or without a header). Microsecond timestamps, used by newer
+    spot dumps, are converted to milliseconds.
+    """
+    if Path(path).suffix == '.npy':
+        return np.load(path).astype(KLINE_DTYPE, copy=False)
+
+    rows = np.loadtxt(path, delimiter=',', usecols=range(11), ndmin=2,
+                      comments=None, dtype=np.float64, skiprows=_header_rows(path))
+    klines = np.empty(len(rows), dtype=KLINE_DTYPE)
+    for column, name in zip((0, 6, 1, 2, 3, 4, 5, 7, 8, 9, 10), KLINE_DTYPE.names):
+        klines[name] = rows[:, column]
+    for name in ('open_time', 'close_time'):
+        micros = klines[name] > 10**14
+        klines[name][micros] //= 1000
+    return klines
+
+
+def _header_rows(path: str) -> int:
+    with open(path) as f:
+        first = f.readline()
+    return 0 if first[:1].isdigit() else 1
+
+
+def symbol_from_path(path: str) -> str:
+    """BTCUSDT-1h-2024-01.csv -> BTCUSDT"""
+    return Path(path).stem.split('-')[0].split('_')[0].upper()
+
+
+def merge_klines(parts: Sequence[np.ndarray]) -> np.ndarray:
+    """Concatenate kline arrays, sorted by open_time with duplicates dropped"""
+    klines = np.concatenate(parts) if parts else np.empty(0, dtype=KLINE_DTYPE)
+    _, first = np.unique(klines['open_time'], return_index=True)
+    return klines[first]
+
+
+def align_closes(klines: Dict[str, np.ndarray]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Stack each symbol's closes into left-aligned rows
+
+    Args:
+        klines: Per symbol, a KLINE_DTYPE array or KlineStore columns
+
+    Returns:
+        (symbols, closes, open_times); rows are padded with NaN closes and
+        -1 open times after the symbol's last candle
+    """
+    symbols = sorted(klines)
+    n_bars = max((len(klines[s]['close']) for s in symbols), default=0)
+    closes = np.full((len(symbols), n_bars), np.nan)
+    open_times = np.full((len(symbols), n_bars), -1, dtype=np.int64)
+    for row, symbol in enumerate(symbols):
+        data = klines[symbol]
+        n = len(data['close'])
+        closes[row, :n] = data['close']
+        open_times[row, :n] = data['open_time']
+    return symbols, closes, open_times
+
+
+def apply_cooldown(triggers: np.ndarray, bar_times: np.ndarray, cooldown_ms: int) -> np.ndarray:
+    """
+    Drop triggers that RSIMonitor would hold back with its alert cooldown
+
+    An alert is skipped when the previous one for the same threshold was
+    sent less than cooldown_ms earlier. Candles close a fixed time after
+    they open, so open times measure the same spacing as the closes.
+
+    Args:
+        triggers: (symbols x bars x thresholds) threshold crossings
+        bar_times: (symbols x bars) candle open times, epoch milliseconds
+        cooldown_ms: Cooldown length
+
+    Returns:
+        The alerts actually sent, shaped like triggers
+    """
+    steps = np.diff(bar_times, axis=1)
+    steps = steps[(bar_times[:, 1:] >= 0) & (bar_times[:, :-1] >= 0)]
+    if not steps.size or steps.min() >= cooldown_ms:
+        # Consecutive closes are never inside one cooldown, nothing to drop
+        return triggers
+
+    sent = np.zeros_like(triggers)
+    last_sent = np.full(triggers.shape[::2], np.iinfo(np.int64).min // 2, dtype=np.int64)
+    for bar in range(triggers.shape[1]):
+        now = bar_times[:, bar, None]
+        fire = triggers[:, bar] & (now - last_sent >= cooldown_ms)
+        sent[:, bar] = fire
+        last_sent = np.where(fire, now, last_sent)
+    return sent
+
+
+def forward_returns(closes: np.ndarray, horizons: Sequence[int]) -> np.ndarray:
+    """(horizons x symbols x bars) return from each close to the close `h` bars later, NaN past the end"""
+    returns = np.full((len(horizons),) + closes.shape, np.nan)
+    for i, h in enumerate(horizons):
+        returns[i, :, :-h] = closes[:, h:] / closes[:, :-h] - 1
+    return returns
+
+
+@dataclass
+class BacktestResult:
+    symbols: List[str]
+    interval: str
+    bars: np.ndarray  # candles per symbol
+    oversold_thresholds: np.ndarray
+    overbought_thresholds: np.ndarray
+    horizons: Tuple[int, ...]
+    # (symbols x thresholds) alert counts
+    oversold_alerts: np.ndarray
+    overbought_alerts: np.ndarray
+    # (symbols x thresholds x horizons) mean forward return after an alert
+    oversold_returns: np.ndarray
+    overbought_returns: np.ndarray
+
+    def rows(self) -> List[Dict]:
+        """One row per symbol, alert type and threshold"""
+        rows = []
+        for kind, thresholds, alerts, returns in (
+            ('oversold', self.oversold_thresholds, self.oversold_alerts, self.oversold_returns),
+            ('overbought', self.overbought_thresholds, self.overbought_alerts, self.overbought_returns),
+        ):
+            for s, symbol in enumerate(self.symbols):
+                for k, threshold in enumerate(thresholds):
+                    rows.append({
+                        'symbol': symbol,
+                        'alert_type': kind,
+                        'threshold': int(threshold),
+                        'alerts': int(alerts[s, k]),
+                        'forward_returns': {
+                            f"{h}": None if np.isnan(returns[s, k, i]) else float(returns[s, k, i])
+                            for i, h in enumerate(self.horizons)
+                        },
+                    })
+        return rows
+
+
+def _mean_forward_returns(sent: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    """Mean of each horizon's return over the sent alerts -> (symbols x thresholds x horizons)"""
+    sent = sent.astype(np.float64)
+    valid = ~np.isnan(returns)
+    filled = np.where(valid, returns, 0.0)
+    total = np.einsum('stk,hst->skh', sent, filled)
+    count = np.einsum('stk,hst->skh', sent, valid.astype(np.float64))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return total / count
+
+
+def run_backtest(klines: Dict[str, np.ndarray], interval: str,
+                 oversold: Sequence[int] = OVERSOLD_GRID, overbought: Sequence[int] = OVERBOUGHT_GRID,
+                 period: int = 14, horizons: Sequence[int] = DEFAULT_HORIZONS,
+                 cooldown: Optional[float] = None) -> BacktestResult:
+    """
+    Replay closed candles through RSIMonitor's alert rules for a threshold grid
+
+    Every symbol and threshold is evaluated in the same NumPy passes: one
+    Wilder RSI pass over all symbols, then a broadcast comparison against
+    all thresholds. Oversold and overbought alerts have separate cooldowns
+    in the monitor, so an oversold x overbought grid is fully described by
+    its two axes.
+
+    Args:
+        klines: Closed candles per symbol in time order, as KLINE_DTYPE
+            arrays or KlineStore columns
+        interval: Kline interval of the data
+        oversold: Oversold thresholds; alert when RSI < threshold
+        overbought: Overbought thresholds; alert when RSI > threshold
+        period: RSI period
+        horizons: Forward return horizons, in bars
+        cooldown: Alert cooldown in seconds (default: one interval, as in the monitor)
+    """
+    symbols, closes, open_times = align_closes(klines)
+    rsi = calculate_rsi_series(closes, period)[:, :, None]
+    oversold = np.asarray(oversold)
+    overbought = np.asarray(overbought)
+    horizons = tuple(horizons)
+
+    if cooldown is None:
+        cooldown = INTERVAL_SECONDS.get(interval, 3600)
+    cooldown_ms = int(cooldown * 1000)
+
+    # NaN RSI (warm-up bars, padding) compares False, as an unready StreamingRSI sends nothing
+    oversold_sent = apply_cooldown(rsi < oversold[None, None, :], open_times, cooldown_ms)
+    overbought_sent = apply_cooldown(rsi > overbought[None, None, :], open_times, cooldown_ms)
+    returns = forward_returns(closes, horizons)
+
+    return BacktestResult(
+        symbols=symbols,
+        interval=interval,
+        bars=(~np.isnan(closes)).sum(axis=1),
+        oversold_thresholds=oversold,
+        overbought_thresholds=overbought,
+        horizons=horizons,
+        oversold_alerts=oversold_sent.sum(axis=1),
+        overbought_alerts=overbought_sent.sum(axis=1),
+        oversold_returns=_mean_forward_returns(oversold_sent, returns),
+        overbought_returns=_mean_forward_returns(overbought_sent, returns),
+    )
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Columnar kline layout, times in epoch milliseconds as Binance sends them
+KLINE_DTYPE = np.dtype([
+    ('open_time', np.int64),
+    ('close_time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+    ('quote_volume', np.float64),
+    ('trades', np.int64),
+    ('taker_buy_base_volume', np.float64),
+    ('taker_buy_quote_volume', np.float64),
+])
+
+PAGE_SIZE = 1000  # Binance's maximum klines per request
+
+
+def klines_to_array(data: List[List]) -> np.ndarray:
+    """Convert raw /klines rows into a KLINE_DTYPE structured array"""
+    return np.array([
+        (k[0], k[6], float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]),
+         float(k[7]), int(k[8]), float(k[9]), float(k[10]))
+        for k in data
+    ], dtype=KLINE_DTYPE)
+
+
+class AsyncBinanceClient:
+    """
+    Non-blocking Binance REST client on a shared aiohttp connection pool
+
+    Request weight is reserved before each call and corrected from the
+    X-MBX-USED-WEIGHT-1M header, so bursts wait for the next minute instead
+    of hitting HTTP 429. Identical requests already in flight share one
+    response.
+    """
+
+    BASE_URL = "https://api.binance.com/api/v3"
+    WEIGHT_LIMIT = 6000  # Request weight allowed per minute per IP
+    KLINES_WEIGHT = 2
+
+    def __init__(self, max_connections: int = 20, weight_headroom: float = 0.9, timeout: float = 10):
+        self.max_connections = max_connections
+        self.weight_headroom = weight_headroom
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.used_weight = 0
+        self._weight_minute: Optional[int] = None
+        self._weight_lock = asyncio.Lock()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                headers={'User-Agent': 'RSI-Bot/1.0'},
+                timeout=self.timeout
+            )
+        return self.session
+
+    async def close(self):
+        """Close the underlying connection pool"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _reserve_weight(self, weight: int):
+        """Wait until `weight` fits in this minute's budget and reserve it"""
+        async with self._weight_lock:
+            while True:
+                minute = int(time.time() // 60)
+                if self._weight_minute != minute:
+                    self._weight_minute = minute
+                    self.used_weight = 0
+
+                if self.used_weight + weight <= self.WEIGHT_LIMIT * self.weight_headroom:
+                    self.used_weight += weight
+                    return
+
+                await asyncio.sleep(60 - time.time() % 60)
+
+    def _record_weight(self, response: aiohttp.ClientResponse):
+        used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if used is not None:
+            self.used_weight = max(self.used_weight, int(used))
+            self._weight_minute = int(time.time() // 60)
+
+    async def _fetch(self, path: str, params: Dict, weight: int):
+        await self._reserve_weight(weight)
+        session = await self._get_session()
+
+        async with session.get(f"{self.BASE_URL}/{path}", params=params) as response:
+            self._record_weight(response)
+            response.raise_for_status()
+            return await response.json()
+
+    async def _request(self, path: str, params: Dict, weight: int = 1):
+        """GET path, sharing the response with identical requests in flight"""
+        key = (path, tuple(sorted(params.items())))
+        future = self._inflight.get(key)
+
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(path, params, weight))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(future)
+
+    async def get_klines(self, symbol: str, interval: str = "1h", limit: int = 100,
+                         start_time: Optional[int] = None, end_time: Optional[int] = None) -> np.ndarray:
+        """
+        Get kline/candlestick data for a symbol
+
+        Args:
+            start_time: Only klines opened at or after this time, epoch milliseconds
+            end_time: Only klines opened at or before this time, epoch milliseconds
+
+        Returns:
+            Structured array with KLINE_DTYPE fields, empty on error
+        """
+        params = {'symbol': symbol, 'interval': interval, 'limit': min(limit, PAGE_SIZE)}
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+
+        try:
+            data = await self._request('klines', params, self.KLINES_WEIGHT)
+            return klines_to_array(data)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error fetching klines for {symbol}: {e}")
+            return np.empty(0, dtype=KLINE_DTYPE)
+
+    async def get_klines_history(self, symbol: str, interval: str, start_time: int,
+                                 end_time: Optional[int] = None) -> np.ndarray:
+        """
+        Get all klines opened in [start_time, end_time], paging 1000 at a time
+
+        Args:
+            start_time: Earliest open time, epoch milliseconds
+            end_time: Latest open time, epoch milliseconds (default: now)
+
+        Returns:
+            KLINE_DTYPE structured array in open_time order
+        """
+        pages = []
+        while end_time is None or start_time <= end_time:
+            page = await self.get_klines(symbol, interval, PAGE_SIZE, start_time, end_time)
+            if not len(page):
+                break
+            pages.append(page)
+            if len(page) < PAGE_SIZE:
+                break
+            start_time = int(page['open_time'][-1]) + 1
+
+        if not pages:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        return np.concatenate(pages)
+
+    async def get_klines_many(self, symbols: List[str], interval: str = "1h", limit: int = 100) -> Dict[str, np.ndarray]:
+        """Fetch klines for many symbols concurrently"""
+        results = await asyncio.gather(*(self.get_klines(symbol, interval, limit) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    async def get_24hr_ticker(self, symbol: str) -> Optional[Dict]:
+        """Get 24hr ticker price change statistics"""
+        try:
+            return await self._request('ticker/24hr', {'symbol': symbol}, 2)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error fetching 24hr ticker for {symbol}: {e}")
+            return None
+
+    async def get_current_price(self, symbol: str) -> Optional[float]:
+        """Get current price for a symbol"""
+        try:
+            data = await self._request('ticker/price', {'symbol': symbol}, 2)
+            return float(data['price'])
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+            logger.error(f"Error fetching current price for {symbol}: {e}")
+            return None
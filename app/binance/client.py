@@ -1,8 +1,11 @@
-import requests
-import time
+import asyncio
 from typing import List, Dict, Optional
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
+import numpy as np
+
+# KLINE_DTYPE is re-exported here for the backtest engine
+from app.binance.async_client import AsyncBinanceClient, KLINE_DTYPE
 
 @dataclass
 class KlineData:
@@ -20,15 +23,60 @@ class KlineData:
     taker_buy_quote_volume: float
 
 class BinanceClient:
-    BASE_URL = "https://api.binance.com/api/v3"
+    """
+    Blocking REST client for scripts and threads
+
+    A thin wrapper running AsyncBinanceClient on a private event loop, so
+    both share request-weight accounting and parsing. One thread at a time;
+    code running on an event loop should use AsyncBinanceClient directly.
+    """
+    BASE_URL = AsyncBinanceClient.BASE_URL
+    WEIGHT_LIMIT = AsyncBinanceClient.WEIGHT_LIMIT
+    KLINES_WEIGHT = AsyncBinanceClient.KLINES_WEIGHT
+    
+    def __init__(self, max_connections: int = 4):
+        self._loop = asyncio.new_event_loop()
+        self._client = AsyncBinanceClient(max_connections=max_connections)
+    
+    def _run(self, coro):
+        return self._loop.run_until_complete(coro)
+    
+    @property
+    def used_weight(self) -> int:
+        """Request weight used this minute, as last reported by Binance"""
+        return self._client.used_weight
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'RSI-Bot/1.0'
-        })
+    def close(self):
+        """Close the connection pool and the private event loop"""
+        if not self._loop.is_closed():
+            self._run(self._client.close())
+            self._loop.close()
+    
+    def get_klines_array(self, symbol: str, interval: str = "1h", limit: int = 100,
+                         start_time: Optional[int] = None, end_time: Optional[int] = None) -> np.ndarray:
+        """Get klines as a KLINE_DTYPE structured array (empty on error)"""
+        return self._run(self._client.get_klines(symbol, interval, limit, start_time, end_time))
+    
+    def get_klines_history(self, symbol: str, interval: str, start_time: int,
+                           end_time: Optional[int] = None) -> np.ndarray:
+        """
+        Get all klines opened in [start_time, end_time], paging 1000 at a time
+        
+        Waits for the next minute when the request weight budget runs low.
+        
+        Args:
+            symbol: Trading pair symbol (e.g., 'BTCUSDT')
+            interval: Kline interval (1m, 5m, 15m, 30m, 1h, 4h, 1d)
+            start_time: Earliest open time, epoch milliseconds
+            end_time: Latest open time, epoch milliseconds (default: now)
+        
+        Returns:
+            KLINE_DTYPE structured array in open_time order
+        """
+        return self._run(self._client.get_klines_history(symbol, interval, start_time, end_time))
     
-    def get_klines(self, symbol: str, interval: str = "1h", limit: int = 100) -> List[KlineData]:
+    def get_klines(self, symbol: str, interval: str = "1h", limit: int = 100,
+                   start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[KlineData]:
         """
         Get kline/candlestick data for a symbol
         
@@ -36,65 +84,32 @@ class BinanceClient:
             symbol: Trading pair symbol (e.g., 'BTCUSDT')
             interval: Kline interval (1m, 5m, 15m, 30m, 1h, 4h, 1d)
             limit: Number of klines to retrieve (max 1000)
+            start_time: Only klines opened at or after this time, epoch milliseconds
+            end_time: Only klines opened at or before this time, epoch milliseconds
         """
-        url = f"{self.BASE_URL}/klines"
-        params = {
-            'symbol': symbol,
-            'interval': interval,
-            'limit': min(limit, 1000)
-        }
-        
-        try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            klines = []
-            for kline in data:
-                klines.append(KlineData(
-                    symbol=symbol,
-                    open_time=datetime.fromtimestamp(kline[0] / 1000),
-                    close_time=datetime.fromtimestamp(kline[6] / 1000),
-                    open_price=float(kline[1]),
-                    high_price=float(kline[2]),
-                    low_price=float(kline[3]),
-                    close_price=float(kline[4]),
-                    volume=float(kline[5]),
-                    quote_volume=float(kline[7]),
-                    trades_count=int(kline[8]),
-                    taker_buy_base_volume=float(kline[9]),
-                    taker_buy_quote_volume=float(kline[10])
-                ))
-            
-            return klines
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching klines for {symbol}: {e}")
-            return []
+        klines = self.get_klines_array(symbol, interval, limit, start_time, end_time)
+        return [
+            KlineData(
+                symbol=symbol,
+                open_time=datetime.fromtimestamp(kline['open_time'] / 1000),
+                close_time=datetime.fromtimestamp(kline['close_time'] / 1000),
+                open_price=float(kline['open']),
+                high_price=float(kline['high']),
+                low_price=float(kline['low']),
+                close_price=float(kline['close']),
+                volume=float(kline['volume']),
+                quote_volume=float(kline['quote_volume']),
+                trades_count=int(kline['trades']),
+                taker_buy_base_volume=float(kline['taker_buy_base_volume']),
+                taker_buy_quote_volume=float(kline['taker_buy_quote_volume'])
+            )
+            for kline in klines
+        ]
     
     def get_24hr_ticker(self, symbol: str) -> Optional[Dict]:
         """Get 24hr ticker price change statistics"""
-        url = f"{self.BASE_URL}/ticker/24hr"
-        params = {'symbol': symbol}
-        
-        try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching 24hr ticker for {symbol}: {e}")
-            return None
+        return self._run(self._client.get_24hr_ticker(symbol))
     
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Get current price for a symbol"""
-        url = f"{self.BASE_URL}/ticker/price"
-        params = {'symbol': symbol}
-        
-        try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            return float(data['price'])
-        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
-            print(f"Error fetching current price for {symbol}: {e}")
-            return None
+        return self._run(self._client.get_current_price(symbol))
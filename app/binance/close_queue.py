@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# What happens to a close that arrives while the queue is full
+OVERFLOW_POLICIES = ("coalesce", "drop")
+
+
+class CloseQueue:
+    """
+    Bounded queue of closed candles between the socket readers and the workers
+
+    Every key, e.g. (symbol, interval), has its own FIFO and is handed to
+    at most one worker at a time, so closes of a pair are processed in
+    order while different pairs run in parallel. put() never waits; when
+    the queue is full the overflow policy decides:
+
+    - "coalesce": the new close replaces the ones its pair still has
+      waiting, keeping only the latest. A pair with nothing waiting is
+      always accepted, so the queue holds at most max(maxsize, pairs)
+      closes and no pair ever loses its newest close.
+    - "drop": the new close is discarded.
+
+    Either way the next close handed out for that pair is flagged as
+    skipped, so state built up close by close can be rebuilt.
+    """
+
+    def __init__(self, maxsize: int = 10_000, policy: str = "coalesce"):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {OVERFLOW_POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        # Waiting closes per key, each with its skipped flag; a key stays here while a worker owns it
+        self._pending: Dict[Hashable, Deque[Tuple[Any, bool]]] = {}
+        # Keys with closes and no worker yet
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._size = 0
+        # Keys whose next accepted close follows a dropped one
+        self._skip_next: Set[Hashable] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether key has closes waiting or being processed"""
+        return key in self._pending
+
+    def put(self, key: Hashable, item: Any) -> str:
+        """
+        Queue a close for key without waiting
+
+        Returns:
+            "queued", "coalesced" or "dropped"
+        """
+        waiting = self._pending.get(key)
+        outcome = "queued"
+        if self._size >= self.maxsize:
+            if self.policy == "drop":
+                self._skip_next.add(key)
+                return "dropped"
+            if waiting:
+                self._size -= len(waiting)
+                waiting.clear()
+                outcome = "coalesced"
+
+        skipped = outcome == "coalesced" or key in self._skip_next
+        self._skip_next.discard(key)
+        if waiting is None:
+            waiting = self._pending[key] = deque()
+            self._ready.put_nowait(key)
+            self._idle.clear()
+        waiting.append((item, skipped))
+        self._size += 1
+        return outcome
+
+    async def work(self, handler: Callable[[Hashable, Any, bool], Awaitable]):
+        """
+        Worker loop: await handler(key, item, skipped) for queued closes, forever
+
+        Run several of these concurrently for a worker pool.
+        """
+        while True:
+            key = await self._ready.get()
+            waiting = self._pending[key]
+            try:
+                while waiting:
+                    item, skipped = waiting.popleft()
+                    self._size -= 1
+                    try:
+                        await handler(key, item, skipped)
+                    except Exception as e:
+                        logger.error(f"Error processing close for {key}: {e}")
+            finally:
+                if waiting:
+                    # Worker cancelled; leave the rest to the next worker
+                    self._ready.put_nowait(key)
+                else:
+                    del self._pending[key]
+                    if not self._pending:
+                        self._idle.set()
+
+    async def join(self):
+        """Wait until every queued close has been processed"""
+        await self._idle.wait()
@@ -0,0 +1,54 @@
+import json
+import logging
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # Optional faster backend
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Binance sends compact JSON, so an in-progress kline always contains this
+UNCLOSED_MARKER = '"x":false'
+UNCLOSED_MARKER_BYTES = UNCLOSED_MARKER.encode()
+
+
+def json_loads(message: Union[str, bytes]) -> Any:
+    """Parse JSON with orjson when installed, else the stdlib"""
+    if orjson is not None:
+        return orjson.loads(message)
+    return json.loads(message)
+
+
+class FrameDecoder:
+    """
+    Decode websocket frames, dropping unclosed kline updates cheaply
+
+    On 1h candles almost every frame is an in-progress update that the RSI
+    logic ignores. Those are recognised with a substring search and skipped
+    before any JSON parsing, unless include_unclosed is set.
+    """
+
+    def __init__(self, include_unclosed: bool = False):
+        self.include_unclosed = include_unclosed
+        self.decoded = 0
+        self.dropped = 0
+
+    def is_unclosed(self, message: Union[str, bytes]) -> bool:
+        marker = UNCLOSED_MARKER_BYTES if isinstance(message, bytes) else UNCLOSED_MARKER
+        return marker in message
+
+    def decode(self, message: Union[str, bytes]) -> Optional[Dict]:
+        """
+        Parse a frame
+
+        Returns:
+            The decoded frame, or None if it was skipped as an unclosed kline
+        """
+        if not self.include_unclosed and self.is_unclosed(message):
+            self.dropped += 1
+            return None
+
+        self.decoded += 1
+        return json_loads(message)
@@ -0,0 +1,238 @@
+import asyncio
+import os
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+import numpy as np
+
+from app.binance.async_client import AsyncBinanceClient
+from app.binance.client import BinanceClient
+from app.utils.constants import INTERVAL_SECONDS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+KLINE_STORE_DIR = os.getenv("KLINE_STORE_DIR", "data/klines")
+
+# One fixed-width file per field
+STORE_FIELDS: Dict[str, np.dtype] = {
+    'open_time': np.dtype(np.int64),
+    'open': np.dtype(np.float64),
+    'high': np.dtype(np.float64),
+    'low': np.dtype(np.float64),
+    'close': np.dtype(np.float64),
+    'volume': np.dtype(np.float64),
+    'trades': np.dtype(np.int64),
+}
+
+PAGE_SIZE = 1000  # klines per REST request
+
+# (symbol, interval)
+StoreKey = Tuple[str, str]
+
+
+class KlineStore:
+    """
+    Append-only columnar kline files per (symbol, interval)
+
+    Each field lives in <root>/<SYMBOL>/<interval>/<field>.bin as raw native
+    values, so a column is read with numpy.memmap and sliced without copying.
+    Only closed candles are stored, in open_time order; syncing fetches just
+    the bars after the last stored open_time.
+    """
+
+    def __init__(self, root: str = KLINE_STORE_DIR):
+        self.root = Path(root)
+        # Open memmaps per pair and the row count they were mapped at
+        self._maps: Dict[StoreKey, Tuple[int, Dict[str, np.ndarray]]] = {}
+
+    def _dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / interval
+
+    def _path(self, symbol: str, interval: str, field: str) -> Path:
+        return self._dir(symbol, interval) / f"{field}.bin"
+
+    def length(self, symbol: str, interval: str) -> int:
+        """Number of stored bars, repairing columns left uneven by an interrupted append"""
+        sizes = {}
+        for field, dtype in STORE_FIELDS.items():
+            path = self._path(symbol, interval, field)
+            sizes[field] = path.stat().st_size // dtype.itemsize if path.exists() else 0
+
+        rows = min(sizes.values())
+        for field, size in sizes.items():
+            if size > rows:
+                logger.warning(f"Truncating {symbol} {interval} {field} from {size} to {rows} bars")
+                with open(self._path(symbol, interval, field), 'r+b') as f:
+                    f.truncate(rows * STORE_FIELDS[field].itemsize)
+        return rows
+
+    def columns(self, symbol: str, interval: str) -> Dict[str, np.ndarray]:
+        """
+        All stored bars of a pair as read-only memory-mapped columns
+
+        The arrays are mapped once and reused until the next append.
+        """
+        key = (symbol, interval)
+        cached = self._maps.get(key)
+        if cached is not None:
+            return cached[1]
+
+        rows = self.length(symbol, interval)
+        if rows:
+            maps = {
+                field: np.memmap(self._path(symbol, interval, field), dtype=dtype, mode='r', shape=(rows,))
+                for field, dtype in STORE_FIELDS.items()
+            }
+        else:
+            maps = {field: np.empty(0, dtype=dtype) for field, dtype in STORE_FIELDS.items()}
+        self._maps[key] = (rows, maps)
+        return maps
+
+    def tail(self, symbol: str, interval: str, count: int, field: str = 'close') -> np.ndarray:
+        """Zero-copy view of the last `count` values of one field"""
+        column = self.columns(symbol, interval)[field]
+        return column[max(len(column) - count, 0):]
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        open_times = self.columns(symbol, interval)['open_time']
+        return int(open_times[-1]) if len(open_times) else None
+
+    def append(self, symbol: str, interval: str, klines: np.ndarray) -> int:
+        """
+        Append closed klines, skipping any at or before the last stored bar
+
+        Args:
+            klines: Structured array (or dict of columns) with STORE_FIELDS, in open_time order
+
+        Returns:
+            Number of bars written
+        """
+        last = self.last_open_time(symbol, interval)
+        open_times = np.asarray(klines['open_time'])
+        start = 0 if last is None else int(np.searchsorted(open_times, last, side='right'))
+        if start >= len(open_times):
+            return 0
+
+        directory = self._dir(symbol, interval)
+        directory.mkdir(parents=True, exist_ok=True)
+        # open_time last, so a bar only counts once every column has it
+        for field in [*list(STORE_FIELDS)[1:], 'open_time']:
+            values = np.ascontiguousarray(np.asarray(klines[field])[start:], dtype=STORE_FIELDS[field])
+            with open(directory / f"{field}.bin", 'ab') as f:
+                f.write(values.tobytes())
+
+        self._maps.pop((symbol, interval), None)
+        return len(open_times) - start
+
+    def append_bar(self, symbol: str, interval: str, open_time: int, open_price: float, high: float,
+                   low: float, close: float, volume: float, trades: int) -> bool:
+        """
+        Append one closed bar if it directly follows the last stored one
+
+        A bar after a gap is refused so the files never have holes; the next
+        sync fills in the missing bars instead.
+        """
+        last = self.last_open_time(symbol, interval)
+        step = INTERVAL_SECONDS.get(interval)
+        if last is not None and step is not None and open_time != last + step * 1000:
+            return False
+
+        bar = {
+            'open_time': [open_time], 'open': [open_price], 'high': [high], 'low': [low],
+            'close': [close], 'volume': [volume], 'trades': [trades],
+        }
+        return self.append(symbol, interval, bar) == 1
+
+    def prepend(self, symbol: str, interval: str, klines: np.ndarray) -> int:
+        """
+        Add closed klines from before the first stored bar
+
+        Unlike append() this rewrites the pair's files (through a rename, so
+        readers never see a half-written column). Meant for backfilling
+        older history, not the live path.
+
+        Returns:
+            Number of bars written
+        """
+        columns = self.columns(symbol, interval)
+        open_times = np.asarray(klines['open_time'])
+        end = len(open_times)
+        if len(columns['open_time']):
+            end = int(np.searchsorted(open_times, columns['open_time'][0], side='left'))
+        if end == 0:
+            return 0
+
+        directory = self._dir(symbol, interval)
+        directory.mkdir(parents=True, exist_ok=True)
+        for field, dtype in STORE_FIELDS.items():
+            values = np.concatenate([np.asarray(klines[field])[:end].astype(dtype), columns[field]])
+            tmp = directory / f"{field}.bin.tmp"
+            values.tofile(tmp)
+            os.replace(tmp, directory / f"{field}.bin")
+
+        self._maps.pop((symbol, interval), None)
+        return end
+
+    def _since(self, symbol: str, interval: str, start_time: int) -> int:
+        last = self.last_open_time(symbol, interval)
+        return start_time if last is None else last + 1
+
+    @staticmethod
+    def _closed(klines: np.ndarray, now_ms: int) -> np.ndarray:
+        return klines[klines['close_time'] < now_ms]
+
+    def sync(self, client: BinanceClient, symbol: str, interval: str, start_time: int, now_ms: int) -> int:
+        """
+        Fetch and store the closed bars missing since start_time (blocking)
+
+        Bars after the last stored one are appended; if the store starts
+        later than start_time, the older bars are backfilled as well.
+
+        Args:
+            start_time: Earliest bar wanted, epoch milliseconds
+            now_ms: Current time; candles still open at this time are left out
+
+        Returns:
+            Number of bars added
+        """
+        added = 0
+        first = self.columns(symbol, interval)['open_time'][:1]
+        if len(first) and start_time < first[0]:
+            older = client.get_klines_history(symbol, interval, start_time, int(first[0]) - 1)
+            added += self.prepend(symbol, interval, older)
+
+        klines = client.get_klines_history(symbol, interval, self._since(symbol, interval, start_time))
+        return added + self.append(symbol, interval, self._closed(klines, now_ms))
+
+    async def sync_async(self, client: AsyncBinanceClient, symbol: str, interval: str,
+                         start_time: int, now_ms: int) -> int:
+        """sync() for the event loop, paging through AsyncBinanceClient"""
+        added = 0
+        while True:
+            since = self._since(symbol, interval, start_time)
+            page = await client.get_klines(symbol, interval, PAGE_SIZE, start_time=since)
+            added += self.append(symbol, interval, self._closed(page, now_ms))
+            if len(page) < PAGE_SIZE:
+                return added
+
+    async def sync_many(self, client: AsyncBinanceClient, pairs: Iterable[StoreKey],
+                        start_time: Dict[str, int], now_ms: int) -> Dict[StoreKey, int]:
+        """
+        Sync many pairs concurrently
+
+        Args:
+            start_time: Start per interval for pairs with nothing stored yet
+        """
+        pairs = list(pairs)
+        added = await asyncio.gather(*(
+            self.sync_async(client, symbol, interval, start_time[interval], now_ms)
+            for symbol, interval in pairs
+        ))
+        return dict(zip(pairs, added))
+
+
+# Global store shared by the monitor and the websocket client
+kline_store = KlineStore()
@@ -0,0 +1,150 @@
+from typing import Dict, Hashable, Iterable, List, Optional
+import numpy as np
+
+
+# Open time of a price that was stored without one
+UNKNOWN_TIME = -1
+
+
+class PriceRingBuffer:
+    """
+    Fixed-capacity float64 ring buffer of closing prices
+
+    Every value is written twice (at i and i + capacity) so the last `count`
+    prices are always one contiguous slice. That keeps append O(1) and lets
+    view() hand out a chronological, zero-copy, read-only array.
+
+    Each price carries the open time (epoch ms) of its kline in a parallel
+    buffer, so gaps and duplicates in the history can be detected.
+    """
+
+    def __init__(self, capacity: int = 100):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=np.float64)
+        self._times = np.full(2 * capacity, UNKNOWN_TIME, dtype=np.int64)
+        self._start = 0
+        self._count = 0
+        # Python int copy of the newest open time, checked on every close
+        self._last_time = UNKNOWN_TIME
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, price: float, open_time: int = UNKNOWN_TIME):
+        """Add a price, dropping the oldest one when full"""
+        if self._count < self.capacity:
+            pos = self._start + self._count
+            self._count += 1
+        else:
+            pos = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        pos %= self.capacity
+        self._data[pos] = price
+        self._data[pos + self.capacity] = price
+        self._times[pos] = open_time
+        self._times[pos + self.capacity] = open_time
+        self._last_time = open_time
+
+    def extend(self, prices: Iterable[float], open_times: Optional[Iterable[int]] = None):
+        """Append several prices (and their open times) in order"""
+        if open_times is None:
+            for price in prices:
+                self.append(price)
+        else:
+            for price, open_time in zip(prices, open_times):
+                self.append(price, int(open_time))
+
+    def clear(self):
+        """Drop all stored prices"""
+        self._start = 0
+        self._count = 0
+        self._last_time = UNKNOWN_TIME
+
+    def view(self) -> np.ndarray:
+        """
+        Read-only chronological view of the stored prices
+
+        The view shares memory with the buffer and is only guaranteed to be
+        stable until the next append; copy it if it must be kept longer.
+        """
+        view = self._data[self._start:self._start + self._count]
+        view.flags.writeable = False
+        return view
+
+    def times(self) -> np.ndarray:
+        """Read-only view of the open times matching view()"""
+        times = self._times[self._start:self._start + self._count]
+        times.flags.writeable = False
+        return times
+
+    def last_time(self) -> Optional[int]:
+        """Open time of the most recent price, or None if empty or unknown"""
+        return None if self._last_time == UNKNOWN_TIME else self._last_time
+
+    def latest(self) -> Optional[float]:
+        """Most recent price, or None if empty"""
+        if not self._count:
+            return None
+        return float(self._data[self._start + self._count - 1])
+
+
+class PriceStore:
+    """Price history per key, e.g. (symbol, interval), backed by PriceRingBuffer"""
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self._buffers: Dict[Hashable, PriceRingBuffer] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._buffers
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._buffers)
+
+    def append(self, key: Hashable, price: float, open_time: int = UNKNOWN_TIME) -> np.ndarray:
+        """Store a price for key and return the updated history view"""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = PriceRingBuffer(self.capacity)
+        buffer.append(price, open_time)
+        return buffer.view()
+
+    def extend(self, key: Hashable, prices: Iterable[float], open_times: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Store several prices (and their open times) for key in order"""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = PriceRingBuffer(self.capacity)
+        buffer.extend(prices, open_times)
+        return buffer.view()
+
+    def get(self, key: Hashable) -> np.ndarray:
+        """History view for key (empty if unknown)"""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            return np.empty(0, dtype=np.float64)
+        return buffer.view()
+
+    def times(self, key: Hashable) -> np.ndarray:
+        """Open times matching get(key)"""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            return np.empty(0, dtype=np.int64)
+        return buffer.times()
+
+    def latest(self, key: Hashable) -> Optional[float]:
+        buffer = self._buffers.get(key)
+        return buffer.latest() if buffer is not None else None
+
+    def last_open_time(self, key: Hashable) -> Optional[int]:
+        buffer = self._buffers.get(key)
+        return buffer.last_time() if buffer is not None else None
+
+    def discard(self, key: Hashable):
+        """Forget the history for key"""
+        self._buffers.pop(key, None)
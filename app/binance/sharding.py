@@ -0,0 +1,63 @@
+import bisect
+import math
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ConsistentHashRing:
+    """
+    Consistent hash ring mapping stream names to connection shards
+
+    Each shard owns `replicas` virtual points on the ring, so growing from N
+    to N + 1 shards only moves roughly 1/(N + 1) of the streams. assign()
+    caps every shard's load (consistent hashing with bounded loads) to keep
+    the shards balanced.
+    """
+
+    def __init__(self, shards: int, replicas: int = 64):
+        self.shards = shards
+        self.replicas = replicas
+        points: List[Tuple[int, int]] = []
+        for shard in range(shards):
+            for replica in range(replicas):
+                points.append((self._hash(f"shard-{shard}-{replica}"), shard))
+        points.sort()
+        self._points = [point for point, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # crc32 is stable across processes, unlike the builtin hash()
+        return zlib.crc32(key.encode())
+
+    def _walk(self, key: str):
+        """Yield shards in ring order starting from the key's position"""
+        start = bisect.bisect(self._points, self._hash(key))
+        for i in range(len(self._points)):
+            yield self._owners[(start + i) % len(self._points)]
+
+    def shard_for(self, key: str) -> int:
+        return next(self._walk(key))
+
+    def assign(self, keys: Iterable[str], max_per_shard: Optional[int] = None, balance: float = 1.25) -> Dict[int, List[str]]:
+        """
+        Assign keys to shards
+
+        No shard holds more than `balance` times the average load, nor more
+        than `max_per_shard` keys.
+        """
+        keys = sorted(keys)
+        capacity = max(1, math.ceil(len(keys) / self.shards * balance))
+        if max_per_shard is not None:
+            capacity = min(capacity, max_per_shard)
+        assignment: Dict[int, List[str]] = {shard: [] for shard in range(self.shards)}
+
+        for key in keys:
+            for shard in self._walk(key):
+                if len(assignment[shard]) < capacity:
+                    assignment[shard].append(key)
+                    break
+            else:
+                raise ValueError("Not enough shard capacity for all keys")
+
+        return assignment
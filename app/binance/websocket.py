@@ -1,112 +1,640 @@
 import asyncio
 import json
+import math
+import os
+import time
 import websockets
-from typing import Dict, List, Callable, Optional
+from dataclasses import dataclass, field
+from typing import Awaitable, Dict, Iterable, List, Callable, Optional, Set, Tuple
 from datetime import datetime
 import logging
+from dotenv import load_dotenv
+import numpy as np
+
+from app.binance.close_queue import CloseQueue
+from app.binance.decoding import FrameDecoder
+from app.binance.kline_store import KlineStore
+from app.binance.price_store import PriceStore
+from app.binance.sharding import ConsistentHashRing
+from app.utils.backoff import backoff_delay
+from app.utils.constants import INTERVAL_SECONDS
+from app.utils.metrics import registry
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Closed candles wait here between the socket readers and the callback workers
+CLOSE_QUEUE_SIZE = int(os.getenv("CLOSE_QUEUE_SIZE", "10000"))
+CLOSE_QUEUE_POLICY = os.getenv("CLOSE_QUEUE_POLICY", "coalesce")  # or "drop"
+CLOSE_WORKERS = int(os.getenv("CLOSE_WORKERS", "4"))
+
+FRAMES_RECEIVED = registry.counter("rsi_bot_ws_frames_received_total", "Websocket frames received")
+FRAMES_DROPPED = registry.counter(
+    "rsi_bot_ws_frames_dropped_total", "Websocket frames dropped before handling", ["reason"]
+)
+CLOSE_HANDLE_SECONDS = registry.histogram(
+    "rsi_bot_ws_close_handle_seconds", "Frame received to closed-candle handling done (queueing and callbacks included)"
+)
+RECONNECTS = registry.counter("rsi_bot_ws_reconnects_total", "Websocket shard connections lost and reopened")
+ROTATIONS = registry.counter(
+    "rsi_bot_ws_rotations_total", "Connections replaced through a standby (age, stale or latency)", ["reason"]
+)
+DUPLICATE_CLOSES = registry.counter("rsi_bot_ws_duplicate_closes_total", "Closed klines dropped as already stored")
+GAPS_DETECTED = registry.counter("rsi_bot_ws_gaps_total", "Closed klines that arrived after missing bars")
+BACKFILL_SECONDS = registry.histogram("rsi_bot_backfill_seconds", "Time to backfill a batch of pairs")
+CLOSE_QUEUE_OVERFLOW = registry.counter(
+    "rsi_bot_close_queue_overflow_total", "Closes merged or dropped because the close queue was full", ["outcome"]
+)
+CLOSE_QUEUE_DEPTH = registry.gauge("rsi_bot_close_queue_depth", "Closed candles waiting for a worker")
+
+# (symbol, interval), e.g. ("BTCUSDT", "1h")
+StreamKey = Tuple[str, str]
+
+
+@dataclass
+class _Connection:
+    """One websocket of a shard; a shard briefly has two while rotating"""
+    websocket: "websockets.ClientConnection"
+    streams: Set[str]
+    opened_at: float = field(default_factory=time.monotonic)
+    last_frame_at: float = field(default_factory=time.monotonic)
+    first_frame: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
 class BinanceWebSocketClient:
-    BASE_URL = "wss://stream.binance.com:9443/ws"
+    # Combined stream endpoint: frames arrive as {"stream": ..., "data": ...}
+    BASE_URL = "wss://stream.binance.com:9443/stream"
+    MAX_STREAMS_PER_REQUEST = 200
+    # Binance caps a connection at 1024 streams; stay well below to spread message load
+    STREAMS_PER_CONNECTION = 200
+    # Failed connects are retried after up to BASE * 2**n seconds, capped at MAX
+    RECONNECT_BASE_DELAY = 1.0
+    RECONNECT_MAX_DELAY = 60.0
+    # Binance drops connections after 24h; replace them well before
+    MAX_CONNECTION_AGE = 23 * 60 * 60
+    # A connection is degraded after this long without frames, or with this ping round trip
+    STALE_AFTER = 60.0
+    DEGRADED_LATENCY = 5.0
+    HEALTH_CHECK_INTERVAL = 5.0
+    STANDBY_CONFIRM_TIMEOUT = 30.0  # seconds for a standby to deliver its first frame
+    CONTROL_MESSAGE_INTERVAL = 0.25  # Binance allows 5 incoming messages per second
+    BACKFILL_BATCH_WINDOW = 1.0  # seconds to gather pairs into one backfill, e.g. after a reconnect
     
-    def __init__(self):
-        self.connections: Dict[str, websockets.WebSocketServerProtocol] = {}
-        self.price_data: Dict[str, List[float]] = {}
+    def __init__(self, price_history_size: int = 100, streams_per_connection: int = STREAMS_PER_CONNECTION,
+                 include_unclosed: bool = False, kline_store: Optional[KlineStore] = None,
+                 close_workers: int = CLOSE_WORKERS, close_queue_size: int = CLOSE_QUEUE_SIZE,
+                 close_queue_policy: str = CLOSE_QUEUE_POLICY):
+        # Open connections keyed by shard number
+        self.connections: Dict[int, websockets.WebSocketServerProtocol] = {}
+        # Last `price_history_size` closes per (symbol, interval) in a preallocated ring buffer
+        self.price_data = PriceStore(price_history_size)
+        # Optional on-disk history that closed klines are appended to
+        self.kline_store = kline_store
+        # Closed klines waiting to be written to it, so the socket readers never touch the disk
+        self._store_pending: Dict[StreamKey, List[Dict]] = {}
+        self._store_task: Optional[asyncio.Task] = None
+        # Close time of the last closed candle per pair
+        self.close_times: Dict[StreamKey, float] = {}
         self.callbacks: List[Callable] = []
+        # Called with in-progress closes; only fed when include_unclosed is set
+        self.live_callbacks: List[Callable] = []
         self.running = False
+        # Unclosed kline frames are dropped before parsing unless include_unclosed is set
+        self.decoder = FrameDecoder(include_unclosed)
+        # All wanted streams, their shard assignment, and what each open shard is subscribed to
+        self.streams: Set[str] = set()
+        self.streams_per_connection = streams_per_connection
+        self.shard_streams: Dict[int, Set[str]] = {}
+        self._active_streams: Dict[int, Set[str]] = {}
+        self.shard_tasks: Dict[int, asyncio.Task] = {}
+        self._request_id = 0
+        self._stream_pairs: Dict[str, StreamKey] = {}
+        # Gap repair: awaited as backfill_handler(pairs) to reseed their history,
+        # closes arriving meanwhile are held and replayed afterwards
+        self.backfill_handler: Optional[Callable[[List[StreamKey]], Awaitable]] = None
+        self._held: Dict[StreamKey, List[Dict]] = {}
+        self._backfill_pending: Set[StreamKey] = set()
+        self._backfill_task: Optional[asyncio.Task] = None
+        # Callbacks run on a worker pool so the socket readers never wait on them
+        self.close_queue = CloseQueue(close_queue_size, close_queue_policy)
+        self.close_workers = close_workers
+        self._workers: List[asyncio.Task] = []
+        # Called as resync_handler(symbol, interval) before a close that follows
+        # merged or dropped ones, so state built close by close can be rebuilt
+        self.resync_handler: Optional[Callable[[str, str], None]] = None
+        CLOSE_QUEUE_DEPTH.set_function(lambda: len(self.close_queue))
     
     def add_callback(self, callback: Callable):
-        """Add a callback function to be called when price data is received"""
+        """
+        Add a callback function to be called when price data is received
+        
+        Callbacks are awaited as callback(symbol, interval, prices) where
+        prices is a read-only numpy view of that pair's history, oldest first.
+        The view is only stable until the next close for the same pair; copy
+        it to keep it.
+        """
         self.callbacks.append(callback)
     
-    async def start_stream(self, symbols: List[str]):
-        """Start WebSocket streams for given symbols"""
-        if not symbols:
+    def add_live_callback(self, callback: Callable):
+        """
+        Add a callback for in-progress (unclosed) kline updates
+        
+        Callbacks are awaited as callback(symbol, interval, price) with the
+        current close of the open candle. Nothing is stored; the price
+        history only ever holds closed candles. Requires include_unclosed,
+        otherwise these frames are dropped before parsing. They run on the
+        socket reader, so anything slow (sending messages, I/O) belongs in a
+        task of its own.
+        """
+        self.live_callbacks.append(callback)
+    
+    @staticmethod
+    def _stream_name(symbol: str, interval: str) -> str:
+        """Kline stream name for a (symbol, interval) pair"""
+        return f"{symbol.lower()}@kline_{interval}"
+    
+    def _plan_shards(self, streams: Set[str]) -> Dict[int, Set[str]]:
+        """Split streams across as many connections as needed"""
+        shards = max(1, math.ceil(len(streams) / self.streams_per_connection))
+        ring = ConsistentHashRing(shards)
+        return {shard: set(keys) for shard, keys in ring.assign(streams, self.streams_per_connection).items() if keys}
+    
+    def _start_shard(self, shard: int):
+        self.shard_tasks[shard] = asyncio.create_task(self._run_shard(shard))
+    
+    async def start_stream(self, pairs: List[StreamKey]):
+        """
+        Start WebSocket streams for given (symbol, interval) pairs
+        
+        Each distinct pair is one stream. Streams are sharded over several
+        connections, each read by its own task; this returns once every
+        shard has stopped.
+        """
+        if not pairs:
             return
         
         self.running = True
         
-        # Create stream names for kline data (1h intervals)
-        streams = [f"{symbol.lower()}@kline_1h" for symbol in symbols]
-        stream_url = f"{self.BASE_URL}/{'/'.join(streams)}"
+        self._stream_pairs = {self._stream_name(symbol, interval): (symbol, interval) for symbol, interval in pairs}
+        self.streams = set(self._stream_pairs)
+        self.shard_streams = self._plan_shards(self.streams)
+        
+        logger.info(f"Starting WebSocket stream for pairs: {pairs} on {len(self.shard_streams)} connection(s)")
         
-        logger.info(f"Starting WebSocket stream for symbols: {symbols}")
+        for shard in self.shard_streams:
+            self._start_shard(shard)
         
         try:
-            async with websockets.connect(stream_url) as websocket:
-                self.connections['kline'] = websocket
-                
-                async for message in websocket:
-                    if not self.running:
-                        break
-                    
+            # Shards can be added while running, so wait until none are left
+            while self.running and self.shard_tasks:
+                await asyncio.wait(list(self.shard_tasks.values()))
+        finally:
+            self.running = False
+            for task in list(self.shard_tasks.values()):
+                task.cancel()
+    
+    async def _run_shard(self, shard: int):
+        """
+        Keep one shard connected, replacing its connection without a gap
+        
+        Before the connection reaches Binance's 24h limit, or as soon as it
+        looks degraded, a standby connection is opened next to it. Both are
+        read until the standby delivers its first frame, then the old one is
+        closed; closes seen on both are deduplicated by open time. A dropped
+        connection is reopened at once, and failed attempts back off
+        exponentially with jitter.
+        """
+        current: Optional[_Connection] = None
+        failures = 0
+        retry_at = 0.0  # earliest time for the next rotation attempt after a failed one
+        try:
+            while self.running and self.shard_streams.get(shard):
+                if current is None or current.task.done():
+                    if current is not None:
+                        RECONNECTS.inc()
+                        # A connection that never delivered a frame counts as a failed attempt
+                        failures = 0 if current.first_frame.is_set() else failures + 1
+                        current = None
+                    if failures:
+                        delay = backoff_delay(failures, self.RECONNECT_BASE_DELAY, self.RECONNECT_MAX_DELAY)
+                        logger.info(f"Reconnecting shard {shard} in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        if not (self.running and self.shard_streams.get(shard)):
+                            break
                     try:
-                        data = json.loads(message)
-                        await self._handle_kline_data(data)
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Error parsing WebSocket message: {e}")
+                        current = await self._open_connection(shard)
                     except Exception as e:
-                        logger.error(f"Error handling WebSocket data: {e}")
-                        
+                        failures += 1
+                        logger.error(f"WebSocket connect failed (shard {shard}): {e}")
+                        continue
+                    await self._promote(shard, current)
+                    continue
+                
+                reason = self._rotation_reason(current)
+                if reason and time.monotonic() >= retry_at:
+                    replacement = await self._rotate(shard, current, reason)
+                    if replacement is None:
+                        failures += 1
+                        retry_at = time.monotonic() + backoff_delay(
+                            failures, self.RECONNECT_BASE_DELAY, self.RECONNECT_MAX_DELAY)
+                    else:
+                        current, failures = replacement, 0
+                    continue
+                
+                await asyncio.wait([current.task], timeout=self.HEALTH_CHECK_INTERVAL)
+        finally:
+            if current is not None:
+                await self._close_connection(current)
+            self.shard_tasks.pop(shard, None)
+    
+    async def _open_connection(self, shard: int) -> "_Connection":
+        """Connect to the shard's current streams and start reading"""
+        streams = set(self.shard_streams[shard])
+        stream_url = f"{self.BASE_URL}?streams={'/'.join(sorted(streams))}"
+        websocket = await websockets.connect(stream_url)
+        connection = _Connection(websocket, streams)
+        connection.task = asyncio.create_task(self._read_connection(shard, connection))
+        return connection
+    
+    async def _promote(self, shard: int, connection: "_Connection"):
+        """Make connection the shard's primary: control messages and live frames go through it"""
+        self.connections[shard] = connection.websocket
+        self._active_streams[shard] = set(connection.streams)
+        
+        # Apply any subscription changes made while connecting
+        await self._sync_shard(shard)
+        
+        # Closes missed while disconnected never arrive on the stream
+        self._check_missed_closes(shard)
+    
+    def _rotation_reason(self, connection: "_Connection") -> Optional[str]:
+        """Why the connection should be replaced now, or None if it is healthy"""
+        now = time.monotonic()
+        if now - connection.opened_at >= self.MAX_CONNECTION_AGE:
+            return "age"
+        if now - connection.last_frame_at >= self.STALE_AFTER:
+            return "stale"
+        latency = getattr(connection.websocket, 'latency', 0) or 0
+        if latency >= self.DEGRADED_LATENCY:
+            return "latency"
+        return None
+    
+    async def _rotate(self, shard: int, current: "_Connection", reason: str) -> Optional["_Connection"]:
+        """
+        Replace current with a standby connection once the standby is confirmed
+        
+        Returns:
+            The new primary connection, or None if the standby failed (current is kept)
+        """
+        logger.info(f"Opening standby connection for shard {shard} ({reason})")
+        try:
+            standby = await self._open_connection(shard)
+        except Exception as e:
+            logger.error(f"Standby connect failed (shard {shard}): {e}")
+            return None
+        
+        try:
+            await asyncio.wait_for(standby.first_frame.wait(), self.STANDBY_CONFIRM_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Standby for shard {shard} sent nothing in {self.STANDBY_CONFIRM_TIMEOUT}s, keeping the old connection")
+            await self._close_connection(standby)
+            return None
+        
+        ROTATIONS.labels(reason).inc()
+        await self._promote(shard, standby)
+        await self._close_connection(current)
+        logger.info(f"Shard {shard} switched to its standby connection ({reason})")
+        return standby
+    
+    async def _close_connection(self, connection: "_Connection"):
+        try:
+            await connection.websocket.close()
+        except Exception as e:
+            logger.error(f"Error closing WebSocket: {e}")
+        if connection.task is not None:
+            connection.task.cancel()
+            await asyncio.gather(connection.task, return_exceptions=True)
+    
+    async def _read_connection(self, shard: int, connection: "_Connection"):
+        """Read one connection of a shard until it closes"""
+        websocket = connection.websocket
+        try:
+            async for message in websocket:
+                if not self.running:
+                    break
+                
+                received_at = time.perf_counter()
+                connection.last_frame_at = time.monotonic()
+                connection.first_frame.set()
+                FRAMES_RECEIVED.inc()
+                try:
+                    data = self.decoder.decode(message)
+                    if data is None:
+                        FRAMES_DROPPED.labels("unclosed").inc()
+                        continue
+                    if 'data' in data:
+                        if self.connections.get(shard) is not websocket and not data['data'].get('k', {}).get('x', True):
+                            # Both connections carry the same live frames while rotating
+                            FRAMES_DROPPED.labels("standby").inc()
+                            continue
+                        await self._handle_kline_data(data['data'], received_at)
+                    elif 'id' in data:
+                        self._handle_control_response(data)
+                except ValueError as e:  # JSONDecodeError from either backend
+                    FRAMES_DROPPED.labels("decode_error").inc()
+                    logger.error(f"Error parsing WebSocket message: {e}")
+                except Exception as e:
+                    logger.error(f"Error handling WebSocket data: {e}")
+                    
         except websockets.exceptions.ConnectionClosed:
-            logger.warning("WebSocket connection closed")
+            logger.warning(f"WebSocket connection closed (shard {shard})")
         except Exception as e:
-            logger.error(f"WebSocket error: {e}")
+            logger.error(f"WebSocket error (shard {shard}): {e}")
         finally:
-            self.running = False
+            if self.connections.get(shard) is websocket:
+                self.connections.pop(shard, None)
+                self._active_streams.pop(shard, None)
     
-    async def _handle_kline_data(self, data: Dict):
-        """Handle incoming kline data from WebSocket"""
+    async def update_streams(self, pairs: Iterable[StreamKey]):
+        """
+        Subscribe/unsubscribe the open connections to match `pairs`
+        
+        Streams are rebalanced over the shards and only the difference is
+        sent, so existing streams keep flowing. Rebalancing can move a stream
+        to another shard, so every SUBSCRIBE goes out before any UNSUBSCRIBE.
+        Without running streams the new set is used on the next start_stream().
+        """
+        self._stream_pairs = {self._stream_name(symbol, interval): (symbol, interval) for symbol, interval in pairs}
+        self.streams = set(self._stream_pairs)
+        self.shard_streams = self._plan_shards(self.streams) if self.streams else {}
+        
+        if not self.running:
+            return
+        
+        shards = sorted(set(self.shard_streams) | set(self.connections))
+        for shard in shards:
+            if shard not in self.shard_streams:
+                continue
+            if shard not in self.shard_tasks:
+                self._start_shard(shard)
+            else:
+                await self._sync_shard(shard, unsubscribe=False)
+        
+        for shard in shards:
+            if shard not in self.shard_streams:
+                # Shard no longer needed; its connection may have dropped during the awaits above
+                websocket = self.connections.get(shard)
+                if websocket is not None:
+                    await websocket.close()
+            else:
+                await self._sync_shard(shard, subscribe=False)
+    
+    async def _sync_shard(self, shard: int, subscribe: bool = True, unsubscribe: bool = True):
+        """Send the SUBSCRIBE and/or UNSUBSCRIBE difference for one open shard"""
+        if shard not in self.connections:
+            return
+        
+        active = self._active_streams.setdefault(shard, set())
+        wanted = self.shard_streams.get(shard, set())
+        
+        if subscribe:
+            added = sorted(wanted - active)
+            active.update(added)
+            if added:
+                await self._send_control(shard, 'SUBSCRIBE', added)
+        if unsubscribe:
+            removed = sorted(active - wanted)
+            active.difference_update(removed)
+            if removed:
+                await self._send_control(shard, 'UNSUBSCRIBE', removed)
+    
+    async def _send_control(self, shard: int, method: str, streams: List[str]):
+        """Send a SUBSCRIBE/UNSUBSCRIBE request, chunked to Binance's limits"""
+        websocket = self.connections.get(shard)
+        if websocket is None:
+            return  # Dropped meanwhile; the reconnect subscribes the shard's current streams
+        
+        for i in range(0, len(streams), self.MAX_STREAMS_PER_REQUEST):
+            if i:
+                await asyncio.sleep(self.CONTROL_MESSAGE_INTERVAL)
+            
+            self._request_id += 1
+            chunk = streams[i:i + self.MAX_STREAMS_PER_REQUEST]
+            await websocket.send(json.dumps({'method': method, 'params': chunk, 'id': self._request_id}))
+            logger.info(f"{method} sent for {chunk} on shard {shard} (id {self._request_id})")
+    
+    def _handle_control_response(self, data: Dict):
+        """Log the reply to a SUBSCRIBE/UNSUBSCRIBE request"""
+        error = data.get('error') or data.get('msg')
+        if error:
+            logger.error(f"WebSocket request {data.get('id')} failed: {error}")
+    
+    async def _handle_kline_data(self, data: Dict, received_at: Optional[float] = None):
+        """
+        Handle incoming kline data from WebSocket
+        
+        received_at is the perf_counter() time the frame arrived, for latency metrics.
+        """
         try:
             if 'k' not in data:
                 return
             
             kline = data['k']
             symbol = kline['s']
+            interval = kline['i']
             is_closed = kline['x']  # True if kline is closed
             
             if not is_closed:
-                return  # Only process closed klines for RSI calculation
-            
-            close_price = float(kline['c'])
-            
-            # Store price data
-            if symbol not in self.price_data:
-                self.price_data[symbol] = []
+                # Only closed klines go into the history; live listeners see the rest
+                if self.live_callbacks:
+                    price = float(kline['c'])
+                    for callback in self.live_callbacks:
+                        try:
+                            await callback(symbol, interval, price)
+                        except Exception as e:
+                            logger.error(f"Error in live callback: {e}")
+                return
             
-            self.price_data[symbol].append(close_price)
+            key = (symbol, interval)
+            if key in self._held:
+                # Backfill running for this pair; replayed once it is done
+                self._held[key].append(kline)
+                return
             
-            # Keep only last 100 prices for RSI calculation
-            if len(self.price_data[symbol]) > 100:
-                self.price_data[symbol] = self.price_data[symbol][-100:]
+            open_time = int(kline['t'])
+            last = self.price_data.last_open_time(key)
+            if last is not None:
+                if open_time <= last:
+                    DUPLICATE_CLOSES.inc()
+                    return
+                step = INTERVAL_SECONDS.get(interval)
+                if step and open_time > last + step * 1000 and self.backfill_handler is not None:
+                    GAPS_DETECTED.inc()
+                    missing = (open_time - last) // (step * 1000) - 1
+                    logger.warning(f"{symbol} {interval}: {missing} missing bar(s) before {open_time}, backfilling")
+                    self._held[key] = [kline]
+                    self._request_backfill(key)
+                    return
             
-            # Notify callbacks
-            for callback in self.callbacks:
-                try:
-                    await callback(symbol, self.price_data[symbol].copy())
-                except Exception as e:
-                    logger.error(f"Error in callback: {e}")
+            await self._process_close(symbol, interval, kline, received_at)
                     
         except Exception as e:
             logger.error(f"Error handling kline data: {e}")
     
+    async def _process_close(self, symbol: str, interval: str, kline: Dict, received_at: Optional[float] = None):
+        """Store a closed kline and queue it for the callbacks"""
+        close_price = float(kline['c'])
+        key = (symbol, interval)
+        
+        # Store price data (oldest prices fall out of the ring buffer)
+        prices = self.price_data.append(key, close_price, int(kline['t']))
+        
+        # Candle close (epoch seconds), for end-to-end alert latency
+        self.close_times[key] = (kline['T'] + 1) / 1000 if 'T' in kline else time.time()
+        
+        if self.kline_store is not None:
+            self._store_pending.setdefault(key, []).append(kline)
+            if self._store_task is None or self._store_task.done():
+                self._store_task = asyncio.create_task(self._write_klines())
+        
+        if not self._workers:
+            self._start_workers()
+        
+        # The view changes with the next append, so the workers get a copy
+        outcome = self.close_queue.put(key, (prices.copy(), received_at))
+        if outcome != "queued":
+            CLOSE_QUEUE_OVERFLOW.labels(outcome).inc()
+            logger.debug(f"Close queue full, {symbol} {interval} close {outcome}")
+    
+    def _start_workers(self):
+        self._workers = [
+            asyncio.create_task(self.close_queue.work(self._notify_callbacks)) for _ in range(self.close_workers)
+        ]
+    
+    async def stop_workers(self):
+        """Cancel the callback workers; closes still queued are kept for the next start"""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _notify_callbacks(self, key: StreamKey, item: Tuple[np.ndarray, Optional[float]], skipped: bool):
+        """Worker side of a close: run the callbacks in order for one pair"""
+        symbol, interval = key
+        prices, received_at = item
+        
+        if skipped and self.resync_handler is not None:
+            try:
+                self.resync_handler(symbol, interval)
+            except Exception as e:
+                logger.error(f"Error in resync handler: {e}")
+        
+        for callback in self.callbacks:
+            try:
+                await callback(symbol, interval, prices)
+            except Exception as e:
+                logger.error(f"Error in callback: {e}")
+        
+        if received_at is not None:
+            CLOSE_HANDLE_SECONDS.observe(time.perf_counter() - received_at)
+    
+    def _check_missed_closes(self, shard: int):
+        """Backfill the shard's pairs whose latest close is older than the last finished candle"""
+        if self.backfill_handler is None:
+            return
+        
+        now_ms = time.time() * 1000
+        for stream in self.shard_streams.get(shard, ()):
+            key = self._stream_pairs.get(stream)
+            if key is None:
+                continue
+            last = self.price_data.last_open_time(key)
+            step = INTERVAL_SECONDS.get(key[1])
+            if last is not None and step and last + 2 * step * 1000 <= now_ms:
+                self._held.setdefault(key, [])
+                self._request_backfill(key)
+    
+    def _request_backfill(self, key: StreamKey):
+        """Queue a pair for the next batched backfill"""
+        self._backfill_pending.add(key)
+        if self._backfill_task is None or self._backfill_task.done():
+            self._backfill_task = asyncio.create_task(self._run_backfill())
+    
+    async def _run_backfill(self):
+        """Backfill all queued pairs together, then replay the closes held for them"""
+        while self._backfill_pending:
+            # Let other shards and pairs report before fetching
+            await asyncio.sleep(self.BACKFILL_BATCH_WINDOW)
+            pairs = sorted(self._backfill_pending)
+            self._backfill_pending = set()
+            
+            try:
+                with BACKFILL_SECONDS.time():
+                    await self.backfill_handler(pairs)
+            except Exception as e:
+                logger.error(f"Error backfilling {pairs}: {e}")
+            
+            for key in pairs:
+                held = self._held.pop(key, [])
+                for kline in held:
+                    # Duplicates of backfilled bars are dropped; a gap left by a failed
+                    # backfill is accepted rather than retried forever
+                    last = self.price_data.last_open_time(key)
+                    if last is not None and int(kline['t']) <= last:
+                        DUPLICATE_CLOSES.inc()
+                        continue
+                    try:
+                        await self._process_close(*key, kline)
+                    except Exception as e:
+                        logger.error(f"Error replaying close for {key}: {e}")
+    
+    async def _write_klines(self):
+        """Append queued closed klines to the kline store, yielding to the readers between pairs"""
+        while self._store_pending:
+            key = next(iter(self._store_pending))
+            for kline in self._store_pending.pop(key):
+                self._store_kline(*key, kline)
+            await asyncio.sleep(0)
+    
+    def _store_kline(self, symbol: str, interval: str, kline: Dict):
+        """Append a closed kline to the on-disk store"""
+        try:
+            stored = self.kline_store.append_bar(
+                symbol, interval, int(kline['t']), float(kline['o']), float(kline['h']),
+                float(kline['l']), float(kline['c']), float(kline['v']), int(kline['n'])
+            )
+            if not stored:
+                logger.debug(f"Kline store for {symbol} {interval} has a gap, left for the next sync")
+        except (KeyError, OSError) as e:
+            logger.error(f"Error storing kline for {symbol} {interval}: {e}")
+    
     async def stop_stream(self):
         """Stop all WebSocket streams"""
         self.running = False
         
-        for connection in self.connections.values():
-            if not connection.closed:
-                await connection.close()
+        for connection in list(self.connections.values()):
+            await connection.close()
         
+        for task in list(self.shard_tasks.values()):
+            task.cancel()
+        
+        await self.stop_workers()
+        if self._store_task is not None:
+            await self._store_task
         self.connections.clear()
         logger.info("WebSocket streams stopped")
     
-    def get_price_data(self, symbol: str) -> List[float]:
-        """Get stored price data for a symbol"""
-        return self.price_data.get(symbol, [])
+    def seed_prices(self, symbol: str, interval: str, prices: List[float],
+                    open_times: Optional[List[int]] = None) -> np.ndarray:
+        """Replace the stored history for a pair, e.g. with REST klines at startup"""
+        self.price_data.discard((symbol, interval))
+        return self.price_data.extend((symbol, interval), prices, open_times)
+    
+    def get_price_data(self, symbol: str, interval: str = "1h") -> np.ndarray:
+        """Get stored price data for a symbol (read-only view, oldest first)"""
+        return self.price_data.get((symbol, interval))
     
-    def get_latest_price(self, symbol: str) -> Optional[float]:
+    def get_latest_price(self, symbol: str, interval: str = "1h") -> Optional[float]:
         """Get the latest price for a symbol"""
-        prices = self.price_data.get(symbol, [])
-        return prices[-1] if prices else None
+        return self.price_data.latest((symbol, interval))
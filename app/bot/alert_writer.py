@@ -0,0 +1,160 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+import logging
+from sqlalchemy.exc import IntegrityError
+
+from app.db.session import run_db
+from app.db.queries.alert_crud import add_alerts
+from app.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class AlertWriter:
+    """
+    Write-behind queue for Alert rows
+
+    Rows are buffered in memory and written with bulk inserts once
+    `batch_size` rows are waiting or `flush_interval` seconds have passed.
+    A failed flush keeps its rows for the next attempt, so persistence is
+    independent of Telegram sends; rows the database rejects outright
+    (integrity errors) are isolated by splitting the batch and dropped. The
+    backlog is capped at `max_backlog` rows; the oldest waiting ones are
+    dropped beyond that.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 1.0, max_backlog: int = 100_000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self._buffer: List[Dict] = []
+        # Rows taken out of the buffer by the running flush
+        self._inflight: List[Dict] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+
+        # Metrics
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.rows_rejected = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+
+    @property
+    def backlog(self) -> int:
+        return len(self._buffer) + len(self._inflight)
+
+    def enqueue(self, alerts: List[Dict]):
+        """Queue alert rows (Alert column dicts) for writing"""
+        self._buffer.extend(alerts)
+        self._trim()
+
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _trim(self):
+        overflow = self.backlog - self.max_backlog
+        if overflow > 0:
+            # Rows being written are never dropped
+            overflow = min(overflow, len(self._buffer))
+            del self._buffer[:overflow]
+            self.rows_dropped += overflow
+            logger.error(f"Alert backlog full, dropped {overflow} oldest rows")
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher, letting a running flush finish, and write what is left"""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all buffered rows in bulk inserts of up to batch_size"""
+        async with self._flush_lock:
+            while self._buffer:
+                # The batch leaves the buffer while it is written, so enqueue() can trim freely
+                self._inflight = self._buffer[:self.batch_size]
+                self._buffer = self._buffer[self.batch_size:]
+                started = time.perf_counter()
+                try:
+                    await self._write(self._inflight)
+                except Exception as e:
+                    self.failed_flushes += 1
+                    logger.error(f"Error writing {len(self._inflight)} alerts, will retry: {e}")
+                    return
+                finally:
+                    # Whatever is still in flight goes back to the front
+                    self._buffer[:0] = self._inflight
+                    self._inflight = []
+                    self._trim()
+
+                self.last_flush_latency = time.perf_counter() - started
+                self.max_flush_latency = max(self.max_flush_latency, self.last_flush_latency)
+                self.flushes += 1
+
+    async def _write(self, rows: List[Dict]):
+        """
+        Insert rows, removing them from the list as they are written
+
+        A chunk failing with an integrity error is retried in halves until
+        the offending rows are on their own and dropped; chunks grow back
+        after each success. Any other error is raised with the unwritten
+        rows left in the list.
+        """
+        size = len(rows)
+        while rows:
+            chunk = rows[:size]
+            try:
+                await run_db(add_alerts, chunk)
+            except IntegrityError as e:
+                if len(chunk) > 1:
+                    size = len(chunk) // 2
+                    continue
+                self.rows_rejected += 1
+                logger.error(f"Dropping alert row rejected by the database: {e}")
+            else:
+                self.rows_written += len(chunk)
+            del rows[:len(chunk)]
+            size = min(size * 2, self.batch_size)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'backlog': self.backlog,
+            'rows_written': self.rows_written,
+            'rows_dropped': self.rows_dropped,
+            'rows_rejected': self.rows_rejected,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'last_flush_latency': self.last_flush_latency,
+            'max_flush_latency': self.max_flush_latency,
+        }
+
+
+# Global writer used by the monitor
+alert_writer = AlertWriter()
+
+ALERT_BACKLOG = registry.gauge("rsi_bot_alert_writer_backlog", "Alert rows waiting to be written")
+ALERT_ROWS_DROPPED = registry.gauge("rsi_bot_alert_writer_rows_dropped", "Alert rows dropped on backlog overflow since start")
+ALERT_BACKLOG.set_function(lambda: alert_writer.backlog)
+ALERT_ROWS_DROPPED.set_function(lambda: alert_writer.rows_dropped)
@@ -1,20 +1,18 @@
 from telegram import Update
 from telegram.ext import CallbackContext, ContextTypes
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from app.db.session import get_db
+from app.db.session import run_db
 from app.db.queries.user_crud import get_or_create_user
+from app.db.queries.settings_crud import get_thresholds
 
 
-from app.utils.constants import SUPPORTED_SYMBOLS
-from app.db.session import get_db
-from app.db.models.user_symbol import UserSymbol
-from app.db.models.user import User
-from app.db.models.settings import Setting
+from app.utils.constants import SUPPORTED_SYMBOLS, SUPPORTED_INTERVALS
+from app.db.queries.user_symbol_crud import add_user_symbol, get_user_thresholds, set_user_thresholds
+from app.bot.subscriptions import subscriptions
 
 async def start(update: Update, context: CallbackContext):
     tg_user = update.effective_user
-    db = next(get_db())
-    user = get_or_create_user(db, tg_user)
+    user = await run_db(get_or_create_user, tg_user)
     await update.message.reply_text(f"Welcome {tg_user.username}!")
 
 
@@ -35,53 +33,67 @@ async def add_symbol_command(update: Update, context: CallbackContext):
     reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text("Select a symbol to add:", reply_markup=reply_markup)
 
-# 2. Callback to handle one-tap addition
+# 2. Callback to pick the interval, then add the symbol on that interval
 async def add_symbol_callback(update: Update, context: CallbackContext):
     query = update.callback_query
     await query.answer()
 
-    symbol = query.data.split(":")[1]
+    parts = query.data.split(":")
+    symbol = parts[1]
+
+    if len(parts) < 3:
+        keyboard = [[
+            InlineKeyboardButton(interval, callback_data=f"add_symbol:{symbol}:{interval}")
+            for interval in SUPPORTED_INTERVALS
+        ]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await query.edit_message_text(f"Select the RSI timeframe for {symbol}:", reply_markup=reply_markup)
+        return
+
+    interval = parts[2]
+    if interval not in SUPPORTED_INTERVALS:
+        await query.edit_message_text(f"Unsupported timeframe: {interval}")
+        return
 
-    db = next(get_db())
     tg_user_id = query.from_user.id
 
-    user = db.query(User).filter(User.telegram_id == tg_user_id).first()
-    if not user:
+    recipient, thresholds, added = await run_db(add_user_symbol, tg_user_id, symbol, interval)
+    if not recipient:
         await query.edit_message_text("User not found. Start with /start first.")
         return
 
-    # Check if symbol already added
-    if any(s.symbol == symbol for s in user.symbols):
-        await query.edit_message_text(f"{symbol} is already added.")
+    if not added:
+        await query.edit_message_text(f"{symbol} ({interval}) is already added.")
         return
 
-    new_symbol = UserSymbol(user_id=user.id, symbol=symbol)
-    db.add(new_symbol)
-    db.commit()
+    subscriptions.add(symbol, interval, *recipient, *thresholds)
+
+    # Subscribe the live stream right away instead of on the next reconnect
+    from app.bot.monitor import monitor
+    await monitor.add_symbol(symbol, interval)
+
+    await query.edit_message_text(f"✅ {symbol} ({interval}) added successfully!")
 
-    await query.edit_message_text(f"✅ {symbol} added successfully!")
+
+async def _user_thresholds(telegram_id: int):
+    """The user's own thresholds, or the defaults if they have no subscriptions yet"""
+    thresholds = await run_db(get_user_thresholds, telegram_id)
+    return thresholds or await run_db(get_thresholds)
 
 
 async def settings_command(update: Update, context: CallbackContext):
     """Show current RSI settings and options to change them"""
-    db = next(get_db())
-    try:
-        setting = db.query(Setting).first()
-        oversold_threshold = setting.rsi_oversold_threshold if setting else 30
-        overbought_threshold = setting.rsi_overbought_threshold if setting else 70
-        
-        keyboard = [
-            [InlineKeyboardButton("Set Oversold Threshold", callback_data="set_oversold_threshold")],
-            [InlineKeyboardButton("Set Overbought Threshold", callback_data="set_overbought_threshold")],
-            [InlineKeyboardButton("View Current Settings", callback_data="view_settings")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        message = f"🔧 RSI Settings\n\nOversold Threshold: {oversold_threshold}\nOverbought Threshold: {overbought_threshold}\n\nSelect an option:"
-        await update.message.reply_text(message, reply_markup=reply_markup)
-        
-    finally:
-        db.close()
+    oversold_threshold, overbought_threshold = await _user_thresholds(update.effective_user.id)
+    
+    keyboard = [
+        [InlineKeyboardButton("Set Oversold Threshold", callback_data="set_oversold_threshold")],
+        [InlineKeyboardButton("Set Overbought Threshold", callback_data="set_overbought_threshold")],
+        [InlineKeyboardButton("View Current Settings", callback_data="view_settings")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    
+    message = f"🔧 RSI Settings\n\nOversold Threshold: {oversold_threshold}\nOverbought Threshold: {overbought_threshold}\n\nSelect an option:"
+    await update.message.reply_text(message, reply_markup=reply_markup)
 
 
 async def settings_callback(update: Update, context: CallbackContext):
@@ -107,17 +119,10 @@ async def settings_callback(update: Update, context: CallbackContext):
 
 async def view_settings(query):
     """Show current settings"""
-    db = next(get_db())
-    try:
-        setting = db.query(Setting).first()
-        oversold_threshold = setting.rsi_oversold_threshold if setting else 30
-        overbought_threshold = setting.rsi_overbought_threshold if setting else 70
-        
-        message = f"📊 Current RSI Settings\n\nOversold Threshold: {oversold_threshold}\nOverbought Threshold: {overbought_threshold}\n\n• Oversold: Alerts when RSI drops below {oversold_threshold} (potential buying opportunity)\n• Overbought: Alerts when RSI rises above {overbought_threshold} (potential selling opportunity)"
-        await query.edit_message_text(message)
-        
-    finally:
-        db.close()
+    oversold_threshold, overbought_threshold = await _user_thresholds(query.from_user.id)
+    
+    message = f"📊 Current RSI Settings\n\nOversold Threshold: {oversold_threshold}\nOverbought Threshold: {overbought_threshold}\n\n• Oversold: Alerts when RSI drops below {oversold_threshold} (potential buying opportunity)\n• Overbought: Alerts when RSI rises above {overbought_threshold} (potential selling opportunity)"
+    await query.edit_message_text(message)
 
 
 async def show_oversold_threshold_options(query):
@@ -154,47 +159,31 @@ async def show_overbought_threshold_options(query):
 
 async def set_oversold_threshold(query, threshold: int):
     """Set the oversold RSI threshold"""
-    db = next(get_db())
     try:
-        setting = db.query(Setting).first()
-        
-        if not setting:
-            setting = Setting(rsi_oversold_threshold=threshold, rsi_overbought_threshold=70)
-            db.add(setting)
-        else:
-            setting.rsi_oversold_threshold = threshold
-        
-        db.commit()
+        user_id, updated = await run_db(set_user_thresholds, query.from_user.id, oversold=threshold)
+        if not updated:
+            await query.edit_message_text("Add a symbol with /addsymbol first, thresholds are set per subscription.")
+            return
+        subscriptions.set_user_thresholds(user_id, oversold=threshold)
         
         message = f"✅ Oversold threshold updated to {threshold}\n\nAlerts will now trigger when RSI drops below {threshold} (potential buying opportunity)."
         await query.edit_message_text(message)
         
     except Exception as e:
         await query.edit_message_text(f"❌ Error updating oversold threshold: {str(e)}")
-        db.rollback()
-    finally:
-        db.close()
 
 
 async def set_overbought_threshold(query, threshold: int):
     """Set the overbought RSI threshold"""
-    db = next(get_db())
     try:
-        setting = db.query(Setting).first()
-        
-        if not setting:
-            setting = Setting(rsi_oversold_threshold=30, rsi_overbought_threshold=threshold)
-            db.add(setting)
-        else:
-            setting.rsi_overbought_threshold = threshold
-        
-        db.commit()
+        user_id, updated = await run_db(set_user_thresholds, query.from_user.id, overbought=threshold)
+        if not updated:
+            await query.edit_message_text("Add a symbol with /addsymbol first, thresholds are set per subscription.")
+            return
+        subscriptions.set_user_thresholds(user_id, overbought=threshold)
         
         message = f"✅ Overbought threshold updated to {threshold}\n\nAlerts will now trigger when RSI rises above {threshold} (potential selling opportunity)."
         await query.edit_message_text(message)
         
     except Exception as e:
         await query.edit_message_text(f"❌ Error updating overbought threshold: {str(e)}")
-        db.rollback()
-    finally:
-        db.close()
@@ -1,175 +1,589 @@
 import asyncio
+import os
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Set
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Set, Tuple
+from telegram.error import RetryAfter
+import numpy as np
 import logging
 
-from app.binance.websocket import BinanceWebSocketClient
-from app.indicators.rsi import calculate_rsi, get_rsi_signal
-from app.db.session import get_db
-from app.db.models.user_symbol import UserSymbol
-from app.db.models.alert import Alert
-from app.db.models.settings import Setting
+from app.binance.async_client import AsyncBinanceClient
+from app.binance.kline_store import kline_store
+from app.binance.websocket import BinanceWebSocketClient, StreamKey
+from app.indicators.executor import indicator_executor
+from app.indicators.pipeline import IndicatorPipeline, IndicatorSet, Values
+from app.indicators.rsi import StreamingRSI, get_rsi_signal
+from app.indicators.rules import AlertRule, parse_rules
+from app.db.session import run_db
 from app.bot import app
+from app.bot.rate_limit import TelegramRateLimiter
+from app.bot.subscriptions import SubscriptionIndex, subscriptions
+from app.bot.alert_writer import alert_writer
+from app.utils.backoff import backoff_delay
+from app.utils.constants import INTERVAL_SECONDS
+from app.utils.metrics import registry
 
 logger = logging.getLogger(__name__)
 
+RSI_COMPUTE_SECONDS = registry.histogram("rsi_bot_rsi_compute_seconds", "RSI update time per batch of candle closes")
+ALERT_LATENCY_SECONDS = registry.histogram(
+    "rsi_bot_alert_latency_seconds", "Candle close to send_message completed, per confirmed alert"
+)
+TELEGRAM_SEND_SECONDS = registry.histogram("rsi_bot_telegram_send_seconds", "send_message call time")
+ALERTS_SENT = registry.counter("rsi_bot_alerts_sent_total", "Alert messages sent", ["alert_type", "provisional"])
+ALERT_SEND_ERRORS = registry.counter("rsi_bot_alert_send_errors_total", "Alert messages that failed to send")
+PENDING_CLOSES = registry.gauge("rsi_bot_pending_closes", "Candle closes waiting for the next batch evaluation")
+SUBSCRIBED_PAIRS = registry.gauge("rsi_bot_subscribed_pairs", "Streamed (symbol, interval) pairs")
+WS_CONNECTIONS = registry.gauge("rsi_bot_ws_connections", "Open websocket connections")
+REST_INFLIGHT = registry.gauge("rsi_bot_rest_inflight_requests", "Distinct Binance REST requests in flight")
+
+# Opt-in early warnings from in-progress candles
+RSI_LIVE_MODE = os.getenv("RSI_LIVE_MODE", "").lower() in ("1", "true", "yes")
+RSI_LIVE_MIN_INTERVAL = float(os.getenv("RSI_LIVE_MIN_INTERVAL", "60"))
+
+# Extra alerts on any indicator output, e.g. "macd_cross_up: macd > macd_signal; stoch_oversold: stoch_rsi_k < 20"
+ALERT_RULES = os.getenv("ALERT_RULES", "")
+
 class RSIMonitor:
-    def __init__(self):
-        self.ws_client = BinanceWebSocketClient()
+    def __init__(self, live_mode: bool = RSI_LIVE_MODE, live_min_interval: float = RSI_LIVE_MIN_INTERVAL,
+                 alert_rules: str = ALERT_RULES):
+        self.ws_client = BinanceWebSocketClient(include_unclosed=live_mode, kline_store=kline_store)
+        self.rest_client = AsyncBinanceClient(max_connections=10)
         self.running = False
-        self.subscribed_symbols: Set[str] = set()
+        # Distinct (symbol, interval) pairs users are subscribed to
+        self.subscribed_pairs: Set[StreamKey] = set()
         self.last_alert_time: Dict[str, datetime] = {}
+        self.rate_limiter = TelegramRateLimiter()
+        self.rsi_period = 14
+        # Streaming RSI state per (symbol, interval, period), shared by all users of a pair
+        self.rsi_state: Dict[Tuple[str, str, int], StreamingRSI] = {}
+        # Indicators the rules need, updated together per pair; the RSI node wraps rsi_state
+        self.alert_rules: List[AlertRule] = parse_rules(alert_rules)
+        rule_outputs = [output for rule in self.alert_rules for output in rule.outputs]
+        self.pipeline = IndicatorPipeline(['rsi', *rule_outputs], self.rsi_period)
+        self.indicators: Dict[StreamKey, IndicatorSet] = {}
+        # Bumped whenever a pair's state is replaced or dropped, so a seeding that
+        # raced with another one can tell its history is no longer the newest
+        self._state_generation: Dict[StreamKey, int] = {}
+        # Pairs being reseeded by warm_up(); their pending closes are part of its history
+        self._warming: Set[StreamKey] = set()
+        # Last outcome per (pair, rule name); rules fire when it turns True
+        self._rule_state: Dict[Tuple[StreamKey, str], Optional[bool]] = {}
+        # Candle closes waiting to be evaluated together
+        self.batch_window = 0.5  # seconds
+        self.pending_closes: Dict[StreamKey, List[np.ndarray]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # Past this many pending closes the close workers wait for the next batch to be
+        # taken, so a slow evaluation backs up into the websocket close queue
+        self.max_pending_closes = 5000
+        self._pending_count = 0
+        self._batch_taken = asyncio.Event()
+        # Periodic resync for subscriptions changed outside the bot
+        self.symbol_refresh_interval = 60  # seconds
+        # Monitoring loop errors are retried with exponential backoff and jitter
+        self.retry_base_delay = 1.0  # seconds
+        self.retry_max_delay = 60.0
+        self._symbols_changed = asyncio.Event()
+        # Live mode: provisional RSI from the open candle, at most once per live_min_interval per pair
+        self.live_mode = live_mode
+        self.live_min_interval = live_min_interval
+        self._last_live_eval: Dict[StreamKey, float] = {}
+        # Provisional alerts being sent per pair; the socket reader never waits on Telegram
+        self._live_alert_tasks: Dict[StreamKey, asyncio.Task] = {}
+        
+        PENDING_CLOSES.set_function(lambda: self._pending_count)
+        SUBSCRIBED_PAIRS.set_function(lambda: len(self.subscribed_pairs))
+        WS_CONNECTIONS.set_function(lambda: len(self.ws_client.connections))
+        REST_INFLIGHT.set_function(lambda: len(self.rest_client._inflight))
         
         # Add callback for price updates
         self.ws_client.add_callback(self._on_price_update)
+        # Repair history and RSI when the stream skipped bars
+        self.ws_client.backfill_handler = self._backfill
+        # Rebuild RSI when the close queue overflowed and a pair skipped closes
+        self.ws_client.resync_handler = self._reset_rsi_state
+        if live_mode:
+            self.ws_client.add_live_callback(self._on_live_price)
     
     async def start_monitoring(self):
         """Start the RSI monitoring with WebSocket"""
         self.running = True
         logger.info("RSI Monitor started with WebSocket")
+        refresh_task = asyncio.create_task(self._refresh_symbols_loop())
+        indicator_executor.start()
+        await alert_writer.start()
         
+        failures = 0
+        try:
+            while self.running:
+                try:
+                    # Get current subscribed pairs
+                    await self.update_subscribed_symbols()
+                    
+                    if self.subscribed_pairs:
+                        # Seed history for pairs we have no prices for yet
+                        cold = [p for p in self.subscribed_pairs if p not in self.ws_client.price_data]
+                        if cold:
+                            await self.warm_up(cold)
+                        
+                        # Start WebSocket stream for all pairs
+                        await self.ws_client.start_stream(list(self.subscribed_pairs))
+                        failures = 0
+                    else:
+                        # No symbols to monitor, wait until one is added (or retry)
+                        self._symbols_changed.clear()
+                        try:
+                            await asyncio.wait_for(self._symbols_changed.wait(), timeout=30)
+                        except asyncio.TimeoutError:
+                            pass
+                        
+                except Exception as e:
+                    failures += 1
+                    delay = backoff_delay(failures, self.retry_base_delay, self.retry_max_delay)
+                    logger.error(f"Error in monitoring loop: {e}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        finally:
+            refresh_task.cancel()
+    
+    async def _refresh_symbols_loop(self):
+        """Periodically pick up subscription changes made outside the bot"""
         while self.running:
+            await asyncio.sleep(self.symbol_refresh_interval)
             try:
-                # Get current subscribed symbols
                 await self.update_subscribed_symbols()
-                
-                if self.subscribed_symbols:
-                    # Start WebSocket stream for all symbols
-                    await self.ws_client.start_stream(list(self.subscribed_symbols))
-                else:
-                    # No symbols to monitor, wait and retry
-                    await asyncio.sleep(30)
-                    
             except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(30)  # Wait 30 seconds before retrying
+                logger.error(f"Error refreshing subscribed symbols: {e}")
+    
+    async def add_symbol(self, symbol: str, interval: str):
+        """Start monitoring a pair immediately (called when a user subscribes)"""
+        if (symbol, interval) in self.subscribed_pairs:
+            return
+        
+        await self._apply_pairs(self.subscribed_pairs | {(symbol, interval)})
+    
+    async def _apply_pairs(self, pairs: Set[StreamKey]):
+        """Push a new (symbol, interval) set to the open stream without reconnecting"""
+        added = [p for p in pairs if p not in self.ws_client.price_data]
+        self.subscribed_pairs = pairs
+        logger.info(f"Updated subscribed pairs: {sorted(pairs)}")
+        
+        # Seed history first so the first live close already has a valid RSI. Once the
+        # stream runs (connected or not) the main loop no longer warms pairs, so do it here
+        if added and self.ws_client.running:
+            await self.warm_up(added)
+        
+        await self.ws_client.update_streams(pairs)
+        self._symbols_changed.set()
     
     async def stop_monitoring(self):
         """Stop the RSI monitoring loop"""
         self.running = False
         await self.ws_client.stop_stream()
+        live_alerts, self._live_alert_tasks = list(self._live_alert_tasks.values()), {}
+        for task in live_alerts:
+            task.cancel()
+        await asyncio.gather(*live_alerts, return_exceptions=True)
+        await self.rest_client.close()
+        await alert_writer.stop()
+        indicator_executor.shutdown()
         logger.info("RSI Monitor stopped")
     
+    async def warm_up(self, pairs: List[StreamKey]):
+        """Seed price history and RSI state from the kline store, syncing it from REST first"""
+        started = time.perf_counter()
+        
+        capacity = self.ws_client.price_data.capacity
+        now_ms = int(time.time() * 1000)
+        # Pairs with nothing stored start one window back
+        start_time = {
+            interval: now_ms - (capacity + 1) * INTERVAL_SECONDS.get(interval, 3600) * 1000
+            for _, interval in pairs
+        }
+        await kline_store.sync_many(self.rest_client, pairs, start_time, now_ms)
+        
+        seeded = {}
+        for symbol, interval in pairs:
+            # Only seed if the store reaches the last closed candle; a failed sync leaves it stale
+            last = kline_store.last_open_time(symbol, interval)
+            interval_ms = INTERVAL_SECONDS.get(interval, 3600) * 1000
+            if last is None or last + 2 * interval_ms <= now_ms:
+                continue
+            closes = kline_store.tail(symbol, interval, capacity)
+            open_times = kline_store.tail(symbol, interval, capacity, 'open_time')
+            seeded[(symbol, interval)] = [self.ws_client.seed_prices(symbol, interval, closes, open_times)]
+            self._reset_rsi_state(symbol, interval)
+        
+        # Seed all RSI states together in one vectorized pass
+        if seeded:
+            self._warming.update(seeded)
+            try:
+                await self._update_rsi_batch(seeded, reseed=True)
+            finally:
+                self._warming.difference_update(seeded)
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"Warm-up seeded {len(seeded)}/{len(pairs)} pairs in {elapsed:.2f}s")
+    
+    async def _backfill(self, pairs: List[StreamKey]):
+        """
+        Fill bars the stream missed (reconnect, dropped frames) for many pairs at once
+        
+        The kline store fetches only what it lacks, then history and RSI are
+        reseeded from it exactly as at startup. Closes that arrived meanwhile
+        are replayed by the websocket client afterwards, so no alert is
+        evaluated on a history with holes.
+        """
+        logger.info(f"Backfilling {len(pairs)} pair(s) after missed closes: {pairs}")
+        await self.warm_up(pairs)
+    
     async def update_subscribed_symbols(self):
-        """Update the list of subscribed symbols from database"""
-        db = next(get_db())
-        try:
-            user_symbols = db.query(UserSymbol).all()
-            symbols = set(us.symbol for us in user_symbols)
+        """Reconcile the subscription index with the database and apply symbol changes"""
+        # Only the query runs on the DB thread; the index is swapped in here on the loop
+        subscriptions.apply(await run_db(SubscriptionIndex.load))
+        
+        pairs = subscriptions.pairs()
+        if pairs != self.subscribed_pairs:
+            await self._apply_pairs(pairs)
+    
+    async def _update_rsi_batch(self, pending: Dict[StreamKey, List[np.ndarray]], reseed: bool = False,
+                                close_values: Optional[Dict[StreamKey, List[Values]]] = None) -> Dict[StreamKey, float]:
+        """
+        Advance the streaming RSI and the other active indicators for every pair in a batch of candle closes
+        
+        Pairs without state yet are seeded together with one vectorized
+        Wilder pass (on the indicator process pool when it is enabled and
+        the batch is large); indicators built on RSI replay its series from
+        one vectorized calculate_rsi_series() pass. The rest are O(1)
+        updates with their newest closes, each node stepped once per close.
+        
+        Seeding awaits the executor, so a warm-up (reseed=True) can race with
+        a batch of closes. The warm-up's history is the newer one: closes
+        of pairs it is reseeding are skipped, and a seed whose pair was
+        reseeded or reset meanwhile is dropped instead of installed.
+        
+        With `close_values`, a copy of each pair's indicator values is appended to
+        it after every close (once for a freshly seeded pair), in order.
+        """
+        if not reseed:
+            pending = {pair: closes for pair, closes in pending.items() if pair not in self._warming}
+        cold = [
+            pair for pair in pending
+            if pair not in self.indicators or (*pair, self.rsi_period) not in self.rsi_state
+        ]
+        # Taken before any await: a reset or warm-up may replace a pair's entry meanwhile
+        batch_indicators = {pair: self.indicators[pair] for pair in pending if pair not in cold}
+        generations = {pair: self._state_generation.get(pair, 0) for pair in cold}
+        
+        if cold:
+            histories = [pending[pair][-1] for pair in cold]
+            lengths = np.array([len(history) for history in histories])
+            matrix = np.full((len(cold), int(lengths.max())), np.nan)
+            for row, history in enumerate(histories):
+                matrix[row, :len(history)] = history
+            
+            avg_gains, avg_losses = await indicator_executor.wilder_averages_batch(
+                matrix, lengths, self.rsi_period, [symbol for symbol, _ in cold]
+            )
+            # Only needed when some indicator besides RSI has to replay the history
+            rsi_series = None
+            if len(self.pipeline) > 1:
+                rsi_series = await indicator_executor.rsi_series(
+                    matrix, self.rsi_period, [symbol for symbol, _ in cold]
+                )
             
-            if symbols != self.subscribed_symbols:
-                self.subscribed_symbols = symbols
-                logger.info(f"Updated subscribed symbols: {list(symbols)}")
+            for row, pair in enumerate(cold):
+                if not reseed and self._state_generation.get(pair, 0) != generations[pair]:
+                    # Reseeded or reset while this history was being seeded; it is stale
+                    continue
+                if np.isnan(avg_gains[row]):
+                    # Not enough history yet, keep accumulating one close at a time
+                    state = StreamingRSI(self.rsi_period)
+                    state.seed(histories[row])
+                else:
+                    state = StreamingRSI.from_averages(
+                        self.rsi_period, avg_gains[row], avg_losses[row],
+                        histories[row][-1], lengths[row] - 1
+                    )
+                self.rsi_state[(*pair, self.rsi_period)] = state
+                self._state_generation[pair] = self._state_generation.get(pair, 0) + 1
                 
-        finally:
-            db.close()
+                indicators = self.indicators[pair] = batch_indicators[pair] = self.pipeline.create(state)
+                if rsi_series is not None:
+                    indicators.seed(histories[row], {'rsi': rsi_series[row, :lengths[row]]})
+                else:
+                    indicators.values.update(close=float(histories[row][-1]), rsi=state.value)
+        
+        rsi_values = {}
+        for pair, snapshots in pending.items():
+            indicators = batch_indicators.get(pair)
+            if indicators is None:
+                continue
+            if pair not in cold:
+                for prices in snapshots:
+                    values = indicators.update(prices[-1])
+                    if close_values is not None:
+                        close_values.setdefault(pair, []).append(dict(values))
+            elif close_values is not None:
+                close_values.setdefault(pair, []).append(dict(indicators.values))
+            rsi = indicators.values.get('rsi')
+            if rsi is not None:  # Need period + 1 closes for RSI
+                rsi_values[pair] = rsi
+        
+        return rsi_values
     
-    async def _on_price_update(self, symbol: str, prices: List[float]):
+    async def _on_price_update(self, symbol: str, interval: str, prices: np.ndarray):
         """Callback for when new price data is received via WebSocket"""
+        if not len(prices):
+            return
+        
+        while self._pending_count >= self.max_pending_closes:
+            self._batch_taken.clear()
+            await self._batch_taken.wait()
+        
+        # Candles close together, so gather the burst and evaluate it at once
+        self.pending_closes.setdefault((symbol, interval), []).append(prices)
+        self._pending_count += 1
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending_closes())
+    
+    def _reset_rsi_state(self, symbol: str, interval: str):
+        """Drop a pair's streaming RSI and indicators; the next close reseeds them from the full history it carries"""
+        self.rsi_state.pop((symbol, interval, self.rsi_period), None)
+        self.indicators.pop((symbol, interval), None)
+        self._state_generation[(symbol, interval)] = self._state_generation.get((symbol, interval), 0) + 1
+    
+    async def _on_live_price(self, symbol: str, interval: str, price: float):
+        """Callback for in-progress closes: provisional RSI against the committed state"""
+        pair = (symbol, interval)
+        now = time.monotonic()
+        last = self._last_live_eval.get(pair)
+        if last is not None and now - last < self.live_min_interval:
+            return
+        
+        # A just-closed candle is still queued or waiting in the batch; its state is not committed yet
+        if pair in self.pending_closes or pair in self.ws_client.close_queue:
+            return
+        
+        # The previous provisional alerts are still going out; skip rather than pile up
+        sending = self._live_alert_tasks.get(pair)
+        if sending is not None and not sending.done():
+            return
+        
+        state = self.rsi_state.get((symbol, interval, self.rsi_period))
+        if state is None:
+            return
+        
+        self._last_live_eval[pair] = now
+        rsi = state.peek(price)
+        if rsi is None:
+            return
+        
+        self._live_alert_tasks[pair] = asyncio.create_task(self._send_live_alerts(symbol, interval, rsi))
+    
+    async def _send_live_alerts(self, symbol: str, interval: str, rsi: float):
         try:
-            if len(prices) < 15:  # Need at least 15 data points for RSI
-                return
-            
-            # Calculate RSI
-            rsi_values = calculate_rsi(prices, period=14)
+            await self.create_alert(symbol, interval, rsi, 'oversold', provisional=True)
+            await self.create_alert(symbol, interval, rsi, 'overbought', provisional=True)
+        except Exception as e:
+            logger.error(f"Error sending live alerts for {symbol} {interval}: {e}")
+    
+    async def _flush_pending_closes(self):
+        """
+        Evaluate the candle closes gathered during the batch window
+        
+        Closes that arrive while a batch is being evaluated start the next
+        window, so the task keeps going until nothing is pending.
+        """
+        while True:
+            await asyncio.sleep(self.batch_window)
             
-            if not rsi_values:
+            pending = self.pending_closes
+            if not pending:
                 return
-            
-            current_rsi = rsi_values[-1]
-            logger.info(f"{symbol}: RSI = {current_rsi:.2f}")
-            
-            # Get RSI thresholds from settings
-            db = next(get_db())
+            self.pending_closes = {}
+            self._pending_count = 0
+            self._batch_taken.set()
+            await self._evaluate_closes(pending)
+    
+    async def _evaluate_closes(self, pending: Dict[StreamKey, List[np.ndarray]]):
+        """Advance indicators for one batch of closes and send the alerts they trigger"""
+        try:
+            with RSI_COMPUTE_SECONDS.time():
+                # Rules compare every close of the batch against the one before it
+                close_values = {} if self.alert_rules else None
+                rsi_values = await self._update_rsi_batch(pending, close_values=close_values)
+        except Exception as e:
+            logger.error(f"Error calculating RSI for {list(pending)}: {e}")
+            return
+        
+        if not rsi_values:
+            return
+        
+        for (symbol, interval), current_rsi in rsi_values.items():
             try:
-                setting = db.query(Setting).first()
-                oversold_threshold = setting.rsi_oversold_threshold if setting else 30
-                overbought_threshold = setting.rsi_overbought_threshold if setting else 70
-                
-                # Check for oversold condition (potential buying opportunity)
-                if current_rsi < oversold_threshold:
-                    await self.create_alert(db, symbol, current_rsi, 'oversold')
+                logger.info(f"{symbol} {interval}: RSI = {current_rsi:.2f}")
                 
-                # Check for overbought condition (potential selling opportunity)
-                elif current_rsi > overbought_threshold:
-                    await self.create_alert(db, symbol, current_rsi, 'overbought')
-                    
-            finally:
-                db.close()
+                # Thresholds are per user; the index returns only the users whose level was crossed
+                await self.create_alert(symbol, interval, current_rsi, 'oversold')
+                await self.create_alert(symbol, interval, current_rsi, 'overbought')
                 
-        except Exception as e:
-            logger.error(f"Error processing price update for {symbol}: {e}")
+                if self.alert_rules:
+                    await self._evaluate_rules(symbol, interval, close_values.get((symbol, interval), []))
+            
+            except Exception as e:
+                logger.error(f"Error processing price update for {symbol}: {e}")
+    
+    async def _evaluate_rules(self, symbol: str, interval: str, snapshots: List[Values]):
+        """Fire the alert rules that started to hold, for each close's indicator values in order"""
+        for values in snapshots:
+            for rule in self.alert_rules:
+                key = ((symbol, interval), rule.name)
+                holds = rule.evaluate(values)
+                previous = self._rule_state.get(key)
+                self._rule_state[key] = holds
+                # Only a transition counts, so a condition that persists alerts once
+                if holds and previous is False:
+                    await self.create_rule_alert(symbol, interval, rule, values)
     
-    async def create_alert(self, db: Session, symbol: str, rsi_value: float, alert_type: str):
-        """Create an alert for oversold or overbought condition"""
+    async def create_rule_alert(self, symbol: str, interval: str, rule: AlertRule,
+                                values: Dict[str, Optional[float]]):
+        """Send a rule alert to every subscriber of the pair"""
         try:
-            # Check if we already alerted recently for this symbol and type
-            alert_key = f"{symbol}_{alert_type}"
-            last_alert = self.last_alert_time.get(alert_key)
-            if last_alert and datetime.utcnow() - last_alert < timedelta(hours=1):
-                return  # Skip if we already alerted recently
-            
-            # Get all users who have this symbol
-            user_symbols = db.query(UserSymbol).filter(UserSymbol.symbol == symbol).all()
-            
-            if not user_symbols:
+            recipients = subscriptions.recipients(symbol, interval)
+            if not recipients:
                 return
             
-            for user_symbol in user_symbols:
-                # Create new alert
-                alert = Alert(
-                    user_id=user_symbol.user_id,
-                    symbol=symbol,
-                    rsi_value=rsi_value,
-                    alert_type=alert_type
-                )
-                db.add(alert)
-                
-                # Send notification to user
-                await self.send_alert_notification(user_symbol.user_id, symbol, rsi_value, alert_type)
+            rsi_value = values.get('rsi')
+            if rsi_value is not None:
+                alert_writer.enqueue([
+                    {'user_id': user_id, 'symbol': symbol, 'rsi_value': rsi_value, 'alert_type': rule.name}
+                    for user_id, _ in recipients
+                ])
+            
+            message = self._format_rule_message(symbol, interval, rule, values)
+            closed_at = self.ws_client.close_times.get((symbol, interval))
+            await asyncio.gather(*(
+                self.send_alert_notification(telegram_id, symbol, message, rule.name, closed_at)
+                for _, telegram_id in recipients
+            ))
+            ALERTS_SENT.labels(rule.name, "false").inc(len(recipients))
             
-            db.commit()
-            self.last_alert_time[alert_key] = datetime.utcnow()
-            logger.info(f"Created {alert_type} alerts for {symbol} with RSI {rsi_value:.2f}")
+            logger.info(f"Created {len(recipients)} {rule.name} alerts for {symbol} {interval}")
             
         except Exception as e:
-            logger.error(f"Error creating alert for {symbol}: {e}")
-            db.rollback()
+            logger.error(f"Error creating {rule.name} alert for {symbol}: {e}")
     
-    async def send_alert_notification(self, user_id: int, symbol: str, rsi_value: float, alert_type: str):
-        """Send alert notification to user via Telegram"""
+    @staticmethod
+    def _format_rule_message(symbol: str, interval: str, rule: AlertRule,
+                             values: Dict[str, Optional[float]]) -> str:
+        readings = "\n".join(f"{name} = {values[name]:.2f}" for name in dict.fromkeys(rule.outputs))
+        return f"🔔 {rule.name}\n\n{symbol} ({interval}):\n{readings}"
+    
+    async def create_alert(self, symbol: str, interval: str, rsi_value: float, alert_type: str,
+                           provisional: bool = False):
+        """
+        Create an alert for oversold or overbought condition
+        
+        Provisional alerts come from an unclosed candle. They have their own
+        cooldown, so they don't hold back the alert at the close, and are
+        not persisted since the candle may still close elsewhere.
+        """
         try:
-            # Get user's telegram_id from user_id
-            from app.db.models.user import User
-            db = next(get_db())
-            user = db.query(User).filter(User.id == user_id).first()
+            # Users of this pair whose own threshold was crossed
+            if alert_type == 'oversold':
+                crossed = subscriptions.oversold_recipients(symbol, interval, rsi_value)
+            else:
+                crossed = subscriptions.overbought_recipients(symbol, interval, rsi_value)
             
-            if not user:
+            if not crossed:
                 return
             
-            if alert_type == 'oversold':
-                emoji = "📉"
-                action = "potential buying opportunity"
-                condition = "oversold"
-            else:  # overbought
-                emoji = "📈"
-                action = "potential selling opportunity"
-                condition = "overbought"
-            
-            message = f"{emoji} RSI Alert!\n\n{symbol}: RSI = {rsi_value:.2f}\n\nThis indicates an {condition} condition - {action}!"
-            
-            await app.bot.send_message(
-                chat_id=user.telegram_id,
-                text=message
+            # Skip users we already alerted within the last candle for this pair and type
+            now = datetime.utcnow()
+            cooldown = timedelta(seconds=INTERVAL_SECONDS.get(interval, 3600))
+            recipients = []
+            for recipient in crossed:
+                alert_key = f"{symbol}_{interval}_{alert_type}_{'live_' if provisional else ''}{recipient[0]}"
+                last_alert = self.last_alert_time.get(alert_key)
+                if last_alert and now - last_alert < cooldown:
+                    continue
+                self.last_alert_time[alert_key] = now
+                recipients.append(recipient)
+            
+            if not recipients:
+                return
+            
+            # Persist through the write-behind queue, independent of the sends below
+            if not provisional:
+                alert_writer.enqueue([
+                    {'user_id': user_id, 'symbol': symbol, 'rsi_value': rsi_value, 'alert_type': alert_type}
+                    for user_id, _ in recipients
+                ])
+            
+            # Send notifications concurrently, paced by the rate limiter
+            message = self._format_alert_message(symbol, interval, rsi_value, alert_type, provisional)
+            closed_at = None if provisional else self.ws_client.close_times.get((symbol, interval))
+            await asyncio.gather(*(
+                self.send_alert_notification(telegram_id, symbol, message, alert_type, closed_at)
+                for _, telegram_id in recipients
+            ))
+            ALERTS_SENT.labels(alert_type, str(provisional).lower()).inc(len(recipients))
+            
+            logger.info(f"Created {len(recipients)} {'provisional ' if provisional else ''}{alert_type} alerts for {symbol} {interval} with RSI {rsi_value:.2f}")
+            
+        except Exception as e:
+            logger.error(f"Error creating alert for {symbol}: {e}")
+    
+    @staticmethod
+    def _format_alert_message(symbol: str, interval: str, rsi_value: float, alert_type: str,
+                              provisional: bool = False) -> str:
+        if alert_type == 'oversold':
+            emoji = "📉"
+            action = "potential buying opportunity"
+            condition = "oversold"
+        else:  # overbought
+            emoji = "📈"
+            action = "potential selling opportunity"
+            condition = "overbought"
+        
+        if provisional:
+            return (
+                f"⏳ Provisional RSI Alert (candle still open)\n\n{symbol} ({interval}): RSI ≈ {rsi_value:.2f}\n\n"
+                f"RSI is in {condition} territory before the candle has closed - {action} if it holds. "
+                f"The value can still change until the close."
             )
+        
+        return f"{emoji} RSI Alert!\n\n{symbol} ({interval}): RSI = {rsi_value:.2f}\n\nThis indicates an {condition} condition - {action}!"
+    
+    async def send_alert_notification(self, telegram_id: int, symbol: str, message: str, alert_type: str,
+                                      closed_at: Optional[float] = None):
+        """
+        Send alert notification to user via Telegram
+        
+        closed_at is the epoch time of the candle close that triggered the
+        alert, to measure end-to-end latency.
+        """
+        try:
+            await self.rate_limiter.acquire(telegram_id)
+            try:
+                with TELEGRAM_SEND_SECONDS.time():
+                    await app.bot.send_message(chat_id=telegram_id, text=message)
+            except RetryAfter as e:
+                # Telegram asked us to slow down; wait it out and retry once
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                await asyncio.sleep(delay)
+                with TELEGRAM_SEND_SECONDS.time():
+                    await app.bot.send_message(chat_id=telegram_id, text=message)
             
-            logger.info(f"Sent {alert_type} alert to user {user.telegram_id} for {symbol}")
+            if closed_at is not None:
+                ALERT_LATENCY_SECONDS.observe(time.time() - closed_at)
+            logger.info(f"Sent {alert_type} alert to user {telegram_id} for {symbol}")
             
         except Exception as e:
+            ALERT_SEND_ERRORS.inc()
             logger.error(f"Error sending notification: {e}")
-        finally:
-            db.close()
 
 # Global monitor instance
 monitor = RSIMonitor()
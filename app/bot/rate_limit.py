@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class TelegramRateLimiter:
+    """
+    Global plus per-chat token buckets matching Telegram's bot limits
+
+    Telegram allows about 30 messages per second overall and about one
+    message per second to the same chat.
+    """
+
+    GLOBAL_RATE = 30
+    PER_CHAT_RATE = 1
+    MAX_IDLE_CHATS = 10000
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, per_chat_rate: float = PER_CHAT_RATE):
+        self.per_chat_rate = per_chat_rate
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_buckets: Dict[int, TokenBucket] = {}
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= self.MAX_IDLE_CHATS:
+                # Full buckets hold no state worth keeping
+                self.chat_buckets = {
+                    chat: b for chat, b in self.chat_buckets.items() if not b.is_full
+                }
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, 1)
+        return bucket
+
+    async def acquire(self, chat_id: int):
+        """Wait until a message to chat_id fits both limits"""
+        await self._chat_bucket(chat_id).acquire()
+        await self.global_bucket.acquire()
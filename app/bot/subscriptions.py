@@ -0,0 +1,168 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Set, Tuple
+from sqlalchemy.orm import Session
+import logging
+
+from app.db.models.user import User
+from app.db.models.user_symbol import UserSymbol
+
+logger = logging.getLogger(__name__)
+
+# (user_id, telegram_id)
+Recipient = Tuple[int, int]
+# (symbol, interval)
+Pair = Tuple[str, str]
+# (oversold_threshold, overbought_threshold)
+Thresholds = Tuple[int, int]
+
+
+class ThresholdIndex:
+    """
+    Recipients of one pair kept sorted by threshold
+
+    Alerts fire for a contiguous run of the sorted list, so a bisect on the
+    RSI value finds exactly the users whose level was crossed without
+    scanning everyone else.
+    """
+
+    def __init__(self):
+        self.thresholds: Dict[Recipient, Thresholds] = {}
+        # Sorted (threshold, recipient) entries
+        self._oversold: List[Tuple[int, Recipient]] = []
+        self._overbought: List[Tuple[int, Recipient]] = []
+
+    def __len__(self) -> int:
+        return len(self.thresholds)
+
+    def add(self, recipient: Recipient, oversold: int, overbought: int):
+        if recipient in self.thresholds:
+            self.remove(recipient)
+        self.thresholds[recipient] = (oversold, overbought)
+        insort(self._oversold, (oversold, recipient))
+        insort(self._overbought, (overbought, recipient))
+
+    def remove(self, recipient: Recipient):
+        thresholds = self.thresholds.pop(recipient, None)
+        if thresholds is None:
+            return
+        oversold, overbought = thresholds
+        del self._oversold[bisect_left(self._oversold, (oversold, recipient))]
+        del self._overbought[bisect_left(self._overbought, (overbought, recipient))]
+
+    def oversold(self, rsi: float) -> List[Recipient]:
+        """Recipients whose oversold threshold is above rsi"""
+        start = bisect_right(self._oversold, (rsi, (float('inf'), float('inf'))))
+        return [recipient for _, recipient in self._oversold[start:]]
+
+    def overbought(self, rsi: float) -> List[Recipient]:
+        """Recipients whose overbought threshold is below rsi"""
+        end = bisect_left(self._overbought, (rsi, (float('-inf'), float('-inf'))))
+        return [recipient for _, recipient in self._overbought[:end]]
+
+
+class SubscriptionIndex:
+    """
+    In-memory (symbol, interval) -> recipients index
+
+    Loaded from the database once, kept current by the handlers as they
+    write, and reconciled periodically to pick up changes made elsewhere.
+    The alert path reads it instead of querying user_symbols.
+    """
+
+    def __init__(self):
+        self._by_pair: Dict[Pair, ThresholdIndex] = {}
+        self.loaded = False
+
+    @staticmethod
+    def load(db: Session) -> Dict[Pair, Dict[Recipient, Thresholds]]:
+        """Read every subscription from the database, grouped by pair (blocking)"""
+        rows = (
+            db.query(
+                UserSymbol.symbol, UserSymbol.interval, UserSymbol.user_id, User.telegram_id,
+                UserSymbol.rsi_oversold_threshold, UserSymbol.rsi_overbought_threshold
+            )
+            .join(User, User.id == UserSymbol.user_id)
+            .all()
+        )
+        by_pair: Dict[Pair, Dict[Recipient, Thresholds]] = {}
+        for symbol, interval, user_id, telegram_id, oversold, overbought in rows:
+            by_pair.setdefault((symbol, interval), {})[(user_id, telegram_id)] = (oversold, overbought)
+        return by_pair
+
+    def _snapshot(self) -> Dict[Pair, Dict[Recipient, Thresholds]]:
+        return {pair: dict(index.thresholds) for pair, index in self._by_pair.items()}
+
+    def reconcile(self, db: Session) -> bool:
+        """Reload the index from the database (blocking; async code runs load() through run_db and calls apply())"""
+        return self.apply(self.load(db))
+
+    def apply(self, by_pair: Dict[Pair, Dict[Recipient, Thresholds]]) -> bool:
+        """
+        Replace the index with subscriptions returned by load()
+
+        The new map is built aside and swapped in with one assignment, so
+        readers never see a half-built index.
+
+        Returns:
+            True if anything changed since the last load
+        """
+        if by_pair == self._snapshot():
+            self.loaded = True
+            return False
+
+        if self.loaded:
+            logger.info(f"Subscription index changed outside the bot, reloaded {len(by_pair)} pairs")
+
+        rebuilt: Dict[Pair, ThresholdIndex] = {}
+        for pair, recipients in by_pair.items():
+            index = rebuilt[pair] = ThresholdIndex()
+            for recipient, (oversold, overbought) in recipients.items():
+                index.add(recipient, oversold, overbought)
+        self._by_pair = rebuilt
+        self.loaded = True
+        return True
+
+    def add(self, symbol: str, interval: str, user_id: int, telegram_id: int, oversold: int, overbought: int):
+        self._by_pair.setdefault((symbol, interval), ThresholdIndex()).add((user_id, telegram_id), oversold, overbought)
+
+    def remove(self, symbol: str, interval: str, user_id: int):
+        index = self._by_pair.get((symbol, interval))
+        if not index:
+            return
+        for recipient in [r for r in index.thresholds if r[0] == user_id]:
+            index.remove(recipient)
+        if not index:
+            del self._by_pair[(symbol, interval)]
+
+    def set_user_thresholds(self, user_id: int, oversold: int = None, overbought: int = None):
+        """Re-file every subscription of a user under new thresholds"""
+        for index in self._by_pair.values():
+            for recipient in [r for r in index.thresholds if r[0] == user_id]:
+                current_oversold, current_overbought = index.thresholds[recipient]
+                index.add(
+                    recipient,
+                    current_oversold if oversold is None else oversold,
+                    current_overbought if overbought is None else overbought
+                )
+
+    def recipients(self, symbol: str, interval: str) -> List[Recipient]:
+        index = self._by_pair.get((symbol, interval))
+        return list(index.thresholds) if index else []
+
+    def oversold_recipients(self, symbol: str, interval: str, rsi: float) -> List[Recipient]:
+        """Subscribers of the pair for whom rsi is below their oversold threshold"""
+        index = self._by_pair.get((symbol, interval))
+        return index.oversold(rsi) if index else []
+
+    def overbought_recipients(self, symbol: str, interval: str, rsi: float) -> List[Recipient]:
+        """Subscribers of the pair for whom rsi is above their overbought threshold"""
+        index = self._by_pair.get((symbol, interval))
+        return index.overbought(rsi) if index else []
+
+    def pairs(self) -> Set[Pair]:
+        """Distinct (symbol, interval) pairs with at least one subscriber"""
+        return set(self._by_pair)
+
+
+# Global index shared by the handlers and the monitor
+subscriptions = SubscriptionIndex()
@@ -8,6 +8,9 @@ class UserSymbol(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    symbol = Column(String, nullable=False)
+    symbol = Column(String, nullable=False, index=True)
+    interval = Column(String, nullable=False, default="1h", server_default="1h")
+    rsi_oversold_threshold = Column(Integer, nullable=False, default=30, server_default="30")
+    rsi_overbought_threshold = Column(Integer, nullable=False, default=70, server_default="70")
     
     user = relationship("User", back_populates="symbols")
@@ -0,0 +1,12 @@
+from typing import Dict, List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from ..models.alert import Alert
+
+
+def add_alerts(db: Session, alerts: List[Dict]):
+    """Bulk insert alert rows given as Alert column dicts"""
+    if not alerts:
+        return
+    db.execute(insert(Alert), alerts)
+    db.commit()
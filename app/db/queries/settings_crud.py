@@ -0,0 +1,14 @@
+from typing import Tuple
+from sqlalchemy.orm import Session
+from ..models.settings import Setting
+
+DEFAULT_OVERSOLD_THRESHOLD = 30
+DEFAULT_OVERBOUGHT_THRESHOLD = 70
+
+
+def get_thresholds(db: Session) -> Tuple[int, int]:
+    """Return (oversold_threshold, overbought_threshold), falling back to defaults"""
+    setting = db.query(Setting).first()
+    if not setting:
+        return DEFAULT_OVERSOLD_THRESHOLD, DEFAULT_OVERBOUGHT_THRESHOLD
+    return setting.rsi_oversold_threshold, setting.rsi_overbought_threshold
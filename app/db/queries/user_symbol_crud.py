@@ -0,0 +1,77 @@
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from ..models.user import User
+from ..models.user_symbol import UserSymbol
+from .settings_crud import get_thresholds
+
+
+def add_user_symbol(db: Session, telegram_id: int, symbol: str, interval: str = "1h") -> Tuple[Optional[Tuple[int, int]], Tuple[int, int], bool]:
+    """
+    Subscribe a user to a symbol on a kline interval
+
+    New subscriptions inherit the user's current thresholds, or the global
+    defaults for a user's first subscription.
+
+    Returns:
+        ((user_id, telegram_id), (oversold, overbought), added),
+        or (None, defaults, False) if the user is not registered
+    """
+    user = db.query(User).filter(User.telegram_id == telegram_id).first()
+    if not user:
+        return None, get_thresholds(db), False
+
+    recipient = (user.id, user.telegram_id)
+
+    # Check if symbol already added on this interval
+    for s in user.symbols:
+        if s.symbol == symbol and s.interval == interval:
+            return recipient, (s.rsi_oversold_threshold, s.rsi_overbought_threshold), False
+
+    if user.symbols:
+        first = user.symbols[0]
+        thresholds = (first.rsi_oversold_threshold, first.rsi_overbought_threshold)
+    else:
+        thresholds = get_thresholds(db)
+
+    db.add(UserSymbol(
+        user_id=user.id, symbol=symbol, interval=interval,
+        rsi_oversold_threshold=thresholds[0], rsi_overbought_threshold=thresholds[1]
+    ))
+    db.commit()
+    return recipient, thresholds, True
+
+
+def get_user_thresholds(db: Session, telegram_id: int) -> Optional[Tuple[int, int]]:
+    """Return the user's (oversold, overbought) thresholds, or None without subscriptions"""
+    row = (
+        db.query(UserSymbol.rsi_oversold_threshold, UserSymbol.rsi_overbought_threshold)
+        .join(User, User.id == UserSymbol.user_id)
+        .filter(User.telegram_id == telegram_id)
+        .order_by(UserSymbol.id)
+        .first()
+    )
+    return tuple(row) if row else None
+
+
+def set_user_thresholds(db: Session, telegram_id: int, oversold: Optional[int] = None, overbought: Optional[int] = None) -> Tuple[Optional[int], int]:
+    """
+    Update the given thresholds on all of a user's subscriptions
+
+    Returns:
+        (user_id, number of subscriptions updated), user_id is None if the user is not registered
+    """
+    user = db.query(User).filter(User.telegram_id == telegram_id).first()
+    if not user:
+        return None, 0
+
+    values = {}
+    if oversold is not None:
+        values[UserSymbol.rsi_oversold_threshold] = oversold
+    if overbought is not None:
+        values[UserSymbol.rsi_overbought_threshold] = overbought
+    if not values:
+        return user.id, 0
+
+    updated = db.query(UserSymbol).filter(UserSymbol.user_id == user.id).update(values, synchronize_session=False)
+    db.commit()
+    return user.id, updated
@@ -1,10 +1,17 @@
 # app/db/session.py
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
 from dotenv import load_dotenv
 import os
 
+from app.utils.metrics import registry
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -13,8 +20,22 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL not set in environment")
 
+# Connection pool sizing and SQL statement logging (off unless DB_ECHO is set)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_ECHO = os.getenv("DB_ECHO", "").lower() in ("1", "true", "yes")
+
+if DATABASE_URL.startswith("sqlite"):
+    # SQLite is only used for local runs, tests and benchmarks; one connection keeps an
+    # in-memory database alive, and run_db() below never uses it from two threads at once
+    engine_options = {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+    db_workers = 1
+else:
+    engine_options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_pre_ping": True}
+    db_workers = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
 # Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, echo=DB_ECHO, **engine_options)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -22,6 +43,15 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for models
 Base = declarative_base()
 
+# Blocking DB work runs here so the event loop never waits on the database
+# Includes the wait for a free executor thread, which is where pool starvation shows up
+DB_CALL_SECONDS = registry.histogram(
+    "rsi_bot_db_call_seconds", "run_db() time per call site, queueing included", ["call_site"]
+)
+
+db_executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="db")
+
+T = TypeVar("T")
 
 
 def get_db():
@@ -30,3 +60,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run fn(db, *args, **kwargs) with its own session on the DB executor
+
+    Use this from async code instead of calling get_db() on the event loop.
+    """
+    def call():
+        db = SessionLocal()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(db_executor, call)
+    finally:
+        DB_CALL_SECONDS.labels(getattr(fn, '__qualname__', repr(fn))).observe(time.perf_counter() - started)
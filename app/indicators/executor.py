@@ -0,0 +1,190 @@
+import asyncio
+import os
+import logging
+import zlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+import numpy as np
+
+from app.indicators.rsi import calculate_rsi_series, wilder_averages_batch
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "inline" computes on the event loop thread, "process" on a pool of worker processes
+INDICATOR_BACKEND = os.getenv("INDICATOR_BACKEND", "inline")
+INDICATOR_WORKERS = int(os.getenv("INDICATOR_WORKERS", "0")) or os.cpu_count() or 1
+# Smaller batches stay inline; shipping them to a process costs more than the math
+INDICATOR_PROCESS_MIN_ROWS = int(os.getenv("INDICATOR_PROCESS_MIN_ROWS", "256"))
+
+BACKENDS = ("inline", "process")
+
+
+def _attach(name: str) -> SharedMemory:
+    """Open a block created by the parent, leaving its cleanup to the parent"""
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 always tracks; the tracker is shared with the parent, which unlinks
+        return SharedMemory(name=name)
+
+
+def _wilder_rows(prices_name: str, meta_name: str, shape: Tuple[int, int], start: int, stop: int, period: int):
+    """
+    Worker side: Wilder averages for rows start:stop of the shared price matrix
+
+    The meta block holds three rows of float64 per series: lengths (read),
+    avg gain and avg loss (written).
+    """
+    prices_shm = _attach(prices_name)
+    meta_shm = _attach(meta_name)
+    try:
+        prices = np.ndarray(shape, dtype=np.float64, buffer=prices_shm.buf)
+        meta = np.ndarray((3, shape[0]), dtype=np.float64, buffer=meta_shm.buf)
+        lengths = meta[0, start:stop].astype(np.int64)
+        meta[1, start:stop], meta[2, start:stop] = wilder_averages_batch(prices[start:stop], lengths, period)
+        del prices, meta
+    finally:
+        prices_shm.close()
+        meta_shm.close()
+
+
+def _rsi_rows(prices_name: str, out_name: str, shape: Tuple[int, int], start: int, stop: int, period: int):
+    """Worker side: calculate_rsi_series() for rows start:stop, written to the shared output matrix"""
+    prices_shm = _attach(prices_name)
+    out_shm = _attach(out_name)
+    try:
+        prices = np.ndarray(shape, dtype=np.float64, buffer=prices_shm.buf)
+        out = np.ndarray(shape, dtype=np.float64, buffer=out_shm.buf)
+        out[start:stop] = calculate_rsi_series(prices[start:stop], period)
+        del prices, out
+    finally:
+        prices_shm.close()
+        out_shm.close()
+
+
+def partition_by_symbol(symbols: Sequence[str], partitions: int) -> List[np.ndarray]:
+    """
+    Row indices per partition, with every row of a symbol in the same one
+
+    crc32 keeps the assignment stable across processes and restarts, like
+    the websocket shards.
+    """
+    owners = np.array([zlib.crc32(symbol.encode()) % partitions for symbol in symbols], dtype=np.int64)
+    return [rows for rows in (np.flatnonzero(owners == p) for p in range(partitions)) if len(rows)]
+
+
+class IndicatorExecutor:
+    """
+    Runs batched indicator math inline or on a process pool
+
+    With the "process" backend, batches of at least min_rows series are
+    split by symbol over the workers. The price windows go through one
+    shared memory block instead of being pickled: the parent copies the
+    matrix in once, each worker maps it and writes its rows' results to a
+    second shared block, so only names and row ranges cross the pipe.
+    """
+
+    def __init__(self, backend: str = INDICATOR_BACKEND, workers: int = INDICATOR_WORKERS,
+                 min_rows: int = INDICATOR_PROCESS_MIN_ROWS):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown indicator backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.min_rows = min_rows
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Create the worker processes now rather than on the first large batch"""
+        if self.backend == "process" and self._pool is None:
+            # spawn: forking a process with a running event loop and executor threads is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Indicator process pool started with {self.workers} workers")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def wilder_averages_batch(self, prices: np.ndarray, lengths: np.ndarray, period: int,
+                                    symbols: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        wilder_averages_batch() for the rows of prices, off the event loop when worthwhile
+
+        Args:
+            prices: 2D array (series x bars), each row left-aligned
+            lengths: Number of valid prices in each row
+            symbols: Symbol of each row, for partitioning
+
+        Returns:
+            (avg_gain, avg_loss) arrays, NaN for rows shorter than period + 1
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if not self._offload(prices):
+            return wilder_averages_batch(prices, lengths, period)
+
+        def prepare(meta: np.ndarray, order: np.ndarray):
+            meta[0] = np.asarray(lengths)[order]
+
+        meta = await self._map_rows(_wilder_rows, prices, (3, len(prices)), symbols, period, prepare, row_axis=1)
+        return meta[1], meta[2]
+
+    async def rsi_series(self, prices: np.ndarray, period: int, symbols: Sequence[str]) -> np.ndarray:
+        """calculate_rsi_series() for the rows of prices, off the event loop when worthwhile"""
+        prices = np.asarray(prices, dtype=np.float64)
+        if not self._offload(prices):
+            return calculate_rsi_series(prices, period)
+        return await self._map_rows(_rsi_rows, prices, prices.shape, symbols, period)
+
+    def _offload(self, prices: np.ndarray) -> bool:
+        return self.backend == "process" and prices.ndim == 2 and len(prices) >= self.min_rows
+
+    async def _map_rows(self, worker: Callable, prices: np.ndarray, out_shape: Tuple[int, ...],
+                        symbols: Sequence[str], period: int,
+                        prepare: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
+                        row_axis: int = 0) -> np.ndarray:
+        """
+        Run worker(prices_name, out_name, shape, start, stop, period) per partition of rows
+
+        The shared output block is float64 of out_shape, with the price rows
+        along row_axis; prepare(out, order) may fill inputs there first.
+        Returns a copy in the caller's row order.
+        """
+        self.start()
+        partitions = partition_by_symbol(symbols, self.workers)
+        order = np.concatenate(partitions)
+        bounds = np.cumsum([0] + [len(rows) for rows in partitions])
+
+        prices_shm = SharedMemory(create=True, size=max(prices.nbytes, 1))
+        out_shm = SharedMemory(create=True, size=max(int(np.prod(out_shape)) * 8, 1))
+        try:
+            # Rows of one partition are contiguous, so each worker gets a plain slice
+            shared = np.ndarray(prices.shape, dtype=np.float64, buffer=prices_shm.buf)
+            shared[:] = prices[order]
+            out = np.ndarray(out_shape, dtype=np.float64, buffer=out_shm.buf)
+            if prepare is not None:
+                prepare(out, order)
+
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(
+                loop.run_in_executor(self._pool, worker, prices_shm.name, out_shm.name,
+                                     prices.shape, int(start), int(stop), period)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ))
+
+            result = np.empty(out_shape)
+            result[(slice(None),) * row_axis + (order,)] = out
+            del shared, out
+            return result
+        finally:
+            prices_shm.close()
+            prices_shm.unlink()
+            out_shm.close()
+            out_shm.unlink()
+
+
+# Global executor for the monitor
+indicator_executor = IndicatorExecutor()
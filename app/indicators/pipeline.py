@@ -0,0 +1,265 @@
+import math
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+from app.indicators.rsi import StreamingRSI
+
+# Latest output per name for one (symbol, interval); None until an indicator is ready
+Values = Dict[str, Optional[float]]
+
+
+class Indicator:
+    """
+    A streaming indicator node
+
+    Reads the values named in `inputs` (the close, or other indicators'
+    outputs) and writes its `outputs` into the same dict, once per close.
+    """
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+    def update(self, values: Values):
+        raise NotImplementedError
+
+
+class _EMA:
+    """Exponential moving average seeded with the simple average of the first `period` values"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        if self.value is None:
+            self.count += 1
+            self.total += x
+            if self.count == self.period:
+                self.value = self.total / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class _SMA:
+    """Simple moving average over the last `period` values"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window: deque = deque(maxlen=period)
+        self.total = 0.0
+
+    def update(self, x: float) -> Optional[float]:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        return self.total / self.period if len(self.window) == self.period else None
+
+
+class RSI(Indicator):
+    """Wilder RSI; can wrap an existing StreamingRSI, e.g. one seeded in a vectorized batch"""
+    inputs = ('close',)
+    outputs = ('rsi',)
+
+    def __init__(self, period: int = 14, state: Optional[StreamingRSI] = None):
+        self.state = state if state is not None else StreamingRSI(period)
+
+    def update(self, values: Values):
+        values['rsi'] = self.state.update(values['close'])
+
+
+class EMA(Indicator):
+    """EMA of the close, published as ema_<period>"""
+    inputs = ('close',)
+
+    def __init__(self, period: int):
+        self.outputs = (f'ema_{period}',)
+        self._ema = _EMA(period)
+
+    def update(self, values: Values):
+        values[self.outputs[0]] = self._ema.update(values['close'])
+
+
+class MACD(Indicator):
+    """MACD line from the shared fast/slow EMAs, with its signal line and histogram"""
+    outputs = ('macd', 'macd_signal', 'macd_hist')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.inputs = (f'ema_{fast}', f'ema_{slow}')
+        self._signal = _EMA(signal)
+
+    def update(self, values: Values):
+        fast, slow = values[self.inputs[0]], values[self.inputs[1]]
+        macd = signal = hist = None
+        if fast is not None and slow is not None:
+            macd = fast - slow
+            signal = self._signal.update(macd)
+            if signal is not None:
+                hist = macd - signal
+        values['macd'], values['macd_signal'], values['macd_hist'] = macd, signal, hist
+
+
+class StochRSI(Indicator):
+    """Stochastic of the shared RSI series: %K and its %D signal, 0-100"""
+    inputs = ('rsi',)
+    outputs = ('stoch_rsi_k', 'stoch_rsi_d')
+
+    def __init__(self, period: int = 14, k: int = 3, d: int = 3):
+        self._rsi: deque = deque(maxlen=period)
+        self._k = _SMA(k)
+        self._d = _SMA(d)
+
+    def update(self, values: Values):
+        rsi = values['rsi']
+        k = d = None
+        if rsi is not None:
+            self._rsi.append(rsi)
+            if len(self._rsi) == self._rsi.maxlen:
+                low, high = min(self._rsi), max(self._rsi)
+                stoch = 100 * (rsi - low) / (high - low) if high > low else 0.0
+                k = self._k.update(stoch)
+                if k is not None:
+                    d = self._d.update(k)
+        values['stoch_rsi_k'], values['stoch_rsi_d'] = k, d
+
+
+class Bollinger(Indicator):
+    """Bollinger Bands (population standard deviation) and %B of the close"""
+    inputs = ('close',)
+    outputs = ('bb_upper', 'bb_middle', 'bb_lower', 'bb_percent_b')
+
+    def __init__(self, period: int = 20, width: float = 2.0):
+        self.width = width
+        self._window: deque = deque(maxlen=period)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def update(self, values: Values):
+        close = values['close']
+        window = self._window
+        if len(window) == window.maxlen:
+            oldest = window[0]
+            self._sum -= oldest
+            self._sum_sq -= oldest * oldest
+        window.append(close)
+        self._sum += close
+        self._sum_sq += close * close
+
+        upper = middle = lower = percent_b = None
+        if len(window) == window.maxlen:
+            middle = self._sum / len(window)
+            deviation = math.sqrt(max(self._sum_sq / len(window) - middle * middle, 0.0))
+            upper = middle + self.width * deviation
+            lower = middle - self.width * deviation
+            percent_b = (close - lower) / (upper - lower) if upper > lower else 0.5
+        values['bb_upper'], values['bb_middle'], values['bb_lower'], values['bb_percent_b'] = (
+            upper, middle, lower, percent_b
+        )
+
+
+# Node factories by output name; ema_<period> is resolved for any period
+INDICATORS: Dict[str, Callable[[], Indicator]] = {
+    output: factory
+    for factory in (RSI, MACD, StochRSI, Bollinger)
+    for output in factory.outputs
+}
+
+
+def _factory_for(output: str) -> Callable[[], Indicator]:
+    if output.startswith('ema_') and output[4:].isdigit():
+        period = int(output[4:])
+        return lambda: EMA(period)
+    factory = INDICATORS.get(output)
+    if factory is None:
+        known = sorted([*INDICATORS, 'ema_<period>'])
+        raise ValueError(f"Unknown indicator output {output!r}, expected one of {known}")
+    return factory
+
+
+class IndicatorPipeline:
+    """
+    The indicator nodes needed for a set of outputs, in dependency order
+
+    Each node is included once however many others depend on it, so MACD
+    and an ema_12 rule share one EMA, and Stoch RSI reads the same RSI the
+    alerts use.
+    """
+
+    def __init__(self, outputs: Iterable[str], rsi_period: int = 14):
+        self.rsi_period = rsi_period
+        self._factories: List[Callable[[], Indicator]] = []
+        self._node_outputs: List[Tuple[str, ...]] = []
+        for output in outputs:
+            self._resolve(output, ())
+
+    def _resolve(self, output: str, path: Tuple[str, ...]):
+        if output == 'close' or any(output in outputs for outputs in self._node_outputs):
+            return
+        if output in path:
+            raise ValueError(f"Indicator dependency cycle: {' -> '.join([*path, output])}")
+        factory = _factory_for(output)
+        prototype = factory()
+        for dependency in prototype.inputs:
+            self._resolve(dependency, (*path, output))
+        self._factories.append(factory)
+        self._node_outputs.append(prototype.outputs)
+
+    @property
+    def outputs(self) -> List[str]:
+        return [output for outputs in self._node_outputs for output in outputs]
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def create(self, rsi: Optional[StreamingRSI] = None) -> "IndicatorSet":
+        """Fresh nodes for one pair, the RSI node wrapping `rsi` if given"""
+        nodes = []
+        for factory in self._factories:
+            if factory is RSI:
+                nodes.append(RSI(self.rsi_period, rsi))
+            else:
+                nodes.append(factory())
+        return IndicatorSet(nodes)
+
+
+class IndicatorSet:
+    """One pair's indicator nodes and their latest outputs; a close updates each node once"""
+
+    def __init__(self, nodes: Sequence[Indicator]):
+        self.nodes = list(nodes)
+        self.values: Values = {}
+
+    def update(self, close: float) -> Values:
+        values = self.values
+        values['close'] = float(close)
+        for node in self.nodes:
+            node.update(values)
+        return values
+
+    def seed(self, closes: np.ndarray, series: Optional[Dict[str, np.ndarray]] = None) -> Values:
+        """
+        Replay historical closes through the nodes
+
+        Args:
+            series: Precomputed output columns aligned with closes (NaN for
+                not ready), e.g. {'rsi': ...} from calculate_rsi_series().
+                Their values are fed to dependent nodes as-is and the nodes
+                producing them are not stepped, so they must already hold
+                the state at the last close.
+        """
+        series = series or {}
+        nodes = [node for node in self.nodes if not all(output in series for output in node.outputs)]
+        columns = [(name, column.tolist()) for name, column in series.items()]
+        values = self.values
+        for i, close in enumerate(np.asarray(closes, dtype=np.float64).tolist()):
+            values['close'] = close
+            for name, column in columns:
+                value = column[i]
+                values[name] = None if math.isnan(value) else value
+            for node in nodes:
+                node.update(values)
+        return values
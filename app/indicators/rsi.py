@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, Iterable, Tuple
 import numpy as np
 
 def calculate_rsi(prices: List[float], period: int = 14) -> List[float]:
@@ -44,6 +44,221 @@ def calculate_rsi(prices: List[float], period: int = 14) -> List[float]:
     
     return rsi_values
 
+def wilder_averages_batch(prices: np.ndarray, lengths: np.ndarray, period: int = 14) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Wilder average gain/loss for many price series at once
+    
+    Uses the closed form of Wilder's recursion (a geometric weighting of the
+    gains after the seed window) so every row is evaluated in the same
+    vectorized pass.
+    
+    Args:
+        prices: 2D array (series x bars), each row left-aligned
+        lengths: Number of valid prices in each row
+        period: RSI period (default 14)
+    
+    Returns:
+        (avg_gain, avg_loss) arrays, NaN for rows shorter than period + 1
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    n_rows = prices.shape[0]
+    
+    avg_gain = np.full(n_rows, np.nan)
+    avg_loss = np.full(n_rows, np.nan)
+    if prices.ndim != 2 or prices.shape[1] < period + 1:
+        return avg_gain, avg_loss
+    
+    deltas = np.diff(prices, axis=1)
+    n_deltas = lengths - 1
+    cols = np.arange(deltas.shape[1])
+    in_row = cols[None, :] < n_deltas[:, None]
+    
+    gains = np.where(in_row & (deltas > 0), deltas, 0.0)
+    losses = np.where(in_row & (deltas < 0), -deltas, 0.0)
+    
+    # Initial simple average over the first `period` changes
+    seed_gain = gains[:, :period].mean(axis=1)
+    seed_loss = losses[:, :period].mean(axis=1)
+    
+    # Every later change j contributes decay^(n_deltas - 1 - j) / period
+    decay = (period - 1) / period
+    smoothed = in_row & (cols[None, :] >= period)
+    exponents = np.where(smoothed, n_deltas[:, None] - 1 - cols[None, :], 0)
+    weights = np.where(smoothed, decay ** exponents / period, 0.0)
+    seed_weight = decay ** np.maximum(n_deltas - period, 0)
+    
+    valid = n_deltas >= period
+    avg_gain[valid] = (seed_weight * seed_gain + (weights * gains).sum(axis=1))[valid]
+    avg_loss[valid] = (seed_weight * seed_loss + (weights * losses).sum(axis=1))[valid]
+    
+    return avg_gain, avg_loss
+
+
+def calculate_rsi_batch(prices: np.ndarray, lengths: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Calculate the latest RSI for many price series in one pass
+    
+    Args:
+        prices: 2D array (series x bars), each row left-aligned
+        lengths: Number of valid prices in each row
+        period: RSI period (default 14)
+    
+    Returns:
+        Array with the latest RSI per row (NaN where there is not enough data)
+    """
+    avg_gain, avg_loss = wilder_averages_batch(prices, lengths, period)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    
+    rsi[avg_loss == 0] = 100
+    return rsi
+
+
+def calculate_rsi_series(prices: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Calculate the full RSI history for many price series at once
+    
+    Wilder's recursion is sequential in time, so this steps through the bars
+    once and advances every row together.
+    
+    Args:
+        prices: 2D array (series x bars), each row left-aligned and padded
+            with NaN after its last price
+        period: RSI period (default 14)
+    
+    Returns:
+        Array shaped like prices; the RSI after each bar, NaN for the first
+        `period` bars of a row and for padding. Values match calculate_rsi
+        and StreamingRSI.
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    n_rows, n_bars = prices.shape
+    rsi = np.full((n_rows, n_bars), np.nan)
+    if n_bars < period + 1:
+        return rsi
+    
+    deltas = np.diff(prices, axis=1)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    
+    avg_gain = np.empty((n_rows, n_bars))
+    avg_loss = np.empty((n_rows, n_bars))
+    avg_gain[:, period] = gains[:, :period].mean(axis=1)
+    avg_loss[:, period] = losses[:, :period].mean(axis=1)
+    for i in range(period, n_bars - 1):
+        avg_gain[:, i + 1] = (avg_gain[:, i] * (period - 1) + gains[:, i]) / period
+        avg_loss[:, i + 1] = (avg_loss[:, i] * (period - 1) + losses[:, i]) / period
+    
+    g = avg_gain[:, period:]
+    l = avg_loss[:, period:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tail = np.where(l == 0, 100.0, 100 - (100 / (1 + g / l)))
+    rsi[:, period:] = tail
+    rsi[np.isnan(prices)] = np.nan
+    return rsi
+
+
+def _rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    """Convert Wilder average gain/loss into an RSI value"""
+    if avg_loss == 0:
+        return 100
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+class StreamingRSI:
+    """
+    Incremental RSI using Wilder's smoothing.
+
+    Keeps the running average gain/loss so every new close is a constant-time
+    update instead of a pass over the whole history. Fed the same series, the
+    value after each update matches the last element of calculate_rsi().
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.last_price: Optional[float] = None
+        self.count = 0  # number of price changes seen so far
+        self.value: Optional[float] = None
+
+    @classmethod
+    def from_averages(cls, period: int, avg_gain: float, avg_loss: float, last_price: float, count: int) -> "StreamingRSI":
+        """Restore a ready state, e.g. from wilder_averages_batch()"""
+        state = cls(period)
+        state.avg_gain = float(avg_gain)
+        state.avg_loss = float(avg_loss)
+        state.last_price = float(last_price)
+        state.count = int(count)
+        if state.is_ready:
+            state.value = _rsi_from_averages(state.avg_gain, state.avg_loss)
+        return state
+
+    @property
+    def is_ready(self) -> bool:
+        """True once enough closes have been seen to produce an RSI value"""
+        return self.count >= self.period
+
+    def _advance(self, price: float):
+        """Return (avg_gain, avg_loss, count) after applying price, without committing"""
+        delta = price - self.last_price
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        count = self.count + 1
+
+        if count < self.period:
+            # Still seeding: accumulate sums for the initial simple average
+            return self.avg_gain + gain, self.avg_loss + loss, count
+        if count == self.period:
+            return (self.avg_gain + gain) / self.period, (self.avg_loss + loss) / self.period, count
+
+        avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        return avg_gain, avg_loss, count
+
+    def update(self, price: float) -> Optional[float]:
+        """
+        Commit a closed candle price
+
+        Returns:
+            Current RSI value, or None while still seeding
+        """
+        price = float(price)
+        if self.last_price is None:
+            self.last_price = price
+            return None
+
+        self.avg_gain, self.avg_loss, self.count = self._advance(price)
+        self.last_price = price
+
+        if self.is_ready:
+            self.value = _rsi_from_averages(self.avg_gain, self.avg_loss)
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        """
+        RSI as if price closed the next candle, without changing state
+
+        Useful for evaluating an unclosed (in-progress) candle.
+        """
+        if self.last_price is None:
+            return None
+
+        avg_gain, avg_loss, count = self._advance(float(price))
+        if count < self.period:
+            return None
+        return _rsi_from_averages(avg_gain, avg_loss)
+
+    def seed(self, prices: Iterable[float]) -> Optional[float]:
+        """Feed a batch of historical closes in order"""
+        for price in prices:
+            self.update(price)
+        return self.value
+
+
 def is_oversold(rsi: float, threshold: float = 30) -> bool:
     """Check if RSI indicates oversold condition"""
     return rsi < threshold
@@ -0,0 +1,92 @@
+import operator
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+from app.indicators.pipeline import Values
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+_CONDITION = re.compile(r'^\s*([a-z_0-9]+)\s*(<=|>=|<|>)\s*([a-z_0-9.\-]+)\s*$')
+
+
+@dataclass(frozen=True)
+class Condition:
+    """output <op> operand, where operand is a number or another output"""
+    output: str
+    op: str
+    operand: Union[float, str]
+
+    def holds(self, values: Values) -> Optional[bool]:
+        """Whether the condition holds, or None while an input is not ready"""
+        left = values.get(self.output)
+        right = values.get(self.operand) if isinstance(self.operand, str) else self.operand
+        if left is None or right is None:
+            return None
+        return OPERATORS[self.op](left, right)
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """
+    A named alert on indicator outputs
+
+    Fires for every subscriber of a pair when all conditions start to hold
+    together at a candle close, e.g. "macd_cross_up: macd > macd_signal".
+    """
+    name: str
+    conditions: Tuple[Condition, ...]
+
+    @property
+    def outputs(self) -> List[str]:
+        """Indicator outputs the rule reads"""
+        names = []
+        for condition in self.conditions:
+            names.append(condition.output)
+            if isinstance(condition.operand, str):
+                names.append(condition.operand)
+        return names
+
+    def evaluate(self, values: Values) -> Optional[bool]:
+        """True if every condition holds, None while any input is not ready"""
+        result = True
+        for condition in self.conditions:
+            holds = condition.holds(values)
+            if holds is None:
+                return None
+            result = result and holds
+        return result
+
+
+def parse_rules(text: str) -> List[AlertRule]:
+    """
+    Parse rules written as "name: condition, condition; name: condition"
+
+    Conditions compare an indicator output with a number or with another
+    output, e.g. "stoch_oversold: stoch_rsi_k < 20, rsi < 40; macd_cross_up: macd > macd_signal".
+    """
+    rules = []
+    for chunk in filter(None, (part.strip() for part in text.split(';'))):
+        name, sep, body = chunk.partition(':')
+        name = name.strip()
+        if not sep or not name or not body.strip():
+            raise ValueError(f"Alert rule {chunk!r} should look like 'name: output < value'")
+
+        conditions = []
+        for part in body.split(','):
+            match = _CONDITION.match(part)
+            if match is None:
+                raise ValueError(f"Bad condition {part.strip()!r} in alert rule {name!r}")
+            output, op, operand = match.groups()
+            try:
+                operand = float(operand)
+            except ValueError:
+                pass
+            conditions.append(Condition(output, op, operand))
+        rules.append(AlertRule(name, tuple(conditions)))
+    return rules
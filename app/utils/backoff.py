@@ -0,0 +1,12 @@
+import random
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Seconds to wait before retry number `attempt` (1 for the first retry)
+
+    Exponential backoff with full jitter: a random delay up to
+    base * 2 ** (attempt - 1), capped at `cap`, so many clients failing
+    together do not retry in lockstep.
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
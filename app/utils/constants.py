@@ -11,3 +11,12 @@ SUPPORTED_SYMBOLS = [
     "LTCUSDT",
     "ETHFIUSDT",
 ]
+
+# Kline intervals users can pick for their RSI, with their length in seconds
+INTERVAL_SECONDS = {
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "4h": 4 * 60 * 60,
+}
+SUPPORTED_INTERVALS = list(INTERVAL_SECONDS)
+DEFAULT_INTERVAL = "1h"
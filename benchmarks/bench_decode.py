@@ -0,0 +1,82 @@
+"""
+Frames/second for websocket frame decoding
+
+Usage:
+    python -m benchmarks.bench_decode [--file frames.jsonl] [--frames N]
+
+--file takes recorded raw frames, one per line (e.g. captured from the
+combined stream). Without it, frames in Binance's combined-stream format are
+generated with the same closed/unclosed mix as 1h candles (one closed frame
+per ~1800 updates).
+"""
+import argparse
+import json
+import random
+import time
+from typing import List
+
+from app.binance import decoding
+from app.binance.decoding import FrameDecoder
+
+
+def make_frames(count: int, closed_every: int = 1800, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    frames = []
+    for i in range(count):
+        price = 60000 + rng.uniform(-500, 500)
+        open_time = 1700000000000 + (i // closed_every) * 3600000
+        kline = {
+            "t": open_time, "T": open_time + 3599999, "s": "BTCUSDT", "i": "1h",
+            "f": 100, "L": 200, "o": "60000.00", "c": f"{price:.2f}",
+            "h": "60500.00", "l": "59500.00", "v": "1000.0", "n": 100,
+            "x": i % closed_every == 0, "q": "60000000.0", "V": "500.0",
+            "Q": "30000000.0", "B": "0"
+        }
+        data = {"e": "kline", "E": 1700000000000 + i, "s": "BTCUSDT", "k": kline}
+        frames.append(json.dumps({"stream": "btcusdt@kline_1h", "data": data}, separators=(',', ':')))
+    return frames
+
+
+def frames_per_second(decode, frames: List[str], repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for frame in frames:
+            decode(frame)
+        best = min(best, time.perf_counter() - started)
+    return len(frames) / best
+
+
+def run(frames: List[str]) -> dict:
+    results = {
+        "frames": len(frames),
+        "stdlib_json_loads": frames_per_second(json.loads, frames),
+        "fast_path": frames_per_second(FrameDecoder().decode, frames),
+        "fast_path_include_unclosed": frames_per_second(FrameDecoder(include_unclosed=True).decode, frames),
+        "json_backend": "orjson" if decoding.orjson is not None else "json",
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--file", help="Recorded frames, one per line")
+    parser.add_argument("--frames", type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            frames = [line.strip() for line in f if line.strip()]
+    else:
+        frames = make_frames(args.frames)
+
+    results = run(frames)
+    for name, value in results.items():
+        if isinstance(value, float):
+            print(f"{name:30} {value:>14,.0f} frames/s")
+        else:
+            print(f"{name:30} {value:>14}")
+
+
+if __name__ == "__main__":
+    main()
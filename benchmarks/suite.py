@@ -0,0 +1,291 @@
+"""
+Offline micro-benchmarks for the RSI, decode and alert hot paths
+
+Usage:
+    python -m benchmarks.suite [--json results.json] [--baseline benchmarks/baseline.json]
+                               [--tolerance 0.25] [--save-baseline] [--frames-file frames.jsonl]
+                               [--only NAME ...]
+
+Every result is a throughput (higher is better). With --baseline, the run
+fails (exit code 1) when a benchmark drops more than --tolerance below its
+baseline value; a baseline entry may carry its own "tolerance". Nothing
+touches the network: the database is in-memory SQLite and Telegram is a
+fake bot that only counts messages.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+# Must be set before the app modules read them
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:offline-benchmark")
+os.environ.setdefault("KLINE_STORE_DIR", tempfile.mkdtemp(prefix="rsi-bench-klines-"))
+
+import numpy as np
+
+from benchmarks.bench_decode import make_frames
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+RSI_LENGTHS = (100, 1_000, 10_000)
+
+
+def best_rate(run: Callable[[], int], repeat: int = 5, setup: Optional[Callable[[], None]] = None) -> float:
+    """
+    Best operations/second over `repeat` runs of run(), which returns its operation count
+
+    setup(), if given, runs untimed before each run to reset its state.
+    """
+    best = 0.0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        ops = run()
+        best = max(best, ops / (time.perf_counter() - started))
+    return best
+
+
+def bench_calculate_rsi(length: int) -> float:
+    from app.indicators.rsi import calculate_rsi
+
+    prices = list(100 + np.cumsum(np.random.default_rng(length).normal(0, 1, length)))
+    calls = max(1, 20_000 // length)
+
+    def run():
+        for _ in range(calls):
+            calculate_rsi(prices)
+        return calls
+    return best_rate(run)
+
+
+def bench_handle_kline_data(frames: List[str]) -> float:
+    """Frames/second through decode + _handle_kline_data and the close queue, with a no-op callback"""
+    from app.binance.websocket import BinanceWebSocketClient
+
+    async def on_close(symbol, interval, prices):
+        pass
+
+    async def run_frames():
+        # Fresh client per run, or every close would be dropped as a duplicate
+        client = BinanceWebSocketClient()
+        client.kline_store = None
+        client.add_callback(on_close)
+        decode = client.decoder.decode
+        handle = client._handle_kline_data
+        for frame in frames:
+            data = decode(frame)
+            if data is not None:
+                await handle(data['data'])
+        await client.close_queue.join()
+        await client.stop_workers()
+        return len(frames)
+
+    return best_rate(lambda: asyncio.run(run_frames()))
+
+
+class FakeBot:
+    """Stands in for telegram.Bot; records nothing but a count"""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id: int, text: str):
+        self.sent += 1
+
+
+def _setup_monitor(users_per_pair: int, symbols: List[str], interval: str = "1h"):
+    """RSIMonitor over an in-memory SQLite database with users subscribed to every symbol"""
+    import app.bot.monitor as monitor_module
+    from app.bot.monitor import RSIMonitor
+    from app.bot.rate_limit import TelegramRateLimiter
+    from app.bot.subscriptions import subscriptions
+    from app.db import models
+    from app.db.session import Base, SessionLocal, engine
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        rng = np.random.default_rng(0)
+        for i in range(users_per_pair):
+            user = models.User(telegram_id=10_000 + i)
+            db.add(user)
+            db.flush()
+            oversold = int(rng.choice([20, 25, 30, 35, 40]))
+            overbought = int(rng.choice([60, 65, 70, 75, 80]))
+            db.add_all([
+                models.UserSymbol(user_id=user.id, symbol=symbol, interval=interval,
+                                  rsi_oversold_threshold=oversold, rsi_overbought_threshold=overbought)
+                for symbol in symbols
+            ])
+        db.commit()
+        subscriptions.reconcile(db)
+    finally:
+        db.close()
+
+    bot = FakeBot()
+    monitor_module.app = type("FakeApplication", (), {"bot": bot})()
+    monitor = RSIMonitor()
+    monitor.ws_client.kline_store = None
+    monitor.batch_window = 0
+    # Measure our code, not Telegram's limits
+    monitor.rate_limiter = TelegramRateLimiter(global_rate=1e12, per_chat_rate=1e12)
+    return monitor, bot
+
+
+def bench_on_price_update(pairs: int = 200, users_per_pair: int = 10, rounds: int = 5) -> float:
+    """
+    Candle closes/second through _on_price_update, RSI, alert fan-out and the SQLite alert flush
+
+    Each timed run closes every pair `rounds` times, so event loop setup
+    and one-off stalls weigh less against the work.
+    """
+    from app.bot.alert_writer import alert_writer
+
+    symbols = [f"SYM{i:04d}USDT" for i in range(pairs)]
+    monitor, _ = _setup_monitor(users_per_pair, symbols)
+    history = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.02, (pairs, 101)), axis=1))
+    closes = np.random.default_rng(2).normal(1, 0.03, (rounds, pairs)) * history[:, -1]
+
+    def reset():
+        # Every run starts from the same history and RSI, so it fires the same alerts
+        monitor.rsi_state.clear()
+        monitor.indicators.clear()
+        for symbol, prices in zip(symbols, history):
+            monitor.ws_client.seed_prices(symbol, "1h", prices[:-1])
+        asyncio.run(monitor._update_rsi_batch({
+            (symbol, "1h"): [monitor.ws_client.get_price_data(symbol, "1h")] for symbol in symbols
+        }))
+
+    async def run_closes():
+        for round_closes in closes:
+            monitor.last_alert_time.clear()
+            for symbol, price in zip(symbols, round_closes):
+                prices = monitor.ws_client.price_data.append((symbol, "1h"), price)
+                await monitor._on_price_update(symbol, "1h", prices)
+            await monitor._flush_task
+            await alert_writer.flush()
+        return pairs * rounds
+
+    return best_rate(lambda: asyncio.run(run_closes()), repeat=7, setup=reset)
+
+
+def bench_create_alert(recipients: int = 1_000) -> float:
+    """Recipients/second for one create_alert fan-out with a fake bot, including the alert flush"""
+    from app.bot.alert_writer import alert_writer
+
+    monitor, bot = _setup_monitor(recipients, ["BTCUSDT"])
+
+    async def run_alert():
+        monitor.last_alert_time.clear()
+        before = bot.sent
+        await monitor.create_alert("BTCUSDT", "1h", 5.0, 'oversold')
+        await alert_writer.flush()
+        return bot.sent - before
+
+    return best_rate(lambda: asyncio.run(run_alert()))
+
+
+def run(frames: List[str], only: Optional[List[str]] = None) -> Dict[str, Dict]:
+    # One close per candle, each a new bar
+    closed_frames = make_frames(len(frames), closed_every=1)
+    benchmarks = {
+        **{f"calculate_rsi_{n}": (lambda n=n: bench_calculate_rsi(n), "calls/s") for n in RSI_LENGTHS},
+        "handle_kline_data_mixed": (lambda: bench_handle_kline_data(frames), "frames/s"),
+        "handle_kline_data_closed": (lambda: bench_handle_kline_data(closed_frames), "frames/s"),
+        "on_price_update_sqlite": (bench_on_price_update, "closes/s"),
+        "create_alert_fanout": (bench_create_alert, "recipients/s"),
+    }
+    results = {}
+    for name, (bench, unit) in benchmarks.items():
+        if only and name not in only:
+            continue
+        results[name] = {"value": bench(), "unit": unit}
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Names of the benchmarks that regressed beyond their tolerance"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        allowed = reference.get("tolerance", tolerance)
+        if result["value"] < reference["value"] * (1 - allowed):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--json", help="Write results to this file ('-' for stdout)")
+    parser.add_argument("--baseline", help="Baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed drop below baseline, as a fraction (default 0.25)")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help=f"Store these results as the baseline (default {DEFAULT_BASELINE})")
+    parser.add_argument("--frames-file", help="Recorded raw frames, one per line")
+    parser.add_argument("--frames", type=int, default=20_000)
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks")
+    args = parser.parse_args()
+
+    if args.frames_file:
+        with open(args.frames_file) as f:
+            frames = [line.strip() for line in f if line.strip()]
+    else:
+        frames = make_frames(args.frames, closed_every=100)
+
+    results = run(frames, args.only)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    # Keep stdout pure JSON when the report goes there
+    table = sys.stderr if args.json == "-" else sys.stdout
+    for name, result in results.items():
+        line = f"{name:28} {result['value']:>14,.0f} {result['unit']}"
+        if name in baseline:
+            change = result["value"] / baseline[name]["value"] - 1
+            line += f"  ({change:+.1%} vs baseline)"
+        print(line, file=table)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        # Per-entry tolerances are set by hand; keep them when re-recording
+        if os.path.exists(args.save_baseline):
+            with open(args.save_baseline) as f:
+                previous = json.load(f)["results"]
+            for name, result in results.items():
+                if "tolerance" in previous.get(name, {}):
+                    result["tolerance"] = previous[name]["tolerance"]
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Regressed beyond tolerance: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 from app.bot import app
 from app.bot.monitor import monitor
+from app.utils.metrics import start_metrics_server
 import asyncio
 
 
 async def main():
+    # Serve metrics next to the bot (METRICS_PORT=0 turns this off)
+    metrics_runner = await start_metrics_server()
+    
     # Start the RSI monitor in the background
     monitor_task = asyncio.create_task(monitor.start_monitoring())
     
@@ -21,6 +25,8 @@ async def main():
         await app.updater.stop()
         await app.stop()
         await app.shutdown()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 
 if __name__ == "__main__":
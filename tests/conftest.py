@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# The bot modules read these at import; tests run offline on in-memory SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:offline-tests")
+os.environ.setdefault("KLINE_STORE_DIR", tempfile.mkdtemp(prefix="rsi-test-klines-"))
@@ -0,0 +1,105 @@
+import asyncio
+
+from sqlalchemy.exc import IntegrityError
+
+import app.bot.alert_writer as alert_writer_module
+from app.bot.alert_writer import AlertWriter
+
+
+def _rows(*ids):
+    return [{"user_id": i, "symbol": "BTCUSDT", "rsi_value": 25, "alert_type": "oversold"} for i in ids]
+
+
+class FakeDB:
+    """Records inserted rows; user_id 0 violates a constraint, fail_next fails the next insert"""
+
+    def __init__(self):
+        self.inserted = []
+        self.fail_next = False
+        self.release = None
+        self.cancelled = False
+
+    async def run_db(self, fn, rows):
+        if self.release is not None:
+            try:
+                await self.release.wait()
+            except asyncio.CancelledError:
+                self.cancelled = True  # the insert itself would have gone ahead on its thread
+                raise
+        if self.fail_next:
+            self.fail_next = False
+            raise OSError("connection lost")
+        if any(row["user_id"] == 0 for row in rows):
+            raise IntegrityError("INSERT INTO alerts", {}, Exception("foreign key"))
+        self.inserted.extend(row["user_id"] for row in rows)
+
+
+def _writer(monkeypatch, **kwargs):
+    db = FakeDB()
+    monkeypatch.setattr(alert_writer_module, "run_db", db.run_db)
+    return AlertWriter(**kwargs), db
+
+
+def test_rejected_rows_are_dropped_and_the_rest_written(monkeypatch):
+    writer, db = _writer(monkeypatch, batch_size=8)
+    writer.enqueue(_rows(1, 2, 0, 4, 5, 6, 0, 8, 9))
+
+    asyncio.run(writer.flush())
+
+    assert db.inserted == [1, 2, 4, 5, 6, 8, 9]
+    assert writer.rows_rejected == 2
+    assert writer.rows_written == 7
+    assert writer.backlog == 0
+
+
+def test_failed_flush_keeps_unwritten_rows_in_order(monkeypatch):
+    writer, db = _writer(monkeypatch, batch_size=2)
+    writer.enqueue(_rows(1, 2, 3))
+    db.fail_next = True
+
+    asyncio.run(writer.flush())
+    assert writer.backlog == 3
+    asyncio.run(writer.flush())
+
+    assert db.inserted == [1, 2, 3]
+
+
+def test_backlog_trim_during_a_write_spares_the_batch_in_flight(monkeypatch):
+    writer, db = _writer(monkeypatch, batch_size=2, max_backlog=3)
+    writer.enqueue(_rows(1, 2))
+
+    async def run():
+        db.release = asyncio.Event()
+        db.fail_next = True
+        flush = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0)
+        writer.enqueue(_rows(3, 4, 5))  # two over the cap while 1 and 2 are in flight
+        db.release.set()
+        await flush
+        db.release = None
+        await writer.flush()
+
+    asyncio.run(run())
+
+    assert db.inserted == [1, 2, 5]
+    assert writer.rows_dropped == 2
+
+
+def test_stop_lets_a_running_flush_finish(monkeypatch):
+    writer, db = _writer(monkeypatch, batch_size=2, flush_interval=0.01)
+
+    async def run():
+        db.release = asyncio.Event()
+        await writer.start()
+        writer.enqueue(_rows(1, 2, 3))
+        await asyncio.sleep(0.02)  # the flusher is now waiting on the insert
+        stop = asyncio.create_task(writer.stop())
+        await asyncio.sleep(0.01)
+        db.release.set()
+        await stop
+
+    asyncio.run(run())
+
+    assert not db.cancelled
+    assert db.inserted == [1, 2, 3]
+    assert writer.backlog == 0
@@ -0,0 +1,98 @@
+import json
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from app.backtest.engine import load_klines_file, run_backtest
+from app.binance.client import KLINE_DTYPE
+from app.indicators.rsi import StreamingRSI
+
+HOUR_MS = 3_600_000
+
+
+def _klines(n: int, seed: int = 0, step_ms: int = HOUR_MS) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    klines = np.zeros(n, dtype=KLINE_DTYPE)
+    klines['open_time'] = 1_700_000_000_000 + np.arange(n) * step_ms
+    klines['close_time'] = klines['open_time'] + step_ms - 1
+    klines['close'] = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return klines
+
+
+def _replay(klines: np.ndarray, threshold: float, kind: str, cooldown_ms: int):
+    """Candle-by-candle reference: StreamingRSI plus RSIMonitor's cooldown"""
+    state = StreamingRSI(14)
+    last_sent = None
+    sent = []
+    for i, (close, close_time) in enumerate(zip(klines['close'], klines['close_time'])):
+        rsi = state.update(close)
+        if rsi is None:
+            continue
+        crossed = rsi < threshold if kind == 'oversold' else rsi > threshold
+        if crossed and (last_sent is None or close_time - last_sent >= cooldown_ms):
+            last_sent = close_time
+            sent.append(i)
+    return sent
+
+
+@pytest.mark.parametrize("cooldown", [None, 4 * 3600])
+def test_backtest_matches_candle_replay(cooldown):
+    klines = {"AAAUSDT": _klines(500, seed=1), "BBBUSDT": _klines(300, seed=2)}
+
+    result = run_backtest(klines, "1h", oversold=(30, 40), overbought=(60, 70), horizons=(1, 4), cooldown=cooldown)
+
+    cooldown_ms = (cooldown or 3600) * 1000
+    for s, symbol in enumerate(result.symbols):
+        closes = klines[symbol]['close']
+        for k, threshold in enumerate(result.oversold_thresholds):
+            sent = _replay(klines[symbol], threshold, 'oversold', cooldown_ms)
+            assert result.oversold_alerts[s, k] == len(sent)
+            fwd = [closes[i + 4] / closes[i] - 1 for i in sent if i + 4 < len(closes)]
+            if fwd:
+                assert result.oversold_returns[s, k, 1] == pytest.approx(np.mean(fwd))
+        for k, threshold in enumerate(result.overbought_thresholds):
+            sent = _replay(klines[symbol], threshold, 'overbought', cooldown_ms)
+            assert result.overbought_alerts[s, k] == len(sent)
+
+
+def test_load_klines_csv_with_microsecond_times(tmp_path):
+    path = tmp_path / "BTCUSDT-1h-2025-01.csv"
+    path.write_text(
+        "1735689600000000,93576.0,94509.42,93489.03,94401.14,755.9,1735693199999999,71000000.0,125000,404.4,38000000.0,0\n"
+        "1735693200000000,94401.13,94401.14,93800.0,93900.0,500.0,1735696799999999,47000000.0,90000,250.0,23000000.0,0\n"
+    )
+
+    klines = load_klines_file(str(path))
+
+    assert klines['open_time'].tolist() == [1735689600000, 1735693200000]
+    assert klines['close_time'][0] == 1735693199999
+    assert klines['close'].tolist() == [94401.14, 93900.0]
+    assert klines['trades'].tolist() == [125000, 90000]
+
+
+def test_json_output_from_the_store_is_parseable(monkeypatch, capsys, tmp_path):
+    import app.backtest.__main__ as backtest_main
+    from app.binance.kline_store import KlineStore
+
+    store = KlineStore(str(tmp_path))
+    klines = _klines(200, seed=3)
+    klines['open_time'] = int(time.time() * 1000) - 200 * HOUR_MS + np.arange(200) * HOUR_MS
+    store.append("AAAUSDT", "1h", klines)
+
+    class OfflineClient:
+        def close(self):
+            pass
+
+    monkeypatch.setattr(backtest_main, "BinanceClient", OfflineClient)
+    monkeypatch.setattr(backtest_main, "kline_store", store)
+    monkeypatch.setattr(store, "sync", lambda *args: 0)
+    monkeypatch.setattr(sys, "argv", ["backtest", "--symbols", "AAAUSDT", "--days", "30", "--json"])
+
+    backtest_main.main()
+
+    captured = capsys.readouterr()
+    assert json.loads(captured.out)
+    assert "AAAUSDT: 200 1h klines" in captured.err
+
@@ -0,0 +1,31 @@
+from app.binance.async_client import PAGE_SIZE
+from app.binance.client import BinanceClient
+
+HOUR_MS = 3_600_000
+
+
+def _row(open_time: int):
+    return [open_time, "1", "2", "0.5", "1.5", "10", open_time + HOUR_MS - 1, "15", 3, "4", "6"]
+
+
+def test_sync_client_pages_through_the_async_client(monkeypatch):
+    client = BinanceClient()
+    requests = []
+
+    async def request(path, params, weight=1):
+        requests.append(params)
+        start = -(-params["startTime"] // HOUR_MS)  # first bar opened at or after startTime
+        return [_row(bar * HOUR_MS) for bar in range(start, min(start + params["limit"], 1500))]
+
+    monkeypatch.setattr(client._client, "_request", request)
+    try:
+        history = client.get_klines_history("BTCUSDT", "1h", 0)
+        klines = client.get_klines("BTCUSDT", "1h", 2, start_time=HOUR_MS)
+    finally:
+        client.close()
+
+    assert len(history) == 1500
+    assert list(history["open_time"][:2]) == [0, HOUR_MS]
+    assert [params["startTime"] for params in requests[:2]] == [0, (PAGE_SIZE - 1) * HOUR_MS + 1]
+    assert [kline.close_price for kline in klines] == [1.5, 1.5]
+    assert klines[0].trades_count == 3
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import app.binance.decoding as decoding
+from app.binance.decoding import FrameDecoder
+
+
+def _kline_frame(closed: bool) -> str:
+    kline = {"t": 0, "T": 3_599_999, "s": "BTCUSDT", "i": "1h", "c": "42000.5", "x": closed}
+    # Compact separators, as Binance sends them
+    return json.dumps({"stream": "btcusdt@kline_1h", "data": {"e": "kline", "s": "BTCUSDT", "k": kline}},
+                      separators=(",", ":"))
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(decoding, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_combined_stream_closed_kline_is_decoded(backend, as_bytes):
+    decoder = FrameDecoder()
+    frame = _kline_frame(closed=True)
+
+    decoded = decoder.decode(frame.encode() if as_bytes else frame)
+
+    assert decoded["stream"] == "btcusdt@kline_1h"
+    assert decoded["data"]["k"]["c"] == "42000.5"
+    assert decoded["data"]["k"]["x"] is True
+    assert (decoder.decoded, decoder.dropped) == (1, 0)
+
+
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_open_kline_is_dropped_before_parsing_unless_included(backend, as_bytes):
+    frame = _kline_frame(closed=False)
+    message = frame.encode() if as_bytes else frame
+
+    dropping = FrameDecoder()
+    assert dropping.decode(message) is None
+    assert (dropping.decoded, dropping.dropped) == (0, 1)
+
+    including = FrameDecoder(include_unclosed=True)
+    assert including.decode(message)["data"]["k"]["x"] is False
+    assert (including.decoded, including.dropped) == (1, 0)
+
+
+def test_control_and_other_frames_pass_through(backend):
+    decoder = FrameDecoder()
+
+    assert decoder.decode('{"result":null,"id":3}') == {"result": None, "id": 3}
+    assert decoder.decode(b'{"stream":"btcusdt@trade","data":{"e":"trade","p":"1.0"}}')["data"]["e"] == "trade"
+    assert decoder.dropped == 0
+
+
+def test_stdlib_fallback_is_used_without_orjson(monkeypatch):
+    monkeypatch.setattr(decoding, "orjson", None)
+    loads = []
+    monkeypatch.setattr(decoding.json, "loads", lambda message: loads.append(message) or {})
+
+    FrameDecoder().decode(_kline_frame(closed=True))
+
+    assert len(loads) == 1
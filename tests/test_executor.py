@@ -0,0 +1,52 @@
+import asyncio
+
+import numpy as np
+
+from app.indicators.executor import IndicatorExecutor, partition_by_symbol
+from app.indicators.rsi import wilder_averages_batch
+
+
+def test_partition_keeps_each_symbol_in_one_partition():
+    symbols = ["BTCUSDT", "ETHUSDT", "BTCUSDT", "SOLUSDT", "ETHUSDT"]
+    partitions = partition_by_symbol(symbols, 4)
+
+    assert sorted(np.concatenate(partitions)) == list(range(len(symbols)))
+    owners = {}
+    for partition, rows in enumerate(partitions):
+        for row in rows:
+            assert owners.setdefault(symbols[row], partition) == partition
+
+
+def test_process_backend_matches_inline():
+    rng = np.random.default_rng(3)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (40, 60)), axis=1))
+    lengths = np.full(40, 60)
+    lengths[::5] = 10  # too short for an RSI
+    symbols = [f"SYM{i % 13}USDT" for i in range(40)]
+    executor = IndicatorExecutor("process", workers=2, min_rows=1)
+
+    try:
+        avg_gain, avg_loss = asyncio.run(executor.wilder_averages_batch(prices, lengths, 14, symbols))
+    finally:
+        executor.shutdown()
+
+    expected_gain, expected_loss = wilder_averages_batch(prices, lengths, 14)
+    np.testing.assert_allclose(avg_gain, expected_gain)
+    np.testing.assert_allclose(avg_loss, expected_loss)
+
+
+def test_process_backend_rsi_series_matches_inline():
+    from app.indicators.rsi import calculate_rsi_series
+
+    rng = np.random.default_rng(4)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (30, 50)), axis=1))
+    prices[::4, 35:] = np.nan  # shorter, NaN-padded rows
+    symbols = [f"SYM{i % 7}USDT" for i in range(30)]
+    executor = IndicatorExecutor("process", workers=2, min_rows=1)
+
+    try:
+        series = asyncio.run(executor.rsi_series(prices, 14, symbols))
+    finally:
+        executor.shutdown()
+
+    np.testing.assert_allclose(series, calculate_rsi_series(prices, 14))
@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.binance.client import KLINE_DTYPE
+from app.binance.kline_store import KlineStore
+
+HOUR_MS = 3_600_000
+
+
+def _klines(start_bar: int, n: int) -> np.ndarray:
+    klines = np.zeros(n, dtype=KLINE_DTYPE)
+    klines['open_time'] = (start_bar + np.arange(n)) * HOUR_MS
+    klines['close_time'] = klines['open_time'] + HOUR_MS - 1
+    klines['close'] = 100 + np.arange(n, dtype=np.float64)
+    return klines
+
+
+def test_append_skips_stored_bars_and_reads_through_memmap(tmp_path):
+    store = KlineStore(str(tmp_path))
+    klines = _klines(0, 300)
+
+    assert store.append("BTCUSDT", "1h", klines[:200]) == 200
+    assert store.append("BTCUSDT", "1h", klines[150:]) == 100
+
+    columns = store.columns("BTCUSDT", "1h")
+    assert isinstance(columns['close'], np.memmap)
+    assert np.array_equal(columns['open_time'], klines['open_time'])
+    assert np.array_equal(store.tail("BTCUSDT", "1h", 3), klines['close'][-3:])
+    assert store.last_open_time("BTCUSDT", "1h") == klines['open_time'][-1]
+
+
+def test_append_bar_refuses_gaps(tmp_path):
+    store = KlineStore(str(tmp_path))
+    store.append("BTCUSDT", "1h", _klines(0, 10))
+
+    assert not store.append_bar("BTCUSDT", "1h", 12 * HOUR_MS, 1, 1, 1, 1, 1, 1)
+    assert store.append_bar("BTCUSDT", "1h", 10 * HOUR_MS, 1, 2, 0.5, 1.5, 10, 3)
+    assert store.length("BTCUSDT", "1h") == 11
+
+
+def test_interrupted_append_is_truncated(tmp_path):
+    store = KlineStore(str(tmp_path))
+    store.append("BTCUSDT", "1h", _klines(0, 10))
+    with open(tmp_path / "BTCUSDT" / "1h" / "close.bin", 'ab') as f:
+        f.write(b"\0" * 8)
+
+    assert KlineStore(str(tmp_path)).length("BTCUSDT", "1h") == 10
+    assert (tmp_path / "BTCUSDT" / "1h" / "close.bin").stat().st_size == 10 * 8
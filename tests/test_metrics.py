@@ -0,0 +1,58 @@
+from app.utils.metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = Registry()
+    latency = registry.histogram("step_seconds", "Step latency", ["step"], buckets=(0.1, 1))
+    latency.labels("decode").observe(0.05)
+    latency.labels("decode").observe(0.1)
+    latency.labels("decode").observe(0.5)
+    latency.labels("decode").observe(3)
+
+    lines = registry.render().splitlines()
+
+    assert lines == [
+        "# HELP step_seconds Step latency",
+        "# TYPE step_seconds histogram",
+        'step_seconds_bucket{step="decode",le="0.1"} 2',
+        'step_seconds_bucket{step="decode",le="1"} 3',
+        'step_seconds_bucket{step="decode",le="+Inf"} 4',
+        'step_seconds_sum{step="decode"} 3.65',
+        'step_seconds_count{step="decode"} 4',
+    ]
+
+
+def test_unlabelled_histogram_has_only_le():
+    registry = Registry()
+    registry.histogram("flush_seconds", "Flush latency", buckets=(1,)).observe(2)
+
+    lines = registry.render().splitlines()
+
+    assert 'flush_seconds_bucket{le="1"} 0' in lines
+    assert 'flush_seconds_bucket{le="+Inf"} 1' in lines
+    assert "flush_seconds_sum 2.0" in lines
+    assert "flush_seconds_count 1" in lines
+
+
+def test_label_values_and_help_are_escaped():
+    registry = Registry()
+    errors = registry.counter("errors_total", 'Errors by "kind"\nsee C:\\logs', ["kind"])
+    errors.labels('bad "quote"\\path\nnext').inc()
+
+    lines = registry.render().splitlines()
+
+    assert lines == [
+        '# HELP errors_total Errors by "kind"\\nsee C:\\\\logs',
+        "# TYPE errors_total counter",
+        'errors_total{kind="bad \\"quote\\"\\\\path\\nnext"} 1.0',
+    ]
+
+
+def test_gauge_function_is_read_at_render_time():
+    registry = Registry()
+    depth = registry.gauge("queue_depth", "Queued closes", ["queue"])
+    items = [1, 2]
+    depth.labels("close").set_function(lambda: len(items))
+    items.append(3)
+
+    assert 'queue_depth{queue="close"} 3' in registry.render().splitlines()
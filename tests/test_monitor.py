@@ -0,0 +1,272 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.binance.client import KLINE_DTYPE
+from app.binance.kline_store import KlineStore
+from app.bot.monitor import RSIMonitor
+from app.indicators.rsi import calculate_rsi_series
+
+
+def _monitor() -> RSIMonitor:
+    monitor = RSIMonitor()
+    monitor.ws_client.kline_store = None
+    monitor.batch_window = 0
+    return monitor
+
+
+def test_close_arriving_mid_flush_is_evaluated():
+    monitor = _monitor()
+    evaluated = []
+    release = asyncio.Event()
+
+    async def update_rsi_batch(pending, **kwargs):
+        evaluated.extend(pending)
+        if len(evaluated) == 1:
+            await release.wait()  # first batch still running when the next close arrives
+        return {}
+
+    monitor._update_rsi_batch = update_rsi_batch
+
+    async def run():
+        await monitor._on_price_update("AAA", "1h", np.arange(20.0))
+        await asyncio.sleep(0.01)
+        await monitor._on_price_update("BBB", "1h", np.arange(20.0))
+        release.set()
+        await asyncio.wait_for(monitor._flush_task, 1)
+
+    asyncio.run(run())
+
+    assert evaluated == [("AAA", "1h"), ("BBB", "1h")]
+    assert not monitor.pending_closes
+
+
+def test_reset_during_cold_seeding_does_not_drop_the_batch(monkeypatch):
+    import app.bot.monitor as monitor_module
+
+    monitor = _monitor()
+    history = 100 + np.sin(np.arange(60.0))
+    warm_closes = {("WARM", "1h"): [history]}
+    asyncio.run(monitor._update_rsi_batch(warm_closes))
+    seed = monitor_module.indicator_executor.wilder_averages_batch
+
+    async def wilder_averages_batch(*args, **kwargs):
+        # The warm pair is resynced while the cold pair is being seeded
+        monitor._reset_rsi_state("WARM", "1h")
+        return await seed(*args, **kwargs)
+
+    monkeypatch.setattr(monitor_module.indicator_executor, "wilder_averages_batch", wilder_averages_batch)
+    rsi_values = asyncio.run(monitor._update_rsi_batch({
+        ("WARM", "1h"): [np.append(history[1:], 101.0)],
+        ("COLD", "1h"): [history],
+    }))
+
+    assert set(rsi_values) == {("WARM", "1h"), ("COLD", "1h")}
+
+
+def test_live_price_returns_while_alerts_are_still_sending():
+    monitor = _monitor()
+    monitor.live_min_interval = 0
+    history = 100 + np.sin(np.arange(60.0))
+    sent = []
+    release = asyncio.Event()
+
+    async def create_alert(symbol, interval, rsi, alert_type, provisional=False):
+        await release.wait()  # a rate-limited Telegram fan-out
+        sent.append(alert_type)
+
+    monitor.create_alert = create_alert
+
+    async def run():
+        await monitor._update_rsi_batch({("AAA", "1h"): [history]})
+        await asyncio.wait_for(monitor._on_live_price("AAA", "1h", 99.0), 0.1)
+        await asyncio.wait_for(monitor._on_live_price("AAA", "1h", 98.0), 0.1)  # skipped, still sending
+        release.set()
+        await monitor._live_alert_tasks[("AAA", "1h")]
+
+    asyncio.run(run())
+
+    assert sent == ["oversold", "overbought"]
+
+
+def test_close_workers_wait_while_the_pending_batch_is_full():
+    monitor = _monitor()
+    monitor.max_pending_closes = 2
+    release = asyncio.Event()
+
+    async def update_rsi_batch(pending, **kwargs):
+        await release.wait()
+        return {}
+
+    monitor._update_rsi_batch = update_rsi_batch
+
+    async def run():
+        monitor.batch_window = 0.05
+        await monitor._on_price_update("AAA", "1h", np.arange(20.0))
+        await monitor._on_price_update("BBB", "1h", np.arange(20.0))
+        third = asyncio.create_task(monitor._on_price_update("CCC", "1h", np.arange(20.0)))
+        await asyncio.sleep(0.01)
+        assert not third.done()  # batch full and not taken yet
+        await asyncio.sleep(0.1)
+        assert third.done()  # the flush took the batch
+        assert list(monitor.pending_closes) == [("CCC", "1h")]
+        release.set()
+        await monitor._flush_task
+
+    asyncio.run(run())
+
+
+def test_subscription_reload_queries_off_the_loop_and_swaps_the_index(monkeypatch):
+    import app.bot.monitor as monitor_module
+    from app.bot.subscriptions import SubscriptionIndex
+
+    index = SubscriptionIndex()
+    index.add("OLD", "1h", 1, 101, 30, 70)
+    before = index._by_pair
+    monkeypatch.setattr(monitor_module, "subscriptions", index)
+    monitor = _monitor()
+    applied = []
+
+    async def run_db(fn, *args):
+        assert fn is SubscriptionIndex.load  # only the query leaves the loop
+        assert index._by_pair is before
+        return {("NEW", "1h"): {(2, 102): (25, 75)}}
+
+    async def apply_pairs(pairs):
+        applied.append(pairs)
+
+    monkeypatch.setattr(monitor_module, "run_db", run_db)
+    monitor._apply_pairs = apply_pairs
+
+    asyncio.run(monitor.update_subscribed_symbols())
+
+    assert applied == [{("NEW", "1h")}]
+    assert before == {("OLD", "1h"): before[("OLD", "1h")]}  # the old map was replaced, not cleared
+    assert index.oversold_recipients("NEW", "1h", 20) == [(2, 102)]
+
+
+def test_pair_added_while_the_stream_reconnects_is_warmed_up():
+    monitor = _monitor()
+    monitor.ws_client.running = True  # stream running, every shard in reconnect backoff
+    warmed = []
+
+    async def warm_up(pairs):
+        warmed.extend(pairs)
+
+    async def update_streams(pairs):
+        pass
+
+    monitor.warm_up = warm_up
+    monitor.ws_client.update_streams = update_streams
+
+    asyncio.run(monitor._apply_pairs({("AAA", "1h")}))
+
+    assert not monitor.ws_client.connections
+    assert warmed == [("AAA", "1h")]
+
+
+def test_close_seeded_during_a_warm_up_does_not_overwrite_it(monkeypatch):
+    import app.bot.monitor as monitor_module
+
+    monitor = _monitor()
+    pair = ("AAA", "1h")
+    older = 100 + np.sin(np.arange(60.0))
+    newer = np.append(older[1:], 250.0)
+    seed = monitor_module.indicator_executor.wilder_averages_batch
+    calls = []
+    release = asyncio.Event()
+
+    async def wilder_averages_batch(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            await release.wait()  # the batch's seeding is slow, e.g. on the process pool
+        return await seed(*args, **kwargs)
+
+    monkeypatch.setattr(monitor_module.indicator_executor, "wilder_averages_batch", wilder_averages_batch)
+
+    async def run():
+        batch = asyncio.create_task(monitor._update_rsi_batch({pair: [older]}))
+        await asyncio.sleep(0)
+        monitor._reset_rsi_state(*pair)
+        await monitor._update_rsi_batch({pair: [newer]}, reseed=True)
+        release.set()
+        await batch
+
+    asyncio.run(run())
+
+    assert monitor.indicators[pair].values["close"] == 250.0
+    assert monitor.rsi_state[(*pair, monitor.rsi_period)] is monitor.indicators[pair].nodes[0].state
+
+
+def test_rules_see_every_close_of_a_batch_in_order():
+    monitor = RSIMonitor(alert_rules="above_100: close > 100")
+    monitor.ws_client.kline_store = None
+    fired = []
+
+    async def create_alert(*args, **kwargs):
+        pass
+
+    async def create_rule_alert(symbol, interval, rule, values):
+        fired.append(values["close"])
+
+    monitor.create_alert = create_alert
+    monitor.create_rule_alert = create_rule_alert
+    history = 95 + np.sin(np.arange(60.0))
+    windows = [np.append(history, closes) for closes in ([101.0], [101.0, 99.0], [101.0, 99.0, 102.0])]
+
+    async def run():
+        await monitor._evaluate_closes({("AAA", "1h"): [history]})
+        await monitor._evaluate_closes({("AAA", "1h"): windows})
+
+    asyncio.run(run())
+
+    assert fired == [101.0, 102.0]
+
+
+class StubRestClient:
+    """Serves closed hourly bars ending just before now; pairs in `failing` return nothing"""
+
+    def __init__(self, now_ms: int, bars: int, failing=()):
+        hour_ms = 3_600_000
+        last_open = now_ms // hour_ms * hour_ms - hour_ms
+        self.klines = np.zeros(bars, dtype=KLINE_DTYPE)
+        self.klines['open_time'] = last_open - hour_ms * np.arange(bars)[::-1]
+        self.klines['close_time'] = self.klines['open_time'] + hour_ms - 1
+        self.klines['close'] = 100 + np.sin(np.arange(bars, dtype=np.float64))
+        self.failing = set(failing)
+        self.calls = []
+
+    async def get_klines(self, symbol, interval, limit, start_time=None):
+        self.calls.append((symbol, interval))
+        if (symbol, interval) in self.failing:
+            return self.klines[:0]
+        klines = self.klines[self.klines['open_time'] >= (start_time or 0)]
+        return klines[:limit]
+
+
+def test_warm_up_seeds_history_and_rsi_for_cold_pairs_only(tmp_path, monkeypatch):
+    import app.bot.monitor as monitor_module
+
+    monkeypatch.setattr(monitor_module, "kline_store", KlineStore(str(tmp_path)))
+    monitor = _monitor()
+    rest = monitor.rest_client = StubRestClient(int(time.time() * 1000), 150, failing={("STALE", "1h")})
+    warm_history = 100 + np.cos(np.arange(60.0))
+    asyncio.run(monitor._update_rsi_batch({("WARM", "1h"): [warm_history]}))
+    warm_state = monitor.rsi_state[("WARM", "1h", monitor.rsi_period)]
+
+    asyncio.run(monitor.warm_up([("COLD", "1h"), ("STALE", "1h")]))
+
+    capacity = monitor.ws_client.price_data.capacity
+    closes = rest.klines['close'][-capacity:]
+    cold = monitor.rsi_state[("COLD", "1h", monitor.rsi_period)]
+    assert cold.value == pytest.approx(calculate_rsi_series(closes[None], monitor.rsi_period)[0, -1])
+    assert monitor.ws_client.price_data.last_open_time(("COLD", "1h")) == rest.klines['open_time'][-1]
+    assert np.array_equal(monitor.ws_client.price_data.get(("COLD", "1h")), closes)
+    # A pair whose sync came back empty is not seeded from nothing
+    assert ("STALE", "1h", monitor.rsi_period) not in monitor.rsi_state
+    assert monitor.ws_client.price_data.last_open_time(("STALE", "1h")) is None
+    # Pairs outside the warm-up keep their state and are never fetched
+    assert monitor.rsi_state[("WARM", "1h", monitor.rsi_period)] is warm_state
+    assert ("WARM", "1h") not in rest.calls
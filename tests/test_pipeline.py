@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from app.indicators.rules import parse_rules
+from app.indicators.pipeline import IndicatorPipeline
+from app.indicators.rsi import StreamingRSI, calculate_rsi_series
+
+
+def _closes(n: int = 120) -> np.ndarray:
+    return 100 * np.exp(np.cumsum(np.random.default_rng(7).normal(0, 0.01, n)))
+
+
+def _ema(x: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    out[period - 1] = x[:period].mean()
+    alpha = 2 / (period + 1)
+    for i in range(period, len(x)):
+        out[i] = out[i - 1] + alpha * (x[i] - out[i - 1])
+    return out
+
+
+def test_shared_dependencies_are_resolved_once_in_order():
+    pipeline = IndicatorPipeline(['macd', 'ema_12', 'stoch_rsi_k', 'rsi'])
+
+    assert pipeline.outputs == [
+        'ema_12', 'ema_26', 'macd', 'macd_signal', 'macd_hist', 'rsi', 'stoch_rsi_k', 'stoch_rsi_d',
+    ]
+    with pytest.raises(ValueError):
+        IndicatorPipeline(['vwap'])
+
+
+def test_outputs_match_full_recomputation():
+    closes = _closes()
+    indicators = IndicatorPipeline(['macd', 'stoch_rsi_d', 'bb_percent_b']).create()
+    for close in closes:
+        values = indicators.update(close)
+
+    ema_12, ema_26 = _ema(closes, 12), _ema(closes, 26)
+    macd = (ema_12 - ema_26)[25:]
+    signal = _ema(macd, 9)
+    assert values['macd'] == pytest.approx(macd[-1])
+    assert values['macd_signal'] == pytest.approx(signal[-1])
+
+    rsi = calculate_rsi_series(closes)[0]
+    assert values['rsi'] == pytest.approx(rsi[-1])
+    windows = np.lib.stride_tricks.sliding_window_view(rsi[14:], 14)
+    stoch = 100 * (windows[:, -1] - windows.min(axis=1)) / (windows.max(axis=1) - windows.min(axis=1))
+    k = np.convolve(stoch, np.ones(3) / 3, mode='valid')
+    d = np.convolve(k, np.ones(3) / 3, mode='valid')
+    assert values['stoch_rsi_k'] == pytest.approx(k[-1])
+    assert values['stoch_rsi_d'] == pytest.approx(d[-1])
+
+    window = closes[-20:]
+    upper, lower = window.mean() + 2 * window.std(), window.mean() - 2 * window.std()
+    assert values['bb_upper'] == pytest.approx(upper)
+    assert values['bb_percent_b'] == pytest.approx((closes[-1] - lower) / (upper - lower))
+
+
+def test_seed_reuses_precomputed_rsi_series():
+    closes = _closes()
+    pipeline = IndicatorPipeline(['stoch_rsi_k', 'macd_hist'])
+    stepped = pipeline.create()
+    for close in closes[:100]:
+        stepped.update(close)
+
+    rsi = StreamingRSI()
+    rsi.seed(closes[:100])
+    seeded = pipeline.create(rsi)
+    seeded.seed(closes[:100], {'rsi': calculate_rsi_series(closes[:100])[0]})
+
+    for close in closes[100:]:
+        expected = stepped.update(close)
+        values = seeded.update(close)
+    assert values == pytest.approx(expected)
+
+
+def test_parse_rules():
+    rules = parse_rules("macd_cross_up: macd > macd_signal, rsi < 50; stoch_oversold: stoch_rsi_k <= 20")
+
+    assert [rule.name for rule in rules] == ["macd_cross_up", "stoch_oversold"]
+    assert rules[0].outputs == ['macd', 'macd_signal', 'rsi']
+    assert rules[0].evaluate({'macd': 1.0, 'macd_signal': 0.5, 'rsi': 40.0}) is True
+    assert rules[0].evaluate({'macd': 1.0, 'macd_signal': None, 'rsi': 40.0}) is None
+    assert rules[1].evaluate({'stoch_rsi_k': 25.0}) is False
+    with pytest.raises(ValueError):
+        parse_rules("broken rule")
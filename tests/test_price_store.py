@@ -0,0 +1,62 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.binance.price_store import PriceRingBuffer
+from app.binance.websocket import BinanceWebSocketClient
+
+HOUR_MS = 3_600_000
+
+
+def test_append_across_the_wrap_point_stays_chronological():
+    buffer = PriceRingBuffer(4)
+    for i in range(11):  # wraps twice and stops mid-ring
+        buffer.append(float(i), i * HOUR_MS)
+        expected = np.arange(max(0, i - 3), i + 1, dtype=np.float64)
+        assert np.array_equal(buffer.view(), expected)
+        assert np.array_equal(buffer.times(), (expected * HOUR_MS).astype(np.int64))
+
+    assert len(buffer) == 4
+    assert buffer.latest() == 10.0
+    assert buffer.last_time() == 10 * HOUR_MS
+
+
+def test_views_are_read_only_and_copies_survive_later_appends():
+    buffer = PriceRingBuffer(3)
+    buffer.extend([1.0, 2.0, 3.0])
+    window = buffer.view()
+    kept = window.copy()
+
+    with pytest.raises(ValueError):
+        window[0] = 0.0
+    buffer.extend([4.0, 5.0])
+
+    assert list(kept) == [1.0, 2.0, 3.0]
+    assert list(buffer.view()) == [3.0, 4.0, 5.0]
+
+
+def test_windows_handed_to_callbacks_are_not_overwritten_by_later_closes():
+    client = BinanceWebSocketClient(price_history_size=3)
+    windows = []
+
+    async def on_close(symbol, interval, prices):
+        windows.append(prices)
+
+    client.add_callback(on_close)
+
+    async def run():
+        # All closes are stored before a worker runs, so the ring wraps under the queued windows
+        for bar in range(6):
+            await client._handle_kline_data({"k": {
+                "t": bar * HOUR_MS, "T": (bar + 1) * HOUR_MS - 1, "s": "BTCUSDT", "i": "1h",
+                "o": "1", "h": "1", "l": "1", "c": str(bar), "v": "1", "n": 1, "x": True,
+            }})
+        await client.close_queue.join()
+        await client.stop_workers()
+
+    asyncio.run(run())
+
+    assert [list(window) for window in windows] == [
+        [0], [0, 1], [0, 1, 2], [1, 2, 3], [2, 3, 4], [3, 4, 5],
+    ]
@@ -0,0 +1,121 @@
+import asyncio
+import types
+
+import pytest
+
+import app.bot.rate_limit as rate_limit
+from app.bot.rate_limit import TelegramRateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the limiter sleeps"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limit, "asyncio", types.SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+
+def test_burst_up_to_capacity_then_waits_for_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    async def run():
+        for _ in range(3):
+            await bucket.acquire()
+        assert clock.sleeps == []
+        await bucket.acquire()
+
+    asyncio.run(run())
+
+    # The fourth token needs half a second at 2 tokens/s
+    assert clock.sleeps == [pytest.approx(0.5)]
+    assert bucket.tokens == pytest.approx(0)
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=5, capacity=2)
+
+    async def run():
+        await bucket.acquire()
+        await bucket.acquire()
+        clock.now += 60
+        assert bucket.is_full
+        for _ in range(3):
+            await bucket.acquire()
+
+    asyncio.run(run())
+
+    # A long idle period still only banks `capacity` tokens
+    assert len(clock.sleeps) == 1
+    assert clock.sleeps[0] == pytest.approx(0.2)
+
+
+def test_partial_refill(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+
+    async def run():
+        await bucket.acquire()
+        clock.now += 0.25
+        await bucket.acquire()
+
+    asyncio.run(run())
+
+    assert clock.sleeps == [pytest.approx(0.75)]
+
+
+def test_per_chat_limit_does_not_block_other_chats(clock):
+    limiter = TelegramRateLimiter(global_rate=30, per_chat_rate=1)
+
+    async def run():
+        for chat_id in range(10):
+            await limiter.acquire(chat_id)
+        assert clock.sleeps == []
+        await limiter.acquire(0)
+
+    asyncio.run(run())
+
+    # Only the repeat message to chat 0 waits, for a full second
+    assert clock.sleeps == [pytest.approx(1)]
+
+
+def test_global_limit_applies_across_chats(clock):
+    limiter = TelegramRateLimiter(global_rate=3, per_chat_rate=1)
+
+    async def run():
+        for chat_id in range(4):
+            await limiter.acquire(chat_id)
+
+    asyncio.run(run())
+
+    # Each chat is fresh, so the wait comes from the global bucket
+    assert clock.sleeps == [pytest.approx(1 / 3)]
+    assert set(limiter.chat_buckets) == {0, 1, 2, 3}
+
+
+def test_idle_chat_buckets_are_evicted(clock, monkeypatch):
+    monkeypatch.setattr(TelegramRateLimiter, "MAX_IDLE_CHATS", 2)
+    limiter = TelegramRateLimiter(global_rate=30, per_chat_rate=1)
+
+    async def run():
+        await limiter.acquire(1)
+        await limiter.acquire(2)
+        clock.now += 5
+        await limiter.acquire(3)
+
+    asyncio.run(run())
+
+    assert set(limiter.chat_buckets) == {3}
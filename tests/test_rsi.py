@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from app.indicators.rsi import (
+    StreamingRSI, calculate_rsi, calculate_rsi_batch, calculate_rsi_series, wilder_averages_batch,
+)
+
+
+def _random_walk(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return list(100 + np.cumsum(rng.normal(0, 1, n)))
+
+
+@pytest.mark.parametrize("period", [2, 14, 21])
+def test_streaming_rsi_matches_calculate_rsi(period):
+    prices = _random_walk(200)
+    expected = calculate_rsi(prices, period=period)
+
+    state = StreamingRSI(period)
+    streamed = [state.update(p) for p in prices]
+
+    assert streamed[:period] == [None] * period
+    assert streamed[period:] == pytest.approx(expected, abs=1e-9)
+
+
+def test_streaming_rsi_seed_matches_last_value():
+    prices = _random_walk(100, seed=1)
+    state = StreamingRSI(14)
+    assert state.seed(prices) == pytest.approx(calculate_rsi(prices)[-1], abs=1e-9)
+
+
+def test_peek_does_not_commit_state():
+    prices = _random_walk(50, seed=2)
+    state = StreamingRSI(14)
+    state.seed(prices[:-1])
+    before = (state.avg_gain, state.avg_loss, state.count, state.last_price, state.value)
+
+    peeked = state.peek(prices[-1])
+
+    assert (state.avg_gain, state.avg_loss, state.count, state.last_price, state.value) == before
+    assert peeked == pytest.approx(state.update(prices[-1]))
+
+
+def test_streaming_rsi_no_losses_is_100():
+    state = StreamingRSI(14)
+    assert state.seed(range(1, 20)) == 100
+
+
+def test_calculate_rsi_batch_matches_calculate_rsi():
+    rng = np.random.default_rng(3)
+    lengths = np.array([100, 15, 60, 10, 100])
+    matrix = np.full((len(lengths), lengths.max()), np.nan)
+    series = []
+    for row, length in enumerate(lengths):
+        prices = list(100 + np.cumsum(rng.normal(0, 1, length)))
+        matrix[row, :length] = prices
+        series.append(prices)
+
+    rsi = calculate_rsi_batch(matrix, lengths, period=14)
+
+    for row, prices in enumerate(series):
+        expected = calculate_rsi(prices, period=14)
+        if expected:
+            assert rsi[row] == pytest.approx(expected[-1], abs=1e-9)
+        else:
+            assert np.isnan(rsi[row])
+
+
+def test_batch_averages_restore_streaming_state():
+    prices = _random_walk(80, seed=4)
+    avg_gain, avg_loss = wilder_averages_batch(np.array([prices[:-1]]), np.array([79]))
+    state = StreamingRSI.from_averages(14, avg_gain[0], avg_loss[0], prices[-2], 78)
+
+    assert state.update(prices[-1]) == pytest.approx(calculate_rsi(prices)[-1], abs=1e-9)
+
+
+def test_calculate_rsi_series_matches_calculate_rsi():
+    lengths = [10, 15, 60, 120]
+    prices = np.full((len(lengths), max(lengths)), np.nan)
+    for row, n in enumerate(lengths):
+        prices[row, :n] = _random_walk(n, seed=row)
+
+    series = calculate_rsi_series(prices, period=14)
+
+    for row, n in enumerate(lengths):
+        expected = calculate_rsi(list(prices[row, :n]), period=14)
+        assert np.isnan(series[row, :14]).all()
+        assert np.isnan(series[row, n:]).all()
+        assert series[row, 14:n] == pytest.approx(expected, abs=1e-9)
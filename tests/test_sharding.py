@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from app.binance.sharding import ConsistentHashRing
+from app.binance.websocket import BinanceWebSocketClient
+
+STREAMS = [f"sym{i}usdt@kline_1h" for i in range(300)]
+
+
+def test_assign_places_every_key_once_within_capacity():
+    ring = ConsistentHashRing(4)
+    assignment = ring.assign(STREAMS, max_per_shard=90)
+
+    assigned = [key for keys in assignment.values() for key in keys]
+    assert sorted(assigned) == sorted(STREAMS)
+    assert max(len(keys) for keys in assignment.values()) <= 90
+    assert ring.assign(reversed(STREAMS), max_per_shard=90) == assignment
+
+
+def test_adding_a_shard_moves_only_part_of_the_keys():
+    before = ConsistentHashRing(4)
+    after = ConsistentHashRing(5)
+
+    moved = [key for key in STREAMS if before.shard_for(key) != after.shard_for(key)]
+    assert 0 < len(moved) < len(STREAMS) / 2
+    assert all(after.shard_for(key) == 4 for key in moved)
+
+
+class RecordingSocket:
+    def __init__(self, shard, log):
+        self.shard = shard
+        self.log = log
+
+    async def send(self, message):
+        request = json.loads(message)
+        self.log.append((request["method"], self.shard, request["params"]))
+
+
+def test_streams_moving_between_shards_are_subscribed_before_any_unsubscribe():
+    client = BinanceWebSocketClient(streams_per_connection=2)
+    pairs = [(f"SYM{i}USDT", "1h") for i in range(4)]
+    planned = client._plan_shards({client._stream_name(*pair) for pair in pairs})
+    assert len(planned) == 2
+    log = []
+    client.running = True
+    for shard in planned:
+        client.connections[shard] = RecordingSocket(shard, log)
+        client.shard_tasks[shard] = object()  # connected shard, no reader needed here
+    # Each shard currently carries the streams the new plan gives to the other one
+    first, second = sorted(planned)
+    client._active_streams = {first: set(planned[second]), second: set(planned[first])}
+
+    asyncio.run(client.update_streams(pairs))
+
+    methods = [method for method, _, _ in log]
+    assert methods == ["SUBSCRIBE", "SUBSCRIBE", "UNSUBSCRIBE", "UNSUBSCRIBE"]
+    assert client._active_streams == planned
+    subscribed = {shard: set(streams) for method, shard, streams in log if method == "SUBSCRIBE"}
+    assert subscribed == planned
+
+
+def test_shard_dropping_while_streams_are_updated_is_skipped():
+    client = BinanceWebSocketClient(streams_per_connection=2)
+    pairs = [(f"SYM{i}USDT", "1h") for i in range(4)]
+    planned = client._plan_shards({client._stream_name(*pair) for pair in pairs})
+    log = []
+    client.running = True
+    for shard in planned:
+        client.connections[shard] = RecordingSocket(shard, log)
+        client.shard_tasks[shard] = object()
+        client._active_streams[shard] = set(planned[shard])
+    kept, dropped = sorted(planned)
+
+    class DroppingSocket(RecordingSocket):
+        async def send(self, message):
+            await super().send(message)
+            client.connections.pop(dropped, None)  # the other shard's connection drops meanwhile
+
+    client.connections[kept] = DroppingSocket(kept, log)
+    client._active_streams[kept].pop()  # one stream still to subscribe on the kept shard
+    remaining = [pair for pair in pairs if client._stream_name(*pair) in planned[kept]]
+
+    asyncio.run(client.update_streams(remaining))
+
+    assert client._plan_shards(set(planned[kept])) == {kept: planned[kept]}
+    assert [method for method, _, _ in log] == ["SUBSCRIBE"]
+    assert dropped not in client.connections
@@ -0,0 +1,105 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.bot.subscriptions import SubscriptionIndex, ThresholdIndex
+from app.db.models.user import User
+from app.db.models.user_symbol import UserSymbol
+from app.db.session import Base
+
+
+def _index() -> ThresholdIndex:
+    index = ThresholdIndex()
+    index.add((1, 101), 25, 75)
+    index.add((2, 102), 30, 70)
+    index.add((3, 103), 35, 65)
+    return index
+
+
+def test_oversold_is_strictly_below_the_threshold():
+    index = _index()
+
+    assert index.oversold(30.0) == [(3, 103)]
+    assert index.oversold(29.99) == [(2, 102), (3, 103)]
+    assert index.oversold(25) == [(2, 102), (3, 103)]
+    assert index.oversold(35) == []
+
+
+def test_overbought_is_strictly_above_the_threshold():
+    index = _index()
+
+    assert index.overbought(70.0) == [(3, 103)]
+    assert index.overbought(70.01) == [(3, 103), (2, 102)]
+    assert index.overbought(75) == [(3, 103), (2, 102)]
+    assert index.overbought(65) == []
+
+
+def test_refiled_recipient_is_found_only_at_its_new_level():
+    index = _index()
+    index.add((2, 102), 20, 80)
+
+    assert index.oversold(22) == [(1, 101), (3, 103)]
+    assert index.overbought(76) == [(3, 103), (1, 101)]
+    index.remove((1, 101))
+    assert index.oversold(22) == [(3, 103)]
+    assert len(index) == 2
+
+
+def test_recipients_sharing_a_threshold_are_excluded_together_at_equality():
+    index = ThresholdIndex()
+    index.add((1, 101), 30, 70)
+    index.add((2, 102), 30, 70)
+
+    assert index.oversold(30) == []
+    assert index.oversold(29.999) == [(1, 101), (2, 102)]
+    assert index.overbought(70) == []
+    assert index.overbought(70.001) == [(1, 101), (2, 102)]
+
+
+def test_add_then_remove_leaves_the_index_as_it_was():
+    subscriptions = SubscriptionIndex()
+    subscriptions.add("BTCUSDT", "1h", 1, 101, 30, 70)
+    before = subscriptions._snapshot()
+
+    subscriptions.add("BTCUSDT", "1h", 2, 102, 25, 75)
+    subscriptions.add("ETHUSDT", "4h", 2, 102, 25, 75)
+    subscriptions.remove("BTCUSDT", "1h", 2)
+    subscriptions.remove("ETHUSDT", "4h", 2)
+
+    assert subscriptions._snapshot() == before
+    assert subscriptions.pairs() == {("BTCUSDT", "1h")}
+    assert subscriptions.oversold_recipients("BTCUSDT", "1h", 20) == [(1, 101)]
+    assert subscriptions.overbought_recipients("BTCUSDT", "1h", 80) == [(1, 101)]
+    # Removing what is not there is a no-op
+    subscriptions.remove("ETHUSDT", "4h", 2)
+    subscriptions.remove("BTCUSDT", "1h", 9)
+    assert subscriptions._snapshot() == before
+
+
+def test_reconcile_replaces_stale_entries():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user = User(id=1, telegram_id=101)
+        db.add(user)
+        db.add(UserSymbol(user_id=1, symbol="BTCUSDT", interval="1h",
+                          rsi_oversold_threshold=20, rsi_overbought_threshold=80))
+        db.commit()
+
+        subscriptions = SubscriptionIndex()
+        # Stale state: a pair nobody follows any more and old thresholds
+        subscriptions.add("ETHUSDT", "4h", 7, 107, 30, 70)
+        subscriptions.add("BTCUSDT", "1h", 1, 101, 30, 70)
+
+        assert subscriptions.reconcile(db) is True
+        assert subscriptions.loaded
+        assert subscriptions.pairs() == {("BTCUSDT", "1h")}
+        assert subscriptions.oversold_recipients("BTCUSDT", "1h", 25) == []
+        assert subscriptions.oversold_recipients("BTCUSDT", "1h", 19) == [(1, 101)]
+        assert subscriptions.recipients("ETHUSDT", "4h") == []
+
+        # Nothing changed since, so the second pass is a no-op
+        assert subscriptions.reconcile(db) is False
+    finally:
+        db.close()
+        engine.dispose()
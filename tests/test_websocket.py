@@ -0,0 +1,190 @@
+import asyncio
+import json
+
+import app.binance.websocket as websocket_module
+from app.binance.close_queue import CloseQueue
+from app.binance.kline_store import KlineStore
+from app.binance.websocket import BinanceWebSocketClient
+from app.utils.backoff import backoff_delay
+
+HOUR_MS = 3_600_000
+
+
+def _closed(bar: int, close: float) -> dict:
+    return {"s": "BTCUSDT", "k": {
+        "t": bar * HOUR_MS, "T": (bar + 1) * HOUR_MS - 1, "s": "BTCUSDT", "i": "1h",
+        "o": "1", "h": "1", "l": "1", "c": str(close), "v": "1", "n": 1, "x": True,
+    }}
+
+
+def test_duplicate_closes_are_dropped_and_gaps_backfilled():
+    client = BinanceWebSocketClient()
+    client.BACKFILL_BATCH_WINDOW = 0
+    seen = []
+    backfilled = []
+
+    async def on_close(symbol, interval, prices):
+        seen.append(float(prices[-1]))
+
+    async def backfill(pairs):
+        backfilled.extend(pairs)
+        client.seed_prices("BTCUSDT", "1h", [0, 1, 2, 3], [0, HOUR_MS, 2 * HOUR_MS, 3 * HOUR_MS])
+
+    client.add_callback(on_close)
+    client.backfill_handler = backfill
+    client.seed_prices("BTCUSDT", "1h", [0, 1], [0, HOUR_MS])
+
+    async def run():
+        await client._handle_kline_data(_closed(1, 1))  # already stored
+        await client._handle_kline_data(_closed(2, 2))
+        await client._handle_kline_data(_closed(4, 4))  # bar 3 missing
+        await client._handle_kline_data(_closed(5, 5))  # held during the backfill
+        await client._backfill_task
+        await client.close_queue.join()
+        await client.stop_workers()
+
+    asyncio.run(run())
+
+    assert backfilled == [("BTCUSDT", "1h")]
+    assert seen == [2, 4, 5]
+    assert list(client.get_price_data("BTCUSDT", "1h")) == [0, 1, 2, 3, 4, 5]
+    assert list(client.price_data.times(("BTCUSDT", "1h"))) == [bar * HOUR_MS for bar in range(6)]
+
+
+class FakeSocket:
+    """Websocket stand-in fed through a queue"""
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.closed = False
+        self.latency = 0.0
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        self.closed = True
+        self.queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.queue.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+def _frame(bar: int, close: float) -> str:
+    return json.dumps({"stream": "btcusdt@kline_1h", "data": _closed(bar, close)})
+
+
+def test_rotation_overlaps_connections_without_losing_or_repeating_closes(monkeypatch):
+    sockets = []
+
+    async def connect(url):
+        sockets.append(FakeSocket())
+        return sockets[-1]
+
+    monkeypatch.setattr(websocket_module.websockets, "connect", connect)
+    client = BinanceWebSocketClient()
+    client.MAX_CONNECTION_AGE = 0.05
+    client.HEALTH_CHECK_INTERVAL = 0.01
+    seen = []
+
+    async def on_close(symbol, interval, prices):
+        seen.append(float(prices[-1]))
+
+    client.add_callback(on_close)
+
+    async def run():
+        stream = asyncio.create_task(client.start_stream([("BTCUSDT", "1h")]))
+        while not sockets:
+            await asyncio.sleep(0.01)
+        old = sockets[0]
+        old.queue.put_nowait(_frame(0, 0))
+        old.queue.put_nowait(_frame(1, 1))
+        while len(sockets) < 2:
+            await asyncio.sleep(0.01)
+        new = sockets[1]
+        # Both connections deliver bar 2 while the standby is being confirmed
+        new.queue.put_nowait(_frame(2, 2))
+        old.queue.put_nowait(_frame(2, 2))
+        while not old.closed:
+            await asyncio.sleep(0.01)
+        new.queue.put_nowait(_frame(3, 3))
+        await asyncio.sleep(0.02)
+        await client.close_queue.join()
+        assert client.connections[0] is new
+        await client.stop_stream()
+        await asyncio.gather(stream, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert seen == [0, 1, 2, 3]
+
+
+def test_backoff_delay_grows_and_is_capped():
+    for attempt in range(1, 10):
+        assert 0 <= backoff_delay(attempt, 1, 60) <= min(60, 2 ** (attempt - 1))
+
+
+def test_close_queue_keeps_pair_order_and_coalesces_when_full():
+    queue = CloseQueue(maxsize=2, policy="coalesce")
+    handled = []
+
+    async def handler(key, item, skipped):
+        await asyncio.sleep(0)
+        handled.append((key, item, skipped))
+
+    async def run():
+        assert queue.put("A", 1) == "queued"
+        assert queue.put("A", 2) == "queued"
+        assert queue.put("A", 3) == "coalesced"  # full: A keeps only its latest
+        assert queue.put("B", 1) == "queued"  # B has nothing waiting, so it is never dropped
+        workers = [asyncio.create_task(queue.work(handler)) for _ in range(2)]
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+
+    asyncio.run(run())
+
+    assert [(item, skipped) for key, item, skipped in handled if key == "A"] == [(3, True)]
+    assert [(item, skipped) for key, item, skipped in handled if key == "B"] == [(1, False)]
+
+
+def test_close_queue_drop_policy_flags_the_next_close():
+    queue = CloseQueue(maxsize=1, policy="drop")
+    handled = []
+
+    async def handler(key, item, skipped):
+        handled.append((item, skipped))
+
+    async def run():
+        queue.put("A", 1)
+        assert queue.put("A", 2) == "dropped"
+        worker = asyncio.create_task(queue.work(handler))
+        await queue.join()
+        queue.put("A", 3)
+        await queue.join()
+        worker.cancel()
+
+    asyncio.run(run())
+
+    assert handled == [(1, False), (3, True)]
+
+
+def test_closes_are_written_to_the_kline_store_off_the_reader(tmp_path):
+    store = KlineStore(str(tmp_path))
+    client = BinanceWebSocketClient(kline_store=store)
+
+    async def run():
+        for bar in range(3):
+            await client._handle_kline_data(_closed(bar, bar))
+        assert store.length("BTCUSDT", "1h") == 0  # nothing written by the reader itself
+        await client.stop_stream()
+
+    asyncio.run(run())
+
+    assert list(store.columns("BTCUSDT", "1h")["close"]) == [0, 1, 2]